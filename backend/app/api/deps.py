@@ -1,16 +1,16 @@
-from typing import Generator
+from typing import AsyncIterator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
-from app.core import security
+from app.core import read_routing
 from app.core.config import get_settings
-from app.core.database import get_db
-from app.crud.crud_user import get_user_by_email
+from app.core import database
+from app.crud.aio import user as crud_user
 
 settings = get_settings()
 
@@ -19,22 +19,111 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+def _token_subject(token: str) -> str:
     try:
         payload = jwt.decode(
             token, settings.secret_key, algorithms=[settings.algorithm]
         )
-        token_data = schemas.token.TokenPayload(**payload)
+        return schemas.token.TokenPayload(**payload).sub
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = get_user_by_email(db, email=token_data.sub)
+
+
+def _check_active(user: Optional[models.User]) -> models.User:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
+
+
+def _check_superuser(user: models.User) -> models.User:
+    if not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return user
+
+
+async def get_async_db(
+    request: Request, db: AsyncSession = Depends(database.get_async_db)
+) -> AsyncIterator[AsyncSession]:
+    """
+    Primary session. If the request wrote anything, the user's reads are
+    pinned to the primary for a while (see `read_routing`).
+    """
+    yield db
+    subject = getattr(request.state, "token_subject", None)
+    if subject and db.info.get("has_writes"):
+        await read_routing.mark_write(subject)
+
+
+async def get_current_user(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(reusable_oauth2),
+) -> models.User:
+    subject = _token_subject(token)
+    user = _check_active(await crud_user.get_by_email(db, email=subject))
+    request.state.token_subject = subject
+    return user
+
+
+async def get_current_superuser(
+    current_user: models.User = Depends(get_current_user),
+) -> models.User:
+    return _check_superuser(current_user)
+
+
+async def is_superuser_token(authorization: str) -> bool:
+    """
+    Whether an `Authorization: Bearer` header value belongs to an active
+    superuser. For middleware, which runs before any route dependency.
+    """
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        token_data = schemas.token.TokenPayload(**payload)
+    except (JWTError, ValidationError):
+        return False
+    async with database.AsyncSessionLocal() as db:
+        user = await crud_user.get_by_email(db, email=token_data.sub)
+    return bool(user and user.is_active and user.is_superuser)
+
+
+async def get_read_db(
+    token: str = Depends(reusable_oauth2),
+) -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only endpoints, served by a replica when one is
+    configured. Never committed; pair it with `get_read_user`, which loads
+    the user on this same session.
+    """
+    sessionmaker = await read_routing.read_sessionmaker(_token_subject(token))
+    async with sessionmaker() as db:
+        yield db
+
+
+async def get_read_user(
+    db: AsyncSession = Depends(get_read_db),
+    token: str = Depends(reusable_oauth2),
+) -> models.User:
+    """
+    `get_current_user` for read-only endpoints, without a primary session.
+    """
+    email = _token_subject(token)
+    user = await crud_user.get_by_email(db, email=email)
+    if user is None and db.bind is not database.async_engine:
+        # A user who just signed up may not have reached the replica yet.
+        async with database.AsyncSessionLocal() as primary:
+            user = await crud_user.get_by_email(primary, email=email)
+    return _check_active(user)
+
+
+async def get_read_superuser(
+    current_user: models.User = Depends(get_read_user),
+) -> models.User:
+    return _check_superuser(current_user)
@@ -1,74 +1,110 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import crud, models, schemas
 from app.api import deps
+from app.core import read_routing
+from app.services import analytics_service, export_service
 
 router = APIRouter()
 
 
+async def _farm_filter(db: AsyncSession, farm_id: Optional[int], owner_id: str):
+    """
+    Criteria restricting animals to one owned farm, or to all of the owner's farms.
+    """
+    if farm_id:
+        farm = await crud.aio.farm.get(db, id=farm_id)
+        if not farm:
+            raise HTTPException(status_code=404, detail="Farm not found")
+        if farm.owner_id != owner_id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        return models.Animal.farm_id == farm_id
+    return models.Animal.farm_id.in_(crud.farm.owned_ids(owner_id))
+
+
 @router.get("/", response_model=List[schemas.animal.Animal])
-def read_animals(
-    db: Session = Depends(deps.get_db),
+async def read_animals(
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = None,
     farm_id: int = None,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: models.User = Depends(deps.get_read_user),
 ) -> Any:
     """
     Retrieve animals. Optionally filter by farm_id.
+    Pass `after_id` (the last id of the previous page) for keyset pagination.
     """
-    if farm_id:
-        farm = crud.crud_farm.get_farm(db=db, farm_id=farm_id)
-        if not farm:
-            raise HTTPException(status_code=404, detail="Farm not found")
-        if farm.owner_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-        animals = crud.crud_animal.get_animals_by_farm(
-            db=db, farm_id=farm_id, skip=skip, limit=limit
-        )
-    else:
-        # If no farm specified, return all animals from all user's farms ??
-        # Or just return empty list or error?
-        # Better: get all farms of user, then get animals.
-        # But for simplicity, let's require farm_id or return 400.
-        # Alternatively, find all farms and query animals in those farms.
-        user_farms = crud.crud_farm.get_farms_by_owner(db=db, owner_id=current_user.id)
-        farm_ids = [farm.id for farm in user_farms]
-        animals = (
-            db.query(models.Animal)
-            .filter(models.Animal.farm_id.in_(farm_ids))
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-    return animals
+    return await crud.aio.animal.get_multi(
+        db,
+        await _farm_filter(db, farm_id, current_user.id),
+        skip=skip,
+        limit=limit,
+        after_id=after_id,
+        columns=crud.animal.columns_for(schemas.animal.Animal),
+    )
+
+
+@router.get("/export")
+async def export_animals(
+    db: AsyncSession = Depends(deps.get_read_db),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    farm_id: int = None,
+    current_user: models.User = Depends(deps.get_read_user),
+) -> Any:
+    """
+    Stream every animal of a farm (or of all the user's farms) as NDJSON or CSV.
+    """
+    criteria = await _farm_filter(db, farm_id, current_user.id)
+    export_columns = crud.animal.export_columns
+
+    # The request session is closed before the body is sent, so the
+    # cursor needs a session of its own.
+    export_sessionmaker = await read_routing.read_sessionmaker(current_user.email)
+
+    async def rows():
+        async with export_sessionmaker() as export_db:
+            async for row in crud.aio.animal.stream(
+                export_db, criteria, columns=export_columns
+            ):
+                yield row
+
+    return StreamingResponse(
+        export_service.aencode_rows(
+            format, [column.key for column in export_columns], rows()
+        ),
+        media_type=export_service.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="animals.{format}"'},
+    )
 
 
 @router.post("/", response_model=schemas.animal.Animal)
-def create_animal(
+async def create_animal(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     animal_in: schemas.animal.AnimalCreate,
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Create new animal.
     """
-    farm = crud.crud_farm.get_farm(db=db, farm_id=animal_in.farm_id)
+    farm = await crud.aio.farm.get(db, id=animal_in.farm_id)
     if not farm:
         raise HTTPException(status_code=404, detail="Farm not found")
     if farm.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    
-    animal = crud.crud_animal.create_animal(db=db, animal=animal_in)
+
+    animal = await crud.aio.animal.create(db, obj_in=animal_in)
+    analytics_service.invalidate_on_commit(db, animal.farm_id)
     return animal
 
 
 @router.put("/{animal_id}", response_model=schemas.animal.Animal)
-def update_animal(
+async def update_animal(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     animal_id: int,
     animal_in: schemas.animal.AnimalUpdate,
     current_user: models.User = Depends(deps.get_current_user),
@@ -76,36 +112,38 @@ def update_animal(
     """
     Update an animal.
     """
-    animal = crud.crud_animal.get_animal(db=db, animal_id=animal_id)
+    animal = await crud.aio.animal.get(db, id=animal_id)
     if not animal:
         raise HTTPException(status_code=404, detail="Animal not found")
-    
+
     # Check permission via farm
-    farm = crud.crud_farm.get_farm(db=db, farm_id=animal.farm_id)
+    farm = await crud.aio.farm.get(db, id=animal.farm_id)
     if not farm or farm.owner_id != current_user.id:
-         raise HTTPException(status_code=403, detail="Not enough permissions")
+        raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    animal = crud.crud_animal.update_animal(db=db, db_animal=animal, animal_update=animal_in)
+    animal = await crud.aio.animal.update(db, db_obj=animal, obj_in=animal_in)
+    analytics_service.invalidate_on_commit(db, farm.id, animal.farm_id)
     return animal
 
 
 @router.delete("/{animal_id}", response_model=schemas.animal.Animal)
-def delete_animal(
+async def delete_animal(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     animal_id: int,
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Delete an animal.
     """
-    animal = crud.crud_animal.get_animal(db=db, animal_id=animal_id)
+    animal = await crud.aio.animal.get(db, id=animal_id)
     if not animal:
         raise HTTPException(status_code=404, detail="Animal not found")
-        
-    farm = crud.crud_farm.get_farm(db=db, farm_id=animal.farm_id)
+
+    farm = await crud.aio.farm.get(db, id=animal.farm_id)
     if not farm or farm.owner_id != current_user.id:
-         raise HTTPException(status_code=403, detail="Not enough permissions")
-         
-    animal = crud.crud_animal.delete_animal(db=db, db_animal=animal)
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    animal = await crud.aio.animal.remove(db, db_obj=animal)
+    analytics_service.invalidate_on_commit(db, animal.farm_id)
     return animal
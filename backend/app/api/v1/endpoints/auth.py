@@ -9,19 +9,23 @@ from app import crud, models, schemas
 from app.api import deps
 from app.core import security
 from app.core.config import get_settings
+from app.core.database import get_db
 
 settings = get_settings()
 router = APIRouter()
 
+# These endpoints stay sync on purpose: bcrypt hashing is CPU-bound and
+# belongs in the threadpool, not on the event loop.
+
 
 @router.post("/login", response_model=schemas.token.Token)
 def login_access_token(
-    db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = crud.crud_user.authenticate(
+    user = crud.user.authenticate(
         db, email=form_data.username, password=form_data.password
     )
     if not user:
@@ -41,7 +45,7 @@ def login_access_token(
     refresh_token_str = str(uuid.uuid4())
     expires_at = datetime.utcnow() + refresh_token_expires
     
-    crud.crud_token.create_refresh_token(
+    crud.refresh_token.create_for_user(
         db, token=refresh_token_str, user_id=user.id, expires_at=expires_at
     )
     
@@ -55,13 +59,13 @@ def login_access_token(
 @router.post("/refresh", response_model=schemas.token.Token)
 def refresh_token(
     refresh_token: str,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(get_db),
 ) -> Any:
     """
     Refresh access token.
     """
     # Find token
-    db_token = crud.crud_token.get_refresh_token(db, token=refresh_token)
+    db_token = crud.refresh_token.get_by_token(db, token=refresh_token)
     if not db_token:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     
@@ -74,12 +78,12 @@ def refresh_token(
         raise HTTPException(status_code=401, detail="Token expired")
         
     # Get user
-    user = crud.crud_user.get_user(db, user_id=db_token.user_id)
+    user = crud.user.get(db, id=db_token.user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
     # Rotate token: revoke old, create new
-    crud.crud_token.revoke_refresh_token(db, db_token)
+    crud.refresh_token.revoke(db, db_obj=db_token)
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     refresh_token_expires = timedelta(days=settings.refresh_token_expire_days)
@@ -92,7 +96,7 @@ def refresh_token(
     new_refresh_token_str = str(uuid.uuid4())
     new_expires_at = datetime.utcnow() + refresh_token_expires
     
-    crud.crud_token.create_refresh_token(
+    crud.refresh_token.create_for_user(
         db, token=new_refresh_token_str, user_id=user.id, expires_at=new_expires_at
     )
     
@@ -106,37 +110,37 @@ def refresh_token(
 @router.post("/revoke", response_model=Any)
 def revoke_token(
     refresh_token: str,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Revoke a refresh token.
     """
-    db_token = crud.crud_token.get_refresh_token(db, token=refresh_token)
+    db_token = crud.refresh_token.get_by_token(db, token=refresh_token)
     if not db_token:
         raise HTTPException(status_code=404, detail="Token not found")
         
     if db_token.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
         
-    crud.crud_token.revoke_refresh_token(db, db_token)
+    crud.refresh_token.revoke(db, db_obj=db_token)
     return {"message": "Token revoked"}
 
 
 @router.post("/register", response_model=schemas.user.User)
 def register_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(get_db),
     user_in: schemas.user.UserCreate,
 ) -> Any:
     """
     Create new user.
     """
-    user = crud.crud_user.get_user_by_email(db, email=user_in.email)
+    user = crud.user.get_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system",
         )
-    user = crud.crud_user.create_user(db, user=user_in)
+    user = crud.user.create(db, obj_in=user_in)
     return user
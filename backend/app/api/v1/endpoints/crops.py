@@ -1,69 +1,110 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import crud, models, schemas
 from app.api import deps
+from app.core import read_routing
+from app.services import analytics_service, export_service
 
 router = APIRouter()
 
 
+async def _farm_filter(db: AsyncSession, farm_id: Optional[int], owner_id: str):
+    """
+    Criteria restricting crops to one owned farm, or to all of the owner's farms.
+    """
+    if farm_id:
+        farm = await crud.aio.farm.get(db, id=farm_id)
+        if not farm:
+            raise HTTPException(status_code=404, detail="Farm not found")
+        if farm.owner_id != owner_id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        return models.Crop.farm_id == farm_id
+    return models.Crop.farm_id.in_(crud.farm.owned_ids(owner_id))
+
+
 @router.get("/", response_model=List[schemas.crop.Crop])
-def read_crops(
-    db: Session = Depends(deps.get_db),
+async def read_crops(
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = None,
     farm_id: int = None,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: models.User = Depends(deps.get_read_user),
 ) -> Any:
     """
     Retrieve crops. Optionally filter by farm_id.
+    Pass `after_id` (the last id of the previous page) for keyset pagination.
     """
-    if farm_id:
-        farm = crud.crud_farm.get_farm(db=db, farm_id=farm_id)
-        if not farm:
-            raise HTTPException(status_code=404, detail="Farm not found")
-        if farm.owner_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-        crops = crud.crud_crop.get_crops_by_farm(
-            db=db, farm_id=farm_id, skip=skip, limit=limit
-        )
-    else:
-        user_farms = crud.crud_farm.get_farms_by_owner(db=db, owner_id=current_user.id)
-        farm_ids = [farm.id for farm in user_farms]
-        crops = (
-            db.query(models.Crop)
-            .filter(models.Crop.farm_id.in_(farm_ids))
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-    return crops
+    return await crud.aio.crop.get_multi(
+        db,
+        await _farm_filter(db, farm_id, current_user.id),
+        skip=skip,
+        limit=limit,
+        after_id=after_id,
+        columns=crud.crop.columns_for(schemas.crop.Crop),
+    )
+
+
+@router.get("/export")
+async def export_crops(
+    db: AsyncSession = Depends(deps.get_read_db),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    farm_id: int = None,
+    current_user: models.User = Depends(deps.get_read_user),
+) -> Any:
+    """
+    Stream every crop of a farm (or of all the user's farms) as NDJSON or CSV.
+    """
+    criteria = await _farm_filter(db, farm_id, current_user.id)
+    export_columns = crud.crop.export_columns
+
+    # The request session is closed before the body is sent, so the
+    # cursor needs a session of its own.
+    export_sessionmaker = await read_routing.read_sessionmaker(current_user.email)
+
+    async def rows():
+        async with export_sessionmaker() as export_db:
+            async for row in crud.aio.crop.stream(
+                export_db, criteria, columns=export_columns
+            ):
+                yield row
+
+    return StreamingResponse(
+        export_service.aencode_rows(
+            format, [column.key for column in export_columns], rows()
+        ),
+        media_type=export_service.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="crops.{format}"'},
+    )
 
 
 @router.post("/", response_model=schemas.crop.Crop)
-def create_crop(
+async def create_crop(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     crop_in: schemas.crop.CropCreate,
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Create new crop.
     """
-    farm = crud.crud_farm.get_farm(db=db, farm_id=crop_in.farm_id)
+    farm = await crud.aio.farm.get(db, id=crop_in.farm_id)
     if not farm:
         raise HTTPException(status_code=404, detail="Farm not found")
     if farm.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    
-    crop = crud.crud_crop.create_crop(db=db, crop=crop_in)
+
+    crop = await crud.aio.crop.create(db, obj_in=crop_in)
+    analytics_service.invalidate_on_commit(db, crop.farm_id)
     return crop
 
 
 @router.put("/{crop_id}", response_model=schemas.crop.Crop)
-def update_crop(
+async def update_crop(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     crop_id: int,
     crop_in: schemas.crop.CropUpdate,
     current_user: models.User = Depends(deps.get_current_user),
@@ -71,35 +112,38 @@ def update_crop(
     """
     Update a crop.
     """
-    crop = crud.crud_crop.get_crop(db=db, crop_id=crop_id)
+    crop = await crud.aio.crop.get(db, id=crop_id)
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
-    
-    farm = crud.crud_farm.get_farm(db=db, farm_id=crop.farm_id)
+
+    # Check permission via farm
+    farm = await crud.aio.farm.get(db, id=crop.farm_id)
     if not farm or farm.owner_id != current_user.id:
-         raise HTTPException(status_code=403, detail="Not enough permissions")
+        raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    crop = crud.crud_crop.update_crop(db=db, db_crop=crop, crop_update=crop_in)
+    crop = await crud.aio.crop.update(db, db_obj=crop, obj_in=crop_in)
+    analytics_service.invalidate_on_commit(db, farm.id, crop.farm_id)
     return crop
 
 
 @router.delete("/{crop_id}", response_model=schemas.crop.Crop)
-def delete_crop(
+async def delete_crop(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     crop_id: int,
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Delete a crop.
     """
-    crop = crud.crud_crop.get_crop(db=db, crop_id=crop_id)
+    crop = await crud.aio.crop.get(db, id=crop_id)
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
-        
-    farm = crud.crud_farm.get_farm(db=db, farm_id=crop.farm_id)
+
+    farm = await crud.aio.farm.get(db, id=crop.farm_id)
     if not farm or farm.owner_id != current_user.id:
-         raise HTTPException(status_code=403, detail="Not enough permissions")
-         
-    crop = crud.crud_crop.delete_crop(db=db, db_crop=crop)
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    crop = await crud.aio.crop.remove(db, db_obj=crop)
+    analytics_service.invalidate_on_commit(db, crop.farm_id)
     return crop
@@ -0,0 +1,63 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud, models, schemas
+from app.api import deps
+from app.core.config import get_settings
+from app.services import dead_letter_service
+
+router = APIRouter()
+settings = get_settings()
+
+
+@router.get("/", response_model=List[schemas.dead_letter.FailedTask])
+async def read_failed_tasks(
+    db: AsyncSession = Depends(deps.get_async_db),
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    task_name: Optional[str] = None,
+    pending_only: bool = False,
+    current_user: models.User = Depends(deps.get_current_superuser),
+) -> Any:
+    """
+    Dead-lettered tasks, oldest first (keyset pagination on `after_id`).
+    `pending_only` hides failures already replayed. Failures reach this
+    table with the next DLQ flush, a few seconds after they happen.
+    """
+    criteria = []
+    if task_name:
+        criteria.append(models.FailedTask.task_name == task_name)
+    if pending_only:
+        criteria.append(models.FailedTask.replayed_at.is_(None))
+    return await crud.aio.failed_task.get_multi(
+        db,
+        *criteria,
+        after_id=after_id,
+        limit=min(limit, 1000),
+        columns=crud.failed_task.columns_for(schemas.dead_letter.FailedTask),
+    )
+
+
+@router.post("/replay", response_model=schemas.dead_letter.DeadLetterReplayResult)
+async def replay_failed_tasks(
+    replay_in: schemas.dead_letter.DeadLetterReplay,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_superuser),
+) -> Any:
+    """
+    Re-enqueue failed tasks with their original arguments. They are spread
+    out at `dlq_replay_rate` per second across all replays, so replaying a
+    backlog doesn't swamp the workers that just recovered.
+    """
+    failures = await crud.aio.failed_task.get_multi(
+        db, models.FailedTask.id.in_(replay_in.ids), limit=None
+    )
+    failures = [f for f in failures if dead_letter_service.replayable(f.task_name)]
+    replayed = dead_letter_service.replay(failures, settings.dlq_replay_rate)
+    if failures:
+        await crud.aio.failed_task.mark_replayed(db, ids=[f.id for f in failures])
+    replayed_ids = {f.id for f in failures}
+    return {
+        "replayed": replayed,
+        "skipped": [id for id in replay_in.ids if id not in replayed_ids],
+    }
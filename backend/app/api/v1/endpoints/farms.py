@@ -1,6 +1,6 @@
-from typing import List, Any
+from typing import List, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import crud, models, schemas
 from app.api import deps
 
@@ -8,46 +8,53 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.farm.Farm])
-def read_farms(
-    db: Session = Depends(deps.get_db),
+async def read_farms(
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_user),
+    after_id: Optional[int] = None,
+    current_user: models.User = Depends(deps.get_read_user),
 ) -> Any:
     """
     Retrieve farms.
+    Pass `after_id` (the last id of the previous page) for keyset pagination.
     """
-    farms = crud.crud_farm.get_farms_by_owner(
-        db=db, owner_id=current_user.id, skip=skip, limit=limit
+    farms = await crud.aio.farm.get_multi_by_owner(
+        db,
+        owner_id=current_user.id,
+        skip=skip,
+        limit=limit,
+        after_id=after_id,
+        columns=crud.farm.columns_for(schemas.farm.Farm),
     )
     return farms
 
 
 @router.post("/", response_model=schemas.farm.Farm)
-def create_farm(
+async def create_farm(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     farm_in: schemas.farm.FarmCreate,
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Create new farm.
     """
-    farm = crud.crud_farm.create_farm(db=db, farm=farm_in, owner_id=current_user.id)
+    farm = await crud.aio.farm.create(db, obj_in=farm_in, owner_id=current_user.id)
     return farm
 
 
 @router.get("/{farm_id}", response_model=schemas.farm.Farm)
-def read_farm(
+async def read_farm(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     farm_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: models.User = Depends(deps.get_read_user),
 ) -> Any:
     """
     Get farm by ID.
     """
-    farm = crud.crud_farm.get_farm(db=db, farm_id=farm_id)
+    farm = await crud.aio.farm.get(db, id=farm_id)
     if not farm:
         raise HTTPException(status_code=404, detail="Farm not found")
     if farm.owner_id != current_user.id:
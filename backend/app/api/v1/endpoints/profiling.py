@@ -0,0 +1,75 @@
+import asyncio
+import json
+from typing import Any, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+from app import models
+from app.api import deps
+from app.core import profiler
+from app.core.config import get_settings
+
+router = APIRouter()
+settings = get_settings()
+
+ProfileFormat = Literal["speedscope", "folded"]
+
+
+def _check_enabled() -> None:
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+
+def _render(folded: str, name: str, format: ProfileFormat) -> Response:
+    if format == "folded":
+        return Response(
+            folded,
+            media_type="text/plain",
+            headers={"Content-Disposition": 'attachment; filename="profile.folded"'},
+        )
+    return Response(
+        json.dumps(profiler.to_speedscope(folded, name)),
+        media_type="application/json",
+        headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'},
+    )
+
+
+@router.get("/")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0),
+    format: ProfileFormat = "speedscope",
+    current_user: models.User = Depends(deps.get_current_superuser),
+) -> Any:
+    """
+    Sample every thread of the worker serving this request for `seconds`
+    and return the profile: speedscope JSON (open it at
+    https://www.speedscope.app) or folded stacks for flamegraph.pl. With
+    several workers, each call profiles whichever one it lands on (`pid`
+    in the profile name).
+    """
+    _check_enabled()
+    if not profiler.acquire():
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+    sampler = profiler.StackSampler(settings.profile_interval_ms / 1000).start()
+    try:
+        await asyncio.sleep(min(seconds, settings.profile_max_seconds))
+    finally:
+        sampler.stop()
+        profiler.release()
+    return _render(sampler.folded(), profiler.profile_name("worker"), format)
+
+
+@router.get("/requests/{profile_id}")
+async def read_request_profile(
+    profile_id: str,
+    format: ProfileFormat = "speedscope",
+    current_user: models.User = Depends(deps.get_current_superuser),
+) -> Any:
+    """
+    Profile of a request sent with `X-Profile: 1`; `profile_id` is its
+    `X-Profile-Id` response header. Kept for ten minutes.
+    """
+    _check_enabled()
+    profile = profiler.load_request_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return _render(profile["folded"], profile["name"], format)
@@ -0,0 +1,153 @@
+import re
+import uuid
+from typing import Any, Iterator, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud, models, schemas
+from app.api import deps
+from app.core import fair_share, task_events
+from app.services import report_service
+from app.services.artifact_store import artifact_store
+from app.tasks import generate_report_task
+
+router = APIRouter()
+
+# Bytes read from the artifact per chunk of a download.
+CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+# Report ids are sha256 hex digests; anything else can't name an artifact.
+_REPORT_ID = re.compile(r"[0-9a-f]{64}")
+
+
+def _byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single-range `Range` header, or None to send
+    the whole artifact. Raises 416 when the range lies outside it.
+    """
+    match = _RANGE.fullmatch(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        # Absent, malformed or multi-range: serving the full body is allowed.
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _read(path, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as artifact:
+        artifact.seek(start)
+        while length > 0:
+            chunk = artifact.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@router.post("/", response_model=schemas.report.ReportStatus, status_code=202)
+async def request_report(
+    report_in: schemas.report.ReportRequest,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Request a report over all of the user's farms.
+
+    Requests are keyed by a hash of their parameters and the state of the
+    data they cover, so repeating one returns the finished artifact (or the
+    render already in progress) instead of rendering it again.
+    """
+    farm_ids = list((await db.scalars(crud.farm.owned_ids(current_user.id))).all())
+    report_id = report_service.report_key(
+        current_user.id,
+        report_in.report_type,
+        report_in.format,
+        farm_ids,
+        await report_service.afingerprint(db, farm_ids),
+    )
+    report_url = f"/api/v1/reports/{report_id}"
+    if artifact_store.exists(report_id):
+        artifact_store.touch(report_id)
+        return {"report_id": report_id, "status": "ready", "report_url": report_url}
+
+    task_id = str(uuid.uuid4())
+    running = report_service.claim(report_id, task_id)
+    if running:
+        task_id = running
+    else:
+        task_events.register(task_id, current_user.id)
+        try:
+            fair_share.submit(
+                generate_report_task,
+                (report_in.report_type, current_user.id),
+                current_user.id,
+                kwargs={"export_format": report_in.format, "report_id": report_id},
+                task_id=task_id,
+            )
+        except fair_share.RateLimited:
+            report_service.release(report_id)
+            raise
+    return {
+        "report_id": report_id,
+        "status": "pending",
+        "report_url": report_url,
+        "task_id": task_id,
+    }
+
+
+@router.get("/{report_id}")
+async def download_report(
+    report_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Download a finished report. Single byte ranges are honoured (206), so
+    large reports can be fetched in parts or resumed.
+    """
+    metadata = artifact_store.metadata(report_id) if _REPORT_ID.fullmatch(report_id) else None
+    if not metadata or not artifact_store.exists(report_id):
+        raise HTTPException(status_code=404, detail="Report not found")
+    if metadata["owner_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    artifact_store.touch(report_id)
+    size = metadata["size"]
+    # Artifacts are content-addressed, so the key is a strong validator.
+    etag = f'"{report_id}"'
+    extension = metadata["format"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="report_{report_id[:12]}.{extension}"',
+    }
+    media_type = report_service.REPORT_MEDIA_TYPES[extension]
+
+    byte_range = _byte_range(range_header, size) if if_range in (None, etag) else None
+    if size == 0:
+        return Response(status_code=200, headers=headers, media_type=media_type)
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _read(artifact_store.path(report_id), start, end - start + 1),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
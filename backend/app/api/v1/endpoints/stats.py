@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud, models, schemas
+from app.api import deps
+from app.services import analytics_service
+
+router = APIRouter()
+
+# Longest date range /worker-activity serves in one response.
+MAX_ACTIVITY_DAYS = 366
+
+
+async def _owned_farms(db: AsyncSession, farm_id: Optional[int], owner_id: str):
+    """
+    Subquery of the farms whose rollups may be read: one owned farm, or all
+    of the owner's farms.
+    """
+    if farm_id:
+        farm = await crud.aio.farm.get(db, id=farm_id)
+        if not farm:
+            raise HTTPException(status_code=404, detail="Farm not found")
+        if farm.owner_id != owner_id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        return crud.farm.owned_ids(owner_id).where(models.Farm.id == farm_id)
+    return crud.farm.owned_ids(owner_id)
+
+
+@router.get("/animals", response_model=List[schemas.stats.AnimalStatusCount])
+async def animal_status_counts(
+    db: AsyncSession = Depends(deps.get_read_db),
+    farm_id: int = None,
+    current_user: models.User = Depends(deps.get_read_user),
+) -> Any:
+    """
+    Animals per farm by health and vaccination status, from the rollup table
+    (refreshed every minute by the `refresh_rollups_task` beat task).
+    """
+    farms = await _owned_farms(db, farm_id, current_user.id)
+    return await crud.aio.animal_status_summary.get_multi(
+        db,
+        models.AnimalStatusSummary.farm_id.in_(farms),
+        limit=None,
+        columns=crud.animal_status_summary.columns_for(schemas.stats.AnimalStatusCount),
+    )
+
+
+@router.get("/crops", response_model=List[schemas.stats.CropCount])
+async def crop_counts(
+    db: AsyncSession = Depends(deps.get_read_db),
+    farm_id: int = None,
+    current_user: models.User = Depends(deps.get_read_user),
+) -> Any:
+    """
+    Crops planted and harvested per farm and crop name, from the rollup table.
+    """
+    farms = await _owned_farms(db, farm_id, current_user.id)
+    return await crud.aio.crop_summary.get_multi(
+        db,
+        models.CropSummary.farm_id.in_(farms),
+        limit=None,
+        columns=crud.crop_summary.columns_for(schemas.stats.CropCount),
+    )
+
+
+@router.get("/herd")
+async def herd_analytics(
+    db: AsyncSession = Depends(deps.get_async_db),
+    farm_id: int = None,
+    current_user: models.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Herd analytics for one farm or all of the user's farms: health and
+    vaccination coverage, crop cycle durations and monthly trends.
+
+    Reads the primary rather than a replica: reports are cached until the
+    next write, so one built from a lagging replica would stay stale.
+    """
+    farms = await _owned_farms(db, farm_id, current_user.id)
+    farm_ids = list((await db.scalars(farms)).all())
+    return await analytics_service.aherd_report(db, farm_ids)
+
+
+@router.get("/worker-activity", response_model=List[schemas.stats.WorkerActivityCount])
+async def worker_activity_counts(
+    db: AsyncSession = Depends(deps.get_read_db),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    worker_id: Optional[int] = None,
+    current_user: models.User = Depends(deps.get_read_superuser),
+) -> Any:
+    """
+    Farm Records activities per worker per day (default: the last 30 days).
+    Superusers only: Farm Records workers aren't tied to farms or users, so
+    the counts can't be scoped to the caller's farms.
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=29)
+    if (date_to - date_from).days >= MAX_ACTIVITY_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Date range is limited to {MAX_ACTIVITY_DAYS} days",
+        )
+    return await crud.aio.farm_record_daily_count.get_range(
+        db, date_from=date_from, date_to=date_to, worker_id=worker_id
+    )
@@ -1,20 +1,51 @@
-from fastapi import APIRouter, Depends
+import json
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from app.tasks import generate_report_task, ai_prediction_task
 from app.api import deps
 from app import models
+from app.core import idempotency, task_events
+from app.core.celery_app import celery_app
 
 router = APIRouter()
 
+# Seconds between keep-alive comments on an idle event stream, so proxies
+# don't close it while a long task runs.
+HEARTBEAT_SECONDS = 15
+# Longest an event stream stays open; the client reconnects for more.
+STREAM_MAX_SECONDS = 15 * 60
+
+
+def _backend_event(task_id: str) -> Dict[str, Any]:
+    result = celery_app.AsyncResult(task_id)
+    info = result.info
+    meta = info if isinstance(info, dict) or info is None else {"error": str(info)}
+    return {"task_id": task_id, "state": result.state, "meta": meta}
+
+
+def _check_owner(task_id: str, user: models.User) -> None:
+    owner = task_events.owner(task_id)
+    if owner is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if owner != user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+
 @router.post("/mock-report")
 async def trigger_mock_report(
     report_type: str = "Annual Livestock Summary",
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """
-    Trigger a background report generation task.
+    Trigger a background report generation task. Repeating the request
+    while it runs, or shortly after, returns the same task (and its result
+    once finished) instead of starting another.
     """
-    task = generate_report_task.delay(report_type, current_user.id)
-    return {"message": "Report generation started", "task_id": task.id}
+    submission = idempotency.submit(
+        generate_report_task, [report_type, current_user.id], current_user.id
+    )
+    return {"message": "Report generation started", **submission}
 
 @router.post("/mock-prediction")
 async def trigger_mock_prediction(
@@ -22,7 +53,53 @@ async def trigger_mock_prediction(
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """
-    Trigger a background AI prediction task.
+    Trigger a background AI prediction task; deduplicated like mock-report.
+    """
+    submission = idempotency.submit(
+        ai_prediction_task, [{"crop_type": crop_type, "user_id": current_user.id}], current_user.id
+    )
+    return {"message": "AI prediction started", **submission}
+
+@router.get("/{task_id}")
+async def task_status(
+    task_id: str,
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Current state of a task: PENDING, STARTED, PROGRESS (meta has
+    `current`/`total`), RETRY, SUCCESS (meta is the result) or FAILURE.
     """
-    task = ai_prediction_task.delay({"crop_type": crop_type, "user_id": current_user.id})
-    return {"message": "AI prediction started", "task_id": task.id}
+    _check_owner(task_id, current_user)
+    # If nothing was published (yet), ask the result backend.
+    return task_events.snapshot(task_id) or _backend_event(task_id)
+
+@router.get("/{task_id}/events")
+async def task_event_stream(
+    task_id: str,
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Server-Sent Events stream of a task's state: the current state first,
+    then every change, closing once the task succeeds or fails, or after
+    `STREAM_MAX_SECONDS` (reconnect to keep watching). Send the usual bearer
+    token (e.g. with a fetch-based EventSource client).
+    """
+    _check_owner(task_id, current_user)
+
+    async def stream():
+        async for event in task_events.subscribe(
+            task_id,
+            heartbeat=HEARTBEAT_SECONDS,
+            max_seconds=STREAM_MAX_SECONDS,
+            fallback=lambda: _backend_event(task_id),
+        ):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['state'].lower()}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,45 +1,72 @@
 import json
 import logging
+import time
 from typing import Optional, Any
 from redis import Redis
+import redis.asyncio as aioredis
 from app.core.config import get_settings
+from app.core.metrics import CACHE_OPERATION_SECONDS, CACHE_REQUESTS
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
 # Initialize Redis client
 redis_client = Redis.from_url(settings.redis_url, decode_responses=True)
+# Shared by async callers (event streams, read routing); connections are
+# pooled, and each pub/sub subscription borrows one while it lasts.
+async_redis_client = aioredis.Redis.from_url(settings.redis_url, decode_responses=True)
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
 
 def set_cache(key: str, value: Any, ttl: int = 1800) -> bool:
     """
     Store a value in Redis with an optional TTL (default 30 mins).
     """
+    start = time.perf_counter()
     try:
         serialized_value = json.dumps(value)
-        return redis_client.setex(key, ttl, serialized_value)
+        stored = redis_client.setex(key, ttl, serialized_value)
+        CACHE_REQUESTS.labels("set", _namespace(key), "ok").inc()
+        return stored
     except Exception as e:
+        CACHE_REQUESTS.labels("set", _namespace(key), "error").inc()
         logger.error(f"Error setting cache for key {key}: {e}")
         return False
+    finally:
+        CACHE_OPERATION_SECONDS.labels("set").observe(time.perf_counter() - start)
 
 def get_cache(key: str) -> Optional[Any]:
     """
     Retrieve a value from Redis.
     """
+    start = time.perf_counter()
     try:
         cached_value = redis_client.get(key)
         if cached_value:
+            CACHE_REQUESTS.labels("get", _namespace(key), "hit").inc()
             return json.loads(cached_value)
+        CACHE_REQUESTS.labels("get", _namespace(key), "miss").inc()
         return None
     except Exception as e:
+        CACHE_REQUESTS.labels("get", _namespace(key), "error").inc()
         logger.error(f"Error getting cache for key {key}: {e}")
         return None
+    finally:
+        CACHE_OPERATION_SECONDS.labels("get").observe(time.perf_counter() - start)
 
 def delete_cache(key: str) -> bool:
     """
     Delete a key from Redis.
     """
+    start = time.perf_counter()
     try:
-        return bool(redis_client.delete(key))
+        deleted = bool(redis_client.delete(key))
+        CACHE_REQUESTS.labels("delete", _namespace(key), "ok").inc()
+        return deleted
     except Exception as e:
+        CACHE_REQUESTS.labels("delete", _namespace(key), "error").inc()
         logger.error(f"Error deleting cache for key {key}: {e}")
         return False
+    finally:
+        CACHE_OPERATION_SECONDS.labels("delete").observe(time.perf_counter() - start)
@@ -1,25 +1,87 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init
+from kombu import Queue
 from app.core.config import get_settings
+from app.core.task_events import EventTask
+from app.core.tracing import setup_tracing
 
 settings = get_settings()
 
+# Queue per kind of work, so a long report never sits in front of a
+# prediction someone is waiting on. Each queue has its own worker service
+# in docker-compose, sized (and prefetching) for its tasks.
+DEFAULT_QUEUE = "default"
+TASK_QUEUES = {
+    "generate_report_task": "reports",
+    "ai_prediction_task": "ai",
+    "maintain_farm_record_partitions": "ingestion",
+    "purge_farm_record_keys": "ingestion",
+    "refresh_rollups_task": "ingestion",
+    "sweep_report_artifacts_task": "reports",
+    **settings.celery_task_queues,
+}
+
 celery_app = Celery(
     "moometrics",
     broker=str(settings.redis_url),
     backend=str(settings.redis_url).replace("/0", "/1"), # Separate DB for results
-    include=["app.tasks"]
+    include=["app.tasks"],
+    task_cls=EventTask,
 )
 
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer=settings.celery_serializer,
+    # Keep accepting JSON so messages queued before a switch to msgpack
+    # still run.
+    accept_content=sorted({"json", settings.celery_serializer}),
+    result_serializer=settings.celery_serializer,
+    result_accept_content=sorted({"json", settings.celery_serializer}),
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
     result_expires=3600, # 1 hour
+    task_default_queue=DEFAULT_QUEUE,
+    task_queues=[
+        Queue(name, routing_key=name)
+        for name in sorted({DEFAULT_QUEUE, *TASK_QUEUES.values()})
+    ],
+    task_routes={task: {"queue": queue} for task, queue in TASK_QUEUES.items()},
+    worker_prefetch_multiplier=settings.celery_prefetch_multiplier,
+    beat_schedule={
+        "maintain-farm-record-partitions": {
+            "task": "maintain_farm_record_partitions",
+            "schedule": 24 * 60 * 60,
+        },
+        "purge-farm-record-keys": {
+            "task": "purge_farm_record_keys",
+            "schedule": 24 * 60 * 60,
+        },
+        "refresh-rollups": {
+            "task": "refresh_rollups_task",
+            "schedule": settings.rollup_refresh_seconds,
+        },
+        "pump-fair-share": {
+            "task": "pump_fair_share_task",
+            "schedule": 60,
+        },
+        "sweep-report-artifacts": {
+            "task": "sweep_report_artifacts_task",
+            "schedule": 24 * 60 * 60,
+        },
+        "flush-dead-letters": {
+            "task": "flush_dead_letters_task",
+            "schedule": settings.dlq_flush_seconds,
+        },
+    },
 )
 
+
+@worker_process_init.connect
+def init_worker_tracing(**kwargs):
+    # Per pool process: the exporter's thread doesn't survive the fork.
+    setup_tracing("moometrics-worker")
+
+
 if __name__ == "__main__":
     celery_app.start()
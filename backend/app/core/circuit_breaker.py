@@ -2,6 +2,7 @@ import time
 import logging
 from enum import Enum
 from typing import Callable, Any, Optional
+from app.core.metrics import CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +11,9 @@ class CircuitState(Enum):
     OPEN = "OPEN"
     HALF_OPEN = "HALF_OPEN"
 
+# Value of the circuit_breaker_state gauge per state.
+_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
 class CircuitBreaker:
     def __init__(
         self, 
@@ -23,11 +27,25 @@ class CircuitBreaker:
         self.recovery_timeout = recovery_timeout
         self.time_window = time_window
         
-        self.state = CircuitState.CLOSED
+        self._state = CircuitState.CLOSED
+        CIRCUIT_BREAKER_STATE.labels(name).set(_STATE_VALUES[self._state])
         self.failures = []
         self.last_failure_time = 0
         self.opened_at = 0
 
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    @state.setter
+    def state(self, state: CircuitState) -> None:
+        # The services drive some transitions themselves, so they are
+        # counted here rather than in `call`.
+        if state != self._state:
+            CIRCUIT_BREAKER_TRANSITIONS.labels(self.name, self._state.value, state.value).inc()
+            CIRCUIT_BREAKER_STATE.labels(self.name).set(_STATE_VALUES[state])
+        self._state = state
+
     def _cleanup_old_failures(self):
         now = time.time()
         self.failures = [f for f in self.failures if now - f < self.time_window]
@@ -3,7 +3,7 @@ Configuration management for the backend API.
 """
 
 from functools import lru_cache
-from typing import Literal, List, Union
+from typing import Dict, Literal, List, Optional, Union
 from pydantic import Field, field_validator, AnyHttpUrl, PostgresDsn, computed_field
 from pydantic_settings import BaseSettings
 
@@ -15,6 +15,9 @@ class Settings(BaseSettings):
     environment: Literal["development", "staging", "production"] = Field(
         default="development", description="Application environment"
     )
+    frontend_url: str = Field(
+        default="http://localhost:3000", description="Frontend origin allowed by CORS"
+    )
 
     # API Keys
     openweather_api_key: str = Field(..., description="OpenWeatherMap API key")
@@ -36,6 +39,138 @@ class Settings(BaseSettings):
     postgres_db: str = Field(default="moometrics", description="Postgres database name")
     postgres_user: str = Field(default="postgres", description="Postgres user")
     postgres_password: str = Field(default="postgres", description="Postgres password")
+    database_replica_urls: List[str] = Field(
+        default_factory=list,
+        description="Read replicas for GET endpoints, as a JSON list of connection strings",
+    )
+    replica_read_your_writes_seconds: int = Field(
+        default=5,
+        description="After a user writes, their reads stay on the primary for this long",
+    )
+
+    # Connection pool
+    db_max_connections: int = Field(
+        default=100,
+        description="Connections this deployment may hold in total (Postgres max_connections budget)",
+    )
+    web_concurrency: int = Field(
+        default=4, description="API worker processes sharing the connection budget"
+    )
+    celery_worker_processes: int = Field(
+        default=13,
+        description="Celery worker and beat processes sharing the connection budget, over all "
+        "worker services (docker-compose: 2 + 2 + 8 workers and beat)",
+    )
+    db_pool_size: Optional[int] = Field(
+        default=None,
+        description="Persistent connections per engine; derived from the budget when unset",
+    )
+    db_max_overflow: int = Field(
+        default=5, description="Extra connections an engine may open under burst load"
+    )
+    db_pool_timeout: float = Field(
+        default=10.0, description="Seconds to wait for a pooled connection before failing"
+    )
+    db_pool_recycle: int = Field(
+        default=1800, description="Seconds after which pooled connections are replaced"
+    )
+    db_disconnect_strategy: Literal["pessimistic", "optimistic"] = Field(
+        default="pessimistic",
+        description="pessimistic pings on every checkout; optimistic relies on recycle and invalidation",
+    )
+    db_pgbouncer_transaction_mode: bool = Field(
+        default=False,
+        description="Disable server-side prepared statements for PgBouncer transaction pooling",
+    )
+
+    # Query diagnostics
+    slow_query_ms: int = Field(
+        default=200, description="Statements slower than this (ms) are logged with fingerprints"
+    )
+    n_plus_one_threshold: int = Field(
+        default=5,
+        description="Executions of one statement within a request reported as a likely N+1",
+    )
+
+    # Maintenance
+    farm_records_partition_months_ahead: int = Field(
+        default=3,
+        description="Monthly farm_records partitions kept created ahead of the current month",
+    )
+    farm_record_key_retention_days: int = Field(
+        default=30,
+        description="Days an ingestion idempotency key is kept; a retry after that inserts again",
+    )
+    rollup_refresh_seconds: int = Field(
+        default=60, description="How often the dashboard rollup tables are refreshed"
+    )
+
+    # Reports
+    report_store_dir: str = Field(
+        default="artifacts/reports",
+        description="Directory generated report artifacts are stored in; shared by API and worker",
+    )
+    report_retention_days: int = Field(
+        default=7, description="Report artifacts unused for this long are deleted by a daily sweep"
+    )
+
+    # Celery
+    celery_serializer: Literal["json", "msgpack"] = Field(
+        default="json",
+        description="Task and result serializer; msgpack is smaller and faster for large payloads",
+    )
+    celery_prefetch_multiplier: int = Field(
+        default=4,
+        description="Messages a worker process reserves ahead; 1 for queues of long tasks",
+    )
+    celery_task_queues: Dict[str, str] = Field(
+        default_factory=dict,
+        description='Per-task queue overrides as JSON, e.g. {"ai_prediction_task": "default"}',
+    )
+    dlq_flush_seconds: int = Field(
+        default=5, description="How often buffered task failures are written to failed_tasks"
+    )
+    dlq_replay_rate: float = Field(
+        default=5.0, description="Tasks per second re-enqueued by a dead-letter replay"
+    )
+    fair_share_max_running: Dict[str, int] = Field(
+        default={"interactive": 4, "batch": 2},
+        description="Tasks per user queued or running at once, per lane (interactive/batch)",
+    )
+    fair_share_rate_per_minute: Dict[str, int] = Field(
+        default={"interactive": 30, "batch": 10},
+        description="Task submissions per user per minute, per lane; also the burst allowed",
+    )
+    task_idempotency_ttl: int = Field(
+        default=600,
+        description="Seconds an identical task submission by the same user reuses the first one",
+    )
+
+    # Profiling
+    profiling_enabled: bool = Field(
+        default=False,
+        description="Allow superusers to sample-profile a worker or a request (X-Profile header)",
+    )
+    profile_interval_ms: float = Field(
+        default=5.0, description="Stack sampling interval of the profiler"
+    )
+    profile_max_seconds: int = Field(
+        default=60, description="Longest on-demand worker profile"
+    )
+
+    # Tracing
+    tracing_enabled: bool = Field(
+        default=False, description="Export OpenTelemetry traces of the API and workers"
+    )
+    otel_exporter_otlp_endpoint: str = Field(
+        default="http://otel-collector:4317", description="OTLP/gRPC endpoint of the collector"
+    )
+    otel_traces_sampler_ratio: float = Field(
+        default=0.05,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of new traces recorded; tasks follow the request that queued them",
+    )
 
     # Redis Cache settings
     redis_url: str = Field(default="redis://redis:6379/0", description="Redis connection URL")
@@ -45,6 +180,26 @@ class Settings(BaseSettings):
 
     # Logging
     log_level: str = Field(default="INFO", description="Logging level")
+    log_format: Literal["json", "text"] = Field(
+        default="json", description="Log line format: one JSON object per line, or plain text"
+    )
+    log_queue_size: int = Field(
+        default=10000,
+        description="Log records buffered for the writer thread; records beyond it are dropped",
+    )
+    log_sample_rates: Dict[str, float] = Field(
+        default={"app.services.weather_service": 0.1, "app.services.ai_service": 0.1},
+        description="Fraction of DEBUG/INFO records kept per logger (and its children), as JSON",
+    )
+    access_log_sample_rate: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of requests written to the access log; errors and slow requests always are",
+    )
+    access_log_slow_ms: int = Field(
+        default=1000, description="Requests slower than this (ms) are always access-logged"
+    )
 
     @field_validator("openweather_api_key")
     @classmethod
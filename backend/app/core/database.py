@@ -1,22 +1,124 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from app.core.config import get_settings
+from app.core.pool import engine_kwargs, instrument_pool, instrument_queries
+from app.core.tracing import instrument_engines
 
 settings = get_settings()
 
 engine = create_engine(
-    str(settings.database_url), 
-    pool_pre_ping=True
+    str(settings.database_url),
+    **engine_kwargs(settings, "sync", is_async=False)
+)
+instrument_pool(engine, "sync")
+instrument_queries(engine, "sync")
+
+# expire_on_commit=False: objects returned by the CRUD layer stay usable after
+# the per-request commit without being re-read.
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+
+def _async_database_url(url: str) -> str:
+    """
+    Map the configured URL onto an asyncio driver: psycopg3 for Postgres
+    (the same package serves both APIs), aiosqlite for local SQLite.
+    """
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("postgresql"):
+        return f"postgresql+psycopg://{rest}"
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+async_engine = create_async_engine(
+    _async_database_url(str(settings.database_url)),
+    **engine_kwargs(settings, "async", is_async=True)
+)
+instrument_pool(async_engine.sync_engine, "async")
+instrument_queries(async_engine.sync_engine, "async")
+
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, bind=async_engine
+)
+
+replica_engines = [
+    create_async_engine(
+        _async_database_url(url),
+        **engine_kwargs(settings, f"replica{index}", is_async=True)
+    )
+    for index, url in enumerate(settings.database_replica_urls)
+]
+for index, replica_engine in enumerate(replica_engines):
+    instrument_pool(replica_engine.sync_engine, f"replica{index}")
+    instrument_queries(replica_engine.sync_engine, f"replica{index}")
+
+instrument_engines(
+    [engine, async_engine.sync_engine, *(replica.sync_engine for replica in replica_engines)]
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReplicaSessionLocals = [
+    async_sessionmaker(autoflush=False, expire_on_commit=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
 
 Base = declarative_base()
 
 
+@event.listens_for(Session, "do_orm_execute")
+def _track_writes(orm_execute_state):
+    # Lets the request layer tell whether a session wrote anything, for
+    # read-your-writes routing.
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["has_writes"] = True
+
+
 def get_db():
+    """
+    Request-scoped session. CRUD writes only execute statements; the whole
+    request is committed once here, or rolled back if the endpoint raised.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@contextmanager
+def session_scope():
+    """
+    Standalone session for work that outlives the request dependency,
+    such as streaming responses that keep reading after the endpoint returns.
+    """
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Async counterpart of `get_db`, with the same commit-once semantics.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
@@ -0,0 +1,247 @@
+"""
+Fair-share admission for user-submitted background tasks.
+
+Workers take tasks first come, first served, so a user who queues dozens
+of reports would otherwise sit in front of everyone else's. Every
+submission of a laned task goes through `submit` instead of `apply_async`:
+
+- A token bucket per user and lane bounds how fast they can submit;
+  an empty bucket raises `RateLimited` (answered with 429 by the API).
+- At most `max_running` of a user's tasks per lane are on the broker or
+  running at once. Further submissions are held in a per-user Redis list
+  and released one by one as the user's earlier tasks finish, so one
+  user's backlog waits behind their own work, not in the shared queue.
+- Each lane sends its tasks at its own Celery priority. Lanes already map
+  to separate queues, but a worker consuming several (or a deployment
+  that routes them to one) takes interactive predictions before batch
+  reports.
+
+Admission, holding and release are single Lua scripts, so concurrent API
+processes and workers can't overshoot a cap. A slot whose task never
+reports back (a killed worker) lapses after `SLOT_LEASE` seconds, and
+`pump` (run by beat) releases held tasks that no finishing task did and
+renews the lease of those still waiting, so a long backlog isn't dropped.
+"""
+
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+from celery import Task
+
+from app.core import task_events, tracing
+from app.core.cache import redis_client
+from app.core.celery_app import celery_app
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Seconds a slot stays taken without its task finishing. Covers a report's
+# retries with backoff; only a lost task holds it this long.
+SLOT_LEASE = 3600
+
+
+@dataclass(frozen=True)
+class Lane:
+    name: str
+    # Celery message priority; on Redis, 0 is served first.
+    priority: int
+    max_running: int
+    # Token bucket: submissions per minute, and the bucket's size.
+    rate_per_minute: int
+
+
+LANES = {
+    "ai_prediction_task": Lane(
+        "interactive",
+        priority=0,
+        max_running=settings.fair_share_max_running["interactive"],
+        rate_per_minute=settings.fair_share_rate_per_minute["interactive"],
+    ),
+    "generate_report_task": Lane(
+        "batch",
+        priority=6,
+        max_running=settings.fair_share_max_running["batch"],
+        rate_per_minute=settings.fair_share_rate_per_minute["batch"],
+    ),
+}
+_LANES_BY_NAME = {lane.name: lane for lane in LANES.values()}
+
+
+class RateLimited(Exception):
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"Too many {lane} tasks submitted, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+# KEYS: bucket, running, held, waiting users, task lane
+# ARGV: now, rate per second, bucket size, max running, lease, task id,
+#       held payload, user id, task lane value
+# Returns {-1, seconds to wait} when rate limited, {1, 0} when admitted,
+# {0, position} when held.
+_ADMIT = redis_client.register_script("""
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local size = tonumber(ARGV[3])
+local bucket = redis.call('hmget', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or size
+local at = tonumber(bucket[2]) or now
+tokens = math.min(size, tokens + math.max(0, now - at) * rate)
+if tokens < 1 then
+    return {-1, math.ceil((1 - tokens) / rate)}
+end
+redis.call('hset', KEYS[1], 'tokens', tostring(tokens - 1), 'at', tostring(now))
+redis.call('expire', KEYS[1], math.ceil(size / rate) + 1)
+
+local lease = tonumber(ARGV[5])
+redis.call('set', KEYS[5], ARGV[9], 'EX', lease)
+redis.call('zremrangebyscore', KEYS[2], '-inf', now - lease)
+if redis.call('zcard', KEYS[2]) < tonumber(ARGV[4]) and redis.call('llen', KEYS[3]) == 0 then
+    redis.call('zadd', KEYS[2], now, ARGV[6])
+    redis.call('expire', KEYS[2], lease)
+    return {1, 0}
+end
+local position = redis.call('rpush', KEYS[3], ARGV[7])
+redis.call('expire', KEYS[3], lease)
+redis.call('sadd', KEYS[4], ARGV[8])
+return {0, position}
+""")
+
+# KEYS: running, held, waiting users
+# ARGV: now, max running, lease, finished task id ('' for none), user id
+# Frees the finished task's slot and returns the held payloads that now fit.
+# Renews the lease of tasks still held, so `pump` keeps them from lapsing.
+_RELEASE = redis_client.register_script("""
+local now = tonumber(ARGV[1])
+local lease = tonumber(ARGV[3])
+if ARGV[4] ~= '' then
+    redis.call('zrem', KEYS[1], ARGV[4])
+end
+redis.call('zremrangebyscore', KEYS[1], '-inf', now - lease)
+local released = {}
+while redis.call('zcard', KEYS[1]) < tonumber(ARGV[2]) do
+    local payload = redis.call('lpop', KEYS[2])
+    if not payload then
+        break
+    end
+    redis.call('zadd', KEYS[1], now, cjson.decode(payload)['task_id'])
+    redis.call('expire', KEYS[1], lease)
+    table.insert(released, payload)
+end
+if redis.call('llen', KEYS[2]) == 0 then
+    redis.call('srem', KEYS[3], ARGV[5])
+else
+    redis.call('expire', KEYS[2], lease)
+end
+return released
+""")
+
+
+def _user_keys(lane: Lane, user_id: Any):
+    prefix = f"fair_share:{lane.name}"
+    return f"{prefix}:running:{user_id}", f"{prefix}:held:{user_id}"
+
+
+def _waiting_key(lane: Lane) -> str:
+    # Users with held tasks in the lane.
+    return f"fair_share:{lane.name}:waiting"
+
+
+def _task_lane_key(task_id: str) -> str:
+    return f"fair_share:task:{task_id}"
+
+
+def _send(lane: Lane, task_name: str, args, kwargs, task_id: str) -> None:
+    celery_app.tasks[task_name].apply_async(
+        args=args, kwargs=kwargs, task_id=task_id, priority=lane.priority
+    )
+
+
+def submit(
+    task: Task,
+    args: Sequence[Any],
+    user_id: Any,
+    *,
+    kwargs: Optional[Dict[str, Any]] = None,
+    task_id: Optional[str] = None,
+) -> str:
+    """
+    Enqueue `task` for `user_id` if they have a free slot in its lane,
+    otherwise hold it until one frees up. Returns the task id either way.
+    Raises `RateLimited` when the user's bucket for the lane is empty.
+    """
+    task_id = task_id or str(uuid.uuid4())
+    args, kwargs = list(args), kwargs or {}
+    lane = LANES.get(task.name)
+    if lane is None:
+        task.apply_async(args=args, kwargs=kwargs, task_id=task_id)
+        return task_id
+
+    running, held = _user_keys(lane, user_id)
+    payload = json.dumps({
+        "task_id": task_id,
+        "name": task.name,
+        "args": args,
+        "kwargs": kwargs,
+        # Sent later from a worker; keeps the task in its submitter's trace.
+        "trace": tracing.inject(),
+    })
+    outcome, value = _ADMIT(
+        keys=[f"fair_share:{lane.name}:bucket:{user_id}", running, held, _waiting_key(lane),
+              _task_lane_key(task_id)],
+        args=[time.time(), lane.rate_per_minute / 60, lane.rate_per_minute, lane.max_running,
+              SLOT_LEASE, task_id, payload, user_id, json.dumps([lane.name, user_id])],
+    )
+    if outcome == -1:
+        raise RateLimited(lane.name, value)
+    if outcome == 1:
+        try:
+            _send(lane, task.name, args, kwargs, task_id)
+        except Exception:
+            release(task_id)
+            raise
+    else:
+        logger.info(f"Holding {task.name} {task_id} for user {user_id} at position {value}")
+        task_events.publish(task_id, "PENDING", {"held": value})
+    return task_id
+
+
+def _release(lane: Lane, user_id: Any, task_id: str = "") -> None:
+    running, held = _user_keys(lane, user_id)
+    for payload in _RELEASE(
+        keys=[running, held, _waiting_key(lane)],
+        args=[time.time(), lane.max_running, SLOT_LEASE, task_id, user_id],
+    ):
+        queued = json.loads(payload)
+        # Its owner key may have lapsed while it was held.
+        redis_client.set(
+            _task_lane_key(queued["task_id"]), json.dumps([lane.name, user_id]), ex=SLOT_LEASE
+        )
+        with tracing.attached(queued.get("trace")):
+            _send(lane, queued["name"], queued["args"], queued["kwargs"], queued["task_id"])
+
+
+def release(task_id: str) -> None:
+    """
+    Free the slot of a finished task and send on its user's held tasks.
+    """
+    owner = redis_client.get(_task_lane_key(task_id))
+    if owner is None:
+        # Not admitted through `submit` (beat and maintenance tasks).
+        return
+    lane_name, user_id = json.loads(owner)
+    redis_client.delete(_task_lane_key(task_id))
+    _release(_LANES_BY_NAME[lane_name], user_id, task_id)
+
+
+def pump() -> None:
+    """
+    Release held tasks of every waiting user whose slots have lapsed.
+    """
+    for lane in LANES.values():
+        for user_id in redis_client.smembers(_waiting_key(lane)):
+            _release(lane, user_id)
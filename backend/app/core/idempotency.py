@@ -0,0 +1,83 @@
+"""
+Idempotent task submission.
+
+A submission is keyed by the task name, its arguments and the submitting
+user. The first one claims the key in Redis (SET NX with a TTL) under a
+pre-generated task id and only then enqueues the task, so concurrent
+double-clicks race on the claim rather than on `delay()`: exactly one of
+them schedules work and the rest get its task id back, plus its result if
+it has already finished. A claim whose task failed or was revoked is given
+up, so retrying after an error schedules a fresh run.
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+from typing import Any, Dict, Sequence
+
+from celery import Task
+
+from app.core import fair_share, task_events
+from app.core.cache import redis_client
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Releases a claim only if it still names the failed task, so a claim
+# taken by a newer submission in the meantime survives.
+_RELEASE_IF_HELD = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def submission_key(task_name: str, args: Sequence[Any], user_id: str) -> str:
+    digest = hashlib.sha256(
+        json.dumps([task_name, list(args), user_id], sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"task_submission:{digest}"
+
+
+def submit(task: Task, args: Sequence[Any], user_id: str) -> Dict[str, Any]:
+    """
+    Enqueue `task(*args)` for `user_id` unless an identical submission is
+    queued, running or finished within `task_idempotency_ttl`. Returns
+    `task_id`, whether it was `deduplicated` and, for a finished task, its
+    `result`.
+    """
+    key = submission_key(task.name, args, user_id)
+    for _ in range(2):
+        task_id = str(uuid.uuid4())
+        if redis_client.set(key, task_id, nx=True, ex=settings.task_idempotency_ttl):
+            task_events.register(task_id, user_id)
+            try:
+                fair_share.submit(task, args, user_id, task_id=task_id)
+            except Exception:
+                redis_client.delete(key)
+                raise
+            return {"task_id": task_id, "deduplicated": False, "result": None}
+
+        existing = redis_client.get(key)
+        if existing is None:
+            # Expired between the two calls; claim it afresh.
+            continue
+        event = task_events.snapshot(existing) or {"state": "PENDING", "meta": None}
+        if event["state"] in ("FAILURE", "REVOKED"):
+            redis_client.eval(_RELEASE_IF_HELD, 1, key, existing)
+            continue
+        return {
+            "task_id": existing,
+            "deduplicated": True,
+            "result": event["meta"] if event["state"] == "SUCCESS" else None,
+        }
+    # The claim kept changing hands under us; run this submission unclaimed
+    # rather than hand back a task id that may no longer exist.
+    logger.warning(f"Could not settle the submission key of {task.name}, enqueueing anyway")
+    task_id = str(uuid.uuid4())
+    task_events.register(task_id, user_id)
+    fair_share.submit(task, args, user_id, task_id=task_id)
+    return {"task_id": task_id, "deduplicated": False, "result": None}
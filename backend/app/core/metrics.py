@@ -0,0 +1,116 @@
+"""
+Application-level Prometheus metrics.
+
+HTTP metrics come from prometheus-fastapi-instrumentator; everything below
+covers internals it cannot see. All metrics share the default registry, so
+they are exposed on the same /metrics endpoint.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Connection pool
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"],
+)
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_capacity",
+    "Maximum connections the pool may hand out (size + overflow)",
+    ["pool"],
+)
+
+# Logging
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records discarded because the log queue was full",
+)
+
+# Redis cache (app.core.cache)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache operations by key namespace (prefix before the first ':') and result",
+    ["operation", "namespace", "result"],
+)
+CACHE_OPERATION_SECONDS = Histogram(
+    "cache_operation_seconds",
+    "Round trip of a cache operation to Redis",
+    ["operation"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+
+# Circuit breakers
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Current breaker state: 0 closed, 1 half-open, 2 open",
+    ["breaker"],
+)
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total",
+    "Breaker state changes",
+    ["breaker", "from_state", "to_state"],
+)
+
+# Database queries
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds",
+    "Statement execution time as seen by the driver",
+    ["engine", "statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request",
+    "SQL statements executed while serving a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+DB_TIME_PER_REQUEST_SECONDS = Histogram(
+    "db_time_per_request_seconds",
+    "Total statement execution time while serving a request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_N_PLUS_ONE = Counter(
+    "db_n_plus_one_total",
+    "Requests that repeated one statement n_plus_one_threshold times or more",
+    ["route"],
+)
+
+# Outbound calls
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "upstream_request_seconds",
+    "Latency of calls to external APIs",
+    ["service", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+
+
+@contextmanager
+def track_upstream(service: str) -> Iterator[None]:
+    """
+    Time the enclosed call to `service`; it counts as an error if it raises.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        UPSTREAM_REQUEST_SECONDS.labels(service, outcome).observe(time.perf_counter() - start)
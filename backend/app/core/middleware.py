@@ -0,0 +1,190 @@
+"""
+Request id, timing headers and access log, as a pure ASGI middleware.
+
+`@app.middleware("http")` (BaseHTTPMiddleware) runs the rest of the app in
+a separate task and pipes the response body through a memory stream,
+which costs every request a few hundred microseconds before the handler
+does anything. Here `send` is wrapped in place instead: the headers are
+added to the `http.response.start` message on its way out and nothing
+else is touched.
+
+The access log is sampled (`access_log_sample_rate`), except for server
+errors and requests slower than `access_log_slow_ms`, which are always
+logged. Its fields are passed as `extra` and %-arguments, so a skipped or
+filtered record costs no formatting. The request id is also kept in
+`request_id_var` for the duration of the request, which tags every other
+record logged meanwhile (see `logging_config`).
+"""
+
+import logging
+import random
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import profiler
+from app.core.config import get_settings
+from app.core.logging_config import request_id_var
+from app.core.query_stats import QueryStats, finish, query_stats_var
+
+settings = get_settings()
+logger = logging.getLogger("api")
+
+
+class RequestContextMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = settings.access_log_sample_rate,
+        slow_ms: int = settings.access_log_slow_ms,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ns = slow_ms * 1_000_000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = str(uuid.uuid4())
+        # Where Starlette keeps `request.state`.
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+        start = time.perf_counter_ns()
+        status = 500
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = (time.perf_counter_ns() - start) / 1e9
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-process-time", str(elapsed).encode()),
+                    (b"x-request-id", request_id.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            elapsed_ns = time.perf_counter_ns() - start
+            if (
+                status >= 500
+                or elapsed_ns >= self.slow_ns
+                or random.random() < self.sample_rate
+            ) and logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "RID=%s METHOD=%s PATH=%s STATUS=%d TIME=%.4fs",
+                    request_id,
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    elapsed_ns / 1e9,
+                    extra={
+                        "request_id": request_id,
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "duration_ms": elapsed_ns / 1e6,
+                    },
+                )
+            request_id_var.reset(token)
+
+
+class QueryStatsMiddleware:
+    """
+    Collects the statements each request executes (see `query_stats`).
+    In development the counts so far are also sent as response headers.
+    """
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = settings.is_development):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats_var.set(stats)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"x-db-time", f"{stats.seconds:.6f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if self.expose_headers else send)
+        finally:
+            query_stats_var.reset(token)
+            # The matched route's template (set by routing), so ids in the
+            # path don't each become a label value.
+            route = scope.get("route")
+            finish(stats, route.path if route is not None else "unmatched")
+
+
+class RequestProfileMiddleware:
+    """
+    Sample-profiles requests sent with an `X-Profile` header by a superuser,
+    who gets an `X-Profile-Id` to fetch the result from
+    `/api/v1/admin/profile/requests/`. `authorize` checks the request's
+    `Authorization` header before the sampler starts; anyone else's
+    `X-Profile` is ignored.
+
+    The sampler sees every thread, so requests running concurrently in this
+    worker show up too. Requests without the header pay one header scan.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        authorize: Callable[[str], Awaitable[bool]],
+        interval_ms: float = settings.profile_interval_ms,
+    ):
+        self.app = app
+        self.authorize = authorize
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(
+            name == b"x-profile" for name, _ in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+        authorization = next(
+            (value for name, value in scope["headers"] if name == b"authorization"), b""
+        )
+        if not await self.authorize(authorization.decode("latin-1")) or not profiler.acquire():
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        sampler = profiler.StackSampler(self.interval).start()
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-profile-id", state["request_id"].encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            profiler.release()
+            profiler.save_request_profile(
+                state["request_id"],
+                profiler.profile_name(f"{scope['method']} {scope['path']}"),
+                sampler.folded(),
+            )
@@ -0,0 +1,144 @@
+"""
+Connection pool configuration and instrumentation for the SQLAlchemy engines.
+"""
+
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core import query_stats
+from app.core.config import Settings
+from app.core.metrics import (
+    DB_POOL_CAPACITY,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_QUERY_SECONDS,
+)
+
+# Every API and Celery process opens one sync and one async engine.
+ENGINES_PER_PROCESS = 2
+
+
+class _TimedCheckout:
+    """
+    Records how long each checkout waited for a connection, labelled with the
+    engine's `pool_logging_name` (which survives `engine.dispose()`).
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self._orig_logging_name).observe(
+                time.perf_counter() - start
+            )
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_budget(settings: Settings) -> int:
+    """
+    Connections each engine may hold when the Postgres budget is split
+    evenly over every process that connects: API workers, Celery workers
+    and beat.
+    """
+    processes = settings.web_concurrency + settings.celery_worker_processes
+    return settings.db_max_connections // (processes * ENGINES_PER_PROCESS)
+
+
+def pool_size(settings: Settings) -> int:
+    """
+    Persistent connections per engine.
+
+    Unless set explicitly, the engine's share of the connection budget,
+    leaving room for overflow.
+    """
+    if settings.db_pool_size is not None:
+        return settings.db_pool_size
+    return max(1, _engine_budget(settings) - settings.db_max_overflow)
+
+
+def max_overflow(settings: Settings) -> int:
+    """
+    Burst connections per engine: `db_max_overflow`, cut down to what the
+    engine's share of the budget leaves once its pool is derived from it.
+    """
+    if settings.db_pool_size is not None:
+        return settings.db_max_overflow
+    return min(settings.db_max_overflow, max(0, _engine_budget(settings) - pool_size(settings)))
+
+
+def engine_kwargs(settings: Settings, name: str, is_async: bool) -> Dict[str, Any]:
+    """
+    Keyword arguments for `create_engine` / `create_async_engine`.
+    """
+    if str(settings.database_url).startswith("sqlite"):
+        # SQLite has no server to exhaust; keep SQLAlchemy's defaults.
+        return {}
+    kwargs: Dict[str, Any] = {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": pool_size(settings),
+        "max_overflow": max_overflow(settings),
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_disconnect_strategy == "pessimistic",
+    }
+    if settings.db_pgbouncer_transaction_mode:
+        # psycopg3 prepares statements server-side after a few executions;
+        # under transaction pooling the next transaction may land on another
+        # backend where they do not exist.
+        kwargs["connect_args"] = {"prepare_threshold": None}
+    return kwargs
+
+
+def instrument_pool(engine, name: str) -> None:
+    """
+    Export checked-out connections and capacity for `engine` as gauges.
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+    DB_POOL_CHECKED_OUT.labels(name).set_function(lambda: engine.pool.checkedout())
+    DB_POOL_CAPACITY.labels(name).set(pool.size() + pool._max_overflow)
+
+
+# Statement kinds the query histogram is labelled with; DDL, SAVEPOINT,
+# COPY and the rest count as OTHER.
+_STATEMENT_KINDS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"})
+
+
+def _statement_kind(statement: str) -> str:
+    kind = statement.lstrip()[:6].upper()
+    if kind.startswith("WITH"):
+        return "WITH"
+    return kind if kind in _STATEMENT_KINDS else "OTHER"
+
+
+def instrument_queries(engine, name: str) -> None:
+    """
+    Time every statement `engine` executes, by kind, and feed it to the
+    per-request statistics in `query_stats`. Executemany batches count once.
+    """
+    histograms = {
+        kind: DB_QUERY_SECONDS.labels(name, kind) for kind in _STATEMENT_KINDS | {"OTHER"}
+    }
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        histograms[_statement_kind(statement)].observe(elapsed)
+        query_stats.record(statement, parameters, elapsed)
@@ -0,0 +1,132 @@
+"""
+Statistical stack sampler for profiling a live API worker.
+
+While running, a daemon thread reads every thread's current stack
+(`sys._current_frames`) every `interval` seconds and counts identical
+stacks. Nothing is hooked into the interpreter, so the profiled code runs
+at full speed apart from the sampling thread's own few percent, and an
+idle process pays nothing at all: there is no sampler until a profile is
+requested.
+
+Profiles are kept as folded stacks ("thread;outer;...;inner count" per
+line), the input format of flamegraph.pl, and converted to speedscope's
+JSON format for viewing as an interactive flamegraph
+(https://www.speedscope.app).
+
+One profile runs per process at a time (`acquire`/`release`); a second
+request is refused rather than doubling the overhead.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from app.core.cache import get_cache, set_cache
+
+# How long a profiled request's result can be fetched.
+REQUEST_PROFILE_TTL = 600
+
+_lock = threading.Lock()
+
+
+def acquire() -> bool:
+    return _lock.acquire(blocking=False)
+
+
+def release() -> None:
+    _lock.release()
+
+
+def _frame_name(frame) -> str:
+    # The function's first line rather than the current one, so samples
+    # anywhere in a function merge into one flamegraph frame.
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def to_speedscope(folded: str, name: str) -> Dict[str, Any]:
+    """
+    Convert folded stacks to a speedscope "sampled" profile.
+    """
+    frames: Dict[str, int] = {}
+    samples, weights = [], []
+    for line in folded.splitlines():
+        stack, _, count = line.rpartition(" ")
+        samples.append([frames.setdefault(frame, len(frames)) for frame in stack.split(";")])
+        weights.append(int(count))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "moometrics",
+        "shared": {"frames": [{"name": frame} for frame in frames]},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "none",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def profile_name(label: str) -> str:
+    return f"{label} pid={os.getpid()} at {time.strftime('%Y-%m-%dT%H:%M:%S')}"
+
+
+def _request_profile_key(profile_id: str) -> str:
+    return f"profile:{profile_id}"
+
+
+def save_request_profile(profile_id: str, name: str, folded: str) -> None:
+    set_cache(
+        _request_profile_key(profile_id),
+        {"name": name, "folded": folded},
+        ttl=REQUEST_PROFILE_TTL,
+    )
+
+
+def load_request_profile(profile_id: str) -> Optional[Dict[str, str]]:
+    return get_cache(_request_profile_key(profile_id))
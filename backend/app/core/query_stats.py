@@ -0,0 +1,94 @@
+"""
+Per-request statement counts, N+1 detection and slow-query logging.
+
+`instrument_queries` (app.core.pool) reports every statement an engine
+executes to `record`. While a request is being served,
+`QueryStatsMiddleware` keeps a `QueryStats` in `query_stats_var` that
+accumulates the statement count and database time; at the end of the
+request they are observed per route, and sent back as `X-DB-Queries` /
+`X-DB-Time` headers in development.
+
+A statement executed `n_plus_one_threshold` times or more within one
+request (same SQL, whatever the parameters) is reported as a likely N+1:
+a loop issuing one query per item that a join or an IN would have done in
+one. Statements slower than `slow_query_ms` are logged wherever they run,
+Celery tasks included, with fingerprints of the SQL and of its bound
+parameters instead of the values, so repeats can be grouped without
+writing user data to the logs.
+"""
+
+import hashlib
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import (
+    DB_N_PLUS_ONE,
+    DB_STATEMENTS_PER_REQUEST,
+    DB_TIME_PER_REQUEST_SECONDS,
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+
+query_stats_var: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def fingerprint(value: Any) -> str:
+    return hashlib.sha1(repr(value).encode()).hexdigest()[:12]
+
+
+def record(statement: str, parameters: Any, seconds: float) -> None:
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+        stats.statements[statement] += 1
+    if seconds * 1000 >= settings.slow_query_ms:
+        logger.warning(
+            "Slow query (%.1f ms) sql=%s params=%s: %s",
+            seconds * 1000,
+            fingerprint(statement),
+            fingerprint(parameters),
+            statement,
+            extra={
+                "duration_ms": seconds * 1000,
+                "sql_fingerprint": fingerprint(statement),
+                "params_fingerprint": fingerprint(parameters),
+            },
+        )
+
+
+def finish(stats: QueryStats, route: str) -> None:
+    """
+    Observe a finished request's statements and report likely N+1s.
+    """
+    DB_STATEMENTS_PER_REQUEST.labels(route).observe(stats.count)
+    DB_TIME_PER_REQUEST_SECONDS.labels(route).observe(stats.seconds)
+    for statement, count in stats.statements.items():
+        if count >= settings.n_plus_one_threshold:
+            DB_N_PLUS_ONE.labels(route).inc()
+            logger.warning(
+                "Possible N+1 on %s: statement executed %d times sql=%s: %s",
+                route,
+                count,
+                fingerprint(statement),
+                statement,
+                extra={
+                    "route": route,
+                    "repeats": count,
+                    "sql_fingerprint": fingerprint(statement),
+                },
+            )
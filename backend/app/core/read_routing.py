@@ -0,0 +1,67 @@
+"""
+Routing of read-only sessions between the primary and read replicas.
+
+Reads round-robin across `Settings.database_replica_urls`. A user who has
+just written is pinned to the primary for
+`replica_read_your_writes_seconds`, so replication lag never hides their
+own changes; the marker lives in Redis so it holds across workers.
+
+Users are identified by their token subject (their email), which the read
+path knows before it has loaded the user from any database.
+"""
+
+import itertools
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.cache import async_redis_client
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, ReplicaSessionLocals
+from app.core.metrics import CACHE_REQUESTS
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_replicas = itertools.cycle(ReplicaSessionLocals)
+
+
+def _recent_write_key(subject: str) -> str:
+    return f"recent_write:{subject}"
+
+
+async def mark_write(subject: str) -> None:
+    if not ReplicaSessionLocals:
+        return
+    try:
+        await async_redis_client.set(
+            _recent_write_key(subject), 1, ex=settings.replica_read_your_writes_seconds
+        )
+        CACHE_REQUESTS.labels("set", "recent_write", "ok").inc()
+    except Exception as e:
+        CACHE_REQUESTS.labels("set", "recent_write", "error").inc()
+        logger.error(f"Error marking a recent write by {subject}: {e}")
+
+
+async def wrote_recently(subject: str) -> bool:
+    """
+    Whether `subject` wrote within the window. True when Redis can't be
+    reached: the primary is always safe to read.
+    """
+    try:
+        recent = bool(await async_redis_client.exists(_recent_write_key(subject)))
+    except Exception as e:
+        CACHE_REQUESTS.labels("get", "recent_write", "error").inc()
+        logger.error(f"Error checking recent writes by {subject}: {e}")
+        return True
+    CACHE_REQUESTS.labels("get", "recent_write", "hit" if recent else "miss").inc()
+    return recent
+
+
+async def read_sessionmaker(subject: str) -> async_sessionmaker:
+    """
+    Session factory for a read-only request made by `subject`.
+    """
+    if not ReplicaSessionLocals or await wrote_recently(subject):
+        return AsyncSessionLocal
+    return next(_replicas)
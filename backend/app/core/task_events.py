@@ -0,0 +1,144 @@
+"""
+Task state changes pushed over Redis pub/sub.
+
+Every task runs as an `EventTask`, which publishes its state changes
+(STARTED, PROGRESS from `update_state`, RETRY, SUCCESS, FAILURE) on a
+per-task channel and keeps the latest one as a snapshot. The API streams
+them to clients as Server-Sent Events, so waiting on a task costs one idle
+pub/sub connection rather than a poll of the API and the result backend
+every second or two.
+
+The user a task was submitted for is recorded with `register`, so only
+they can watch it.
+
+A task lost with a killed worker never publishes its end, so a watch also
+asks a fallback (the result backend) once it has been quiet for a while,
+and ends after a maximum lifetime in any case; clients reconnect and get
+the current state.
+"""
+
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from celery import Task
+
+from app.core.cache import async_redis_client, get_cache, redis_client, set_cache
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# States after which a task publishes nothing more.
+FINAL_STATES = frozenset({"SUCCESS", "FAILURE", "REVOKED"})
+# Snapshots and owners live as long as Celery keeps results.
+EVENT_TTL = 3600
+
+
+def _channel(task_id: str) -> str:
+    return f"task_events:{task_id}"
+
+
+def _state_key(task_id: str) -> str:
+    return f"task_state:{task_id}"
+
+
+def _owner_key(task_id: str) -> str:
+    return f"task_owner:{task_id}"
+
+
+def register(task_id: str, user_id: str) -> None:
+    set_cache(_owner_key(task_id), user_id, ttl=EVENT_TTL)
+
+
+def owner(task_id: str) -> Optional[str]:
+    return get_cache(_owner_key(task_id))
+
+
+def publish(task_id: str, state: str, meta: Any = None) -> None:
+    event = {"task_id": task_id, "state": state, "meta": meta}
+    try:
+        payload = json.dumps(event, default=str)
+        redis_client.setex(_state_key(task_id), EVENT_TTL, payload)
+        redis_client.publish(_channel(task_id), payload)
+    except Exception as e:
+        # Watchers fall back to the snapshot / result backend; the task
+        # itself must not fail over it.
+        logger.error(f"Error publishing event for task {task_id}: {e}")
+
+
+def snapshot(task_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Latest published state of `task_id`, if it has published any.
+    """
+    return get_cache(_state_key(task_id))
+
+
+async def subscribe(
+    task_id: str,
+    heartbeat: float,
+    max_seconds: float,
+    fallback: Optional[Callable[[], Dict[str, Any]]] = None,
+    fallback_after: int = 4,
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Yield the task's current state, then each change until it finishes or
+    `max_seconds` have passed. Yields None after `heartbeat` seconds without
+    a change; after `fallback_after` of those in a row, the state returned
+    by `fallback()` is yielded instead if it is final, ending the watch.
+    """
+    deadline = time.monotonic() + max_seconds
+    pubsub = async_redis_client.pubsub()
+    try:
+        # Subscribe before reading the snapshot so no change falls between.
+        await pubsub.subscribe(_channel(task_id))
+        current = await async_redis_client.get(_state_key(task_id))
+        event = json.loads(current) if current else {
+            "task_id": task_id, "state": "PENDING", "meta": None,
+        }
+        yield event
+        idle = 0
+        while event["state"] not in FINAL_STATES and time.monotonic() < deadline:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=min(heartbeat, max(deadline - time.monotonic(), 0)),
+            )
+            if message is not None:
+                idle = 0
+                event = json.loads(message["data"])
+                yield event
+                continue
+            idle += 1
+            if fallback is not None and idle % fallback_after == 0:
+                checked = fallback()
+                if checked["state"] in FINAL_STATES:
+                    event = checked
+                    yield event
+                    continue
+            yield None
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+
+
+class EventTask(Task):
+    """
+    Base class of every task: publishes state changes as they happen.
+    """
+
+    def before_start(self, task_id, args, kwargs):
+        publish(task_id, "STARTED")
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        publish(task_id or self.request.id, state, meta)
+
+    def on_retry(self, exc, task_id, args, kwargs, einfo):
+        publish(task_id, "RETRY", {"error": str(exc)})
+
+    def on_success(self, retval, task_id, args, kwargs):
+        publish(task_id, "SUCCESS", retval)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        publish(task_id, "FAILURE", {"error": str(exc)})
@@ -0,0 +1,135 @@
+"""
+OpenTelemetry tracing, exported over OTLP to the local collector.
+
+Off unless `tracing_enabled`; the OpenTelemetry packages are then never
+imported and every helper here is a no-op, so the hot paths that call
+them pay one attribute check. When on:
+
+- FastAPI, SQLAlchemy (the engines passed to `instrument_engines`),
+  redis-py (the cache, task events, fair-share scripts) and httpx are
+  instrumented, so a request's trace shows where its time went.
+- Celery publishes carry the trace context in the message headers and the
+  worker continues the trace, so a task enqueued from `/api/v1/tasks/*`
+  appears under the request that submitted it. Tasks held by fair-share
+  admission keep the context of their submission (`inject`/`attached`).
+- Root spans are sampled at `otel_traces_sampler_ratio`; spans with a
+  sampled parent follow it, so traces are never cut in half between the
+  API and a worker. Spans are exported in batches from a background thread.
+"""
+
+import logging
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_configured = False
+
+
+def setup_tracing(service_name: str) -> None:
+    """
+    Install the tracer provider and the library instrumentations for this
+    process. Call once per process (in each Celery worker child).
+    """
+    global _configured
+    if not settings.tracing_enabled or _configured:
+        return
+
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    from opentelemetry.instrumentation.celery import CeleryInstrumentor
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    from opentelemetry.instrumentation.redis import RedisInstrumentor
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create(
+            {SERVICE_NAME: service_name, "deployment.environment": settings.environment}
+        ),
+        sampler=ParentBased(TraceIdRatioBased(settings.otel_traces_sampler_ratio)),
+    )
+    provider.add_span_processor(
+        BatchSpanProcessor(
+            OTLPSpanExporter(endpoint=settings.otel_exporter_otlp_endpoint, insecure=True)
+        )
+    )
+    trace.set_tracer_provider(provider)
+
+    RedisInstrumentor().instrument()
+    HTTPXClientInstrumentor().instrument()
+    CeleryInstrumentor().instrument()
+    _configured = True
+    logger.info(
+        f"Tracing {service_name} to {settings.otel_exporter_otlp_endpoint} "
+        f"(sampling {settings.otel_traces_sampler_ratio:.0%} of new traces)"
+    )
+
+
+def instrument_app(app) -> None:
+    if not settings.tracing_enabled:
+        return
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+    # Probes and scrapes would otherwise be most of the traces.
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="health,metrics")
+
+
+def instrument_engines(engines: Iterable) -> None:
+    """
+    Trace the statements of (sync) SQLAlchemy engines; pass an async
+    engine's `sync_engine`. All engines go in one call: the instrumentor
+    only instruments once per process.
+    """
+    if not settings.tracing_enabled:
+        return
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+    SQLAlchemyInstrumentor().instrument(engines=list(engines), enable_commenter=False)
+
+
+def span(name: str, **attributes: Any):
+    """
+    Context manager recording the enclosed block as a span of the current
+    trace.
+    """
+    if not settings.tracing_enabled:
+        return nullcontext()
+    from opentelemetry import trace
+
+    return trace.get_tracer(__name__).start_as_current_span(name, attributes=attributes)
+
+
+def inject() -> Optional[Dict[str, str]]:
+    """
+    The current trace context, to resume it later with `attached`.
+    """
+    if not settings.tracing_enabled:
+        return None
+    from opentelemetry import propagate
+
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attached(carrier: Optional[Dict[str, str]]) -> Iterator[None]:
+    """
+    Run the enclosed block in the trace context captured by `inject`.
+    """
+    if not settings.tracing_enabled or not carrier:
+        yield
+        return
+    from opentelemetry import context, propagate
+
+    token = context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        context.detach(token)
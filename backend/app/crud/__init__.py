@@ -1 +1,8 @@
-from . import crud_user, crud_farm, crud_animal, crud_crop, crud_token
+from .crud_user import user
+from .crud_farm import farm
+from .crud_animal import animal
+from .crud_crop import crop
+from .crud_token import refresh_token
+from .crud_rollup import animal_status_summary, crop_summary, farm_record_daily_count
+from .crud_failed_task import failed_task
+from . import aio
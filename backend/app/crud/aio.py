@@ -0,0 +1,26 @@
+"""
+Async CRUD objects, one per entity, wrapping the sync ones in `app.crud`.
+"""
+
+from app.crud.base import AsyncCRUD
+from app.crud.crud_animal import animal as _animal
+from app.crud.crud_crop import crop as _crop
+from app.crud.crud_failed_task import failed_task as _failed_task
+from app.crud.crud_farm import farm as _farm
+from app.crud.crud_rollup import (
+    animal_status_summary as _animal_status_summary,
+    crop_summary as _crop_summary,
+    farm_record_daily_count as _farm_record_daily_count,
+)
+from app.crud.crud_token import refresh_token as _refresh_token
+from app.crud.crud_user import user as _user
+
+user = AsyncCRUD(_user)
+farm = AsyncCRUD(_farm)
+animal = AsyncCRUD(_animal)
+crop = AsyncCRUD(_crop)
+refresh_token = AsyncCRUD(_refresh_token)
+animal_status_summary = AsyncCRUD(_animal_status_summary)
+crop_summary = AsyncCRUD(_crop_summary)
+farm_record_daily_count = AsyncCRUD(_farm_record_daily_count)
+failed_task = AsyncCRUD(_failed_task)
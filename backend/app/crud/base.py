@@ -0,0 +1,235 @@
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from pydantic import BaseModel
+from sqlalchemy import ColumnElement, Select, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+ModelType = TypeVar("ModelType", bound=Base)
+CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
+UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
+CRUDType = TypeVar("CRUDType", bound="CRUDBase")
+
+
+class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Generic CRUD engine shared by every entity.
+
+    Writes are a single INSERT/UPDATE ... RETURNING and are never committed
+    here; the `get_db` dependency commits once when the request finishes.
+    Reads skip soft-deleted rows when the model has `is_deleted`, and can
+    project to plain dicts (`columns=`) instead of hydrating ORM entities.
+    """
+
+    def __init__(self, model: Type[ModelType]):
+        self.model = model
+        self.soft_delete_aware = hasattr(model, "is_deleted")
+
+    # Reads
+
+    def columns_for(self, schema: Type[BaseModel]) -> List[Any]:
+        """
+        Model columns backing the fields of a response schema.
+        """
+        return [
+            column
+            for key, column in self.model.__table__.columns.items()
+            if key in schema.model_fields
+        ]
+
+    def _where(self, filters: Sequence[ColumnElement]) -> List[ColumnElement]:
+        criteria = list(filters)
+        if self.soft_delete_aware:
+            criteria.append(self.model.is_deleted == False)  # noqa: E712
+        return criteria
+
+    def get(self, db: Session, id: Any) -> Optional[ModelType]:
+        stmt = select(self.model).where(*self._where([self.model.id == id]))
+        return db.scalars(stmt).first()
+
+    def get_multi(
+        self,
+        db: Session,
+        *filters: ColumnElement,
+        skip: int = 0,
+        limit: Optional[int] = 100,
+        after_id: Optional[int] = None,
+        columns: Optional[Sequence[Any]] = None,
+    ) -> Union[List[ModelType], List[Dict[str, Any]]]:
+        """
+        List rows matching `filters`.
+
+        `after_id` switches from OFFSET to keyset pagination on the primary
+        key. With `columns`, only those columns are selected and rows come
+        back as dicts ready for the response model.
+        """
+        criteria = self._where(filters)
+        if after_id is not None:
+            criteria.append(self.model.id > after_id)
+        stmt = select(*columns) if columns else select(self.model)
+        stmt = stmt.where(*criteria).order_by(self.model.id).limit(limit)
+        if after_id is None:
+            stmt = stmt.offset(skip)
+        if columns:
+            return [dict(row) for row in db.execute(stmt).mappings()]
+        return list(db.scalars(stmt))
+
+    def stream_statement(
+        self,
+        *filters: ColumnElement,
+        columns: Sequence[Any],
+        batch_size: int = 1000,
+    ) -> Select:
+        return (
+            select(*columns)
+            .where(*self._where(filters))
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+    def stream(
+        self,
+        db: Session,
+        *filters: ColumnElement,
+        columns: Sequence[Any],
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield projected rows from a server-side cursor, `batch_size` at a time.
+        """
+        stmt = self.stream_statement(
+            *filters, columns=columns, batch_size=batch_size
+        )
+        yield from db.execute(stmt).mappings()
+
+    # Writes
+
+    def create(
+        self,
+        db: Session,
+        *,
+        obj_in: Union[CreateSchemaType, Dict[str, Any]],
+        **extra: Any,
+    ) -> ModelType:
+        values = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+        stmt = insert(self.model).values(**values, **extra).returning(self.model)
+        return db.scalars(stmt).one()
+
+    def create_multi(
+        self, db: Session, *, objs_in: Sequence[CreateSchemaType], **extra: Any
+    ) -> List[ModelType]:
+        """
+        Insert many rows in one executemany, returning the created entities.
+        """
+        if not objs_in:
+            return []
+        rows = [{**obj_in.model_dump(), **extra} for obj_in in objs_in]
+        return list(db.scalars(insert(self.model).returning(self.model), rows))
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> ModelType:
+        values = (
+            obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        )
+        if not values:
+            return db_obj
+        stmt = (
+            update(self.model)
+            .where(self.model.id == db_obj.id)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        return db.scalars(stmt).one()
+
+    def remove(self, db: Session, *, db_obj: ModelType) -> ModelType:
+        """
+        Soft delete when the model supports it, otherwise delete the row.
+        """
+        if self.soft_delete_aware:
+            return self.update(
+                db,
+                db_obj=db_obj,
+                obj_in={"is_deleted": True, "deleted_at": func.now()},
+            )
+        db.delete(db_obj)
+        db.flush()
+        return db_obj
+
+    def remove_multi(self, db: Session, *, ids: Sequence[int]) -> int:
+        """
+        Remove many rows in one statement, soft deleting like `remove` when
+        the model supports it; returns the number affected.
+        """
+        if self.soft_delete_aware:
+            stmt = (
+                update(self.model)
+                .where(*self._where([self.model.id.in_(ids)]))
+                .values(is_deleted=True, deleted_at=func.now())
+            )
+        else:
+            stmt = delete(self.model).where(self.model.id.in_(ids))
+        return db.execute(
+            stmt.execution_options(synchronize_session=False)
+        ).rowcount
+
+
+class AsyncCRUD(Generic[CRUDType]):
+    """
+    Awaitable view of a CRUD object for `AsyncSession` callers.
+
+    Every method of the wrapped object is available with the same signature,
+    taking an `AsyncSession` instead of a `Session`; the call runs through
+    `AsyncSession.run_sync`, so statements go out on the asyncio driver
+    without occupying a thread. Attributes that are not methods taking a
+    session (statement builders, column tuples) should be used from the
+    wrapped object directly.
+    """
+
+    def __init__(self, crud: CRUDType):
+        self.sync = crud
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self.sync, name)
+
+        async def call(db: AsyncSession, *args: Any, **kwargs: Any) -> Any:
+            return await db.run_sync(method, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        *filters: ColumnElement,
+        columns: Sequence[Any],
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        stmt = self.sync.stream_statement(
+            *filters, columns=columns, batch_size=batch_size
+        )
+        result = await db.stream(stmt)
+        async for row in result.mappings():
+            yield row
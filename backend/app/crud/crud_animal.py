@@ -1,46 +1,21 @@
-from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
+from app.crud.base import CRUDBase
 from app.models import Animal
 from app.schemas.animal import AnimalCreate, AnimalUpdate
 
 
-def get_animal(db: Session, animal_id: int):
-    return db.query(Animal).filter(Animal.id == animal_id, Animal.is_deleted == False).first()
-
-
-def get_animals_by_farm(db: Session, farm_id: int, skip: int = 0, limit: int = 100):
-    return (
-        db.query(Animal)
-        .filter(Animal.farm_id == farm_id, Animal.is_deleted == False)
-        .offset(skip)
-        .limit(limit)
-        .all()
+class CRUDAnimal(CRUDBase[Animal, AnimalCreate, AnimalUpdate]):
+    # Columns written by the bulk export endpoint; selected directly so rows
+    # never get hydrated into ORM entities.
+    export_columns = (
+        Animal.id,
+        Animal.tag_number,
+        Animal.type,
+        Animal.health_status,
+        Animal.vaccination_status,
+        Animal.farm_id,
+        Animal.created_at,
+        Animal.updated_at,
     )
 
 
-def create_animal(db: Session, animal: AnimalCreate):
-    db_animal = Animal(**animal.model_dump())
-    db.add(db_animal)
-    db.commit()
-    db.refresh(db_animal)
-    return db_animal
-
-
-def update_animal(db: Session, db_animal: Animal, animal_update: AnimalUpdate):
-    update_data = animal_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_animal, key, value)
-    db.add(db_animal)
-    db.commit()
-    db.refresh(db_animal)
-    return db_animal
-
-
-def delete_animal(db: Session, db_animal: Animal):
-    db_animal.is_deleted = True
-    db_animal.deleted_at = func.now()
-    db.add(db_animal)
-    db.commit()
-    db.refresh(db_animal)
-    return db_animal
+animal = CRUDAnimal(Animal)
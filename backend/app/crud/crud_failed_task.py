@@ -0,0 +1,43 @@
+from typing import Any, Dict, Sequence
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.crud.base import CRUDBase
+from app.models import FailedTask
+
+
+class CRUDFailedTask(CRUDBase[FailedTask, BaseModel, BaseModel]):
+    def upsert_many(self, db: Session, *, rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Insert failures in one statement. A row whose fingerprint is already
+        dead-lettered adds its occurrences to it instead, and takes its
+        latest task id and exception; that makes it replayable again.
+        """
+        insert_ = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert_(FailedTask).values(list(rows))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FailedTask.fingerprint],
+            set_={
+                "task_id": stmt.excluded.task_id,
+                "exception": stmt.excluded.exception,
+                "retry_count": stmt.excluded.retry_count,
+                "occurrences": FailedTask.occurrences + stmt.excluded.occurrences,
+                "last_failed_at": stmt.excluded.last_failed_at,
+                "replayed_at": None,
+            },
+        )
+        db.execute(stmt)
+
+    def mark_replayed(self, db: Session, *, ids: Sequence[int]) -> int:
+        stmt = (
+            update(FailedTask)
+            .where(FailedTask.id.in_(ids))
+            .values(replayed_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        return db.execute(stmt).rowcount
+
+
+failed_task = CRUDFailedTask(FailedTask)
@@ -1,46 +1,25 @@
-from typing import List, Optional
+from typing import List
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
+from app.crud.base import CRUDBase
 from app.models import Farm
 from app.schemas.farm import FarmCreate, FarmUpdate
 
 
-def get_farm(db: Session, farm_id: int):
-    return db.query(Farm).filter(Farm.id == farm_id, Farm.is_deleted == False).first()
+class CRUDFarm(CRUDBase[Farm, FarmCreate, FarmUpdate]):
+    def get_multi_by_owner(
+        self, db: Session, *, owner_id: str, skip: int = 0, limit: int = 100, **kwargs
+    ) -> List[Farm]:
+        return self.get_multi(
+            db, Farm.owner_id == owner_id, skip=skip, limit=limit, **kwargs
+        )
 
+    def owned_ids(self, owner_id: str) -> Select:
+        """
+        Subquery of the owner's farm ids, so child entities can be filtered
+        in the same statement instead of loading the farms first.
+        """
+        return select(Farm.id).where(*self._where([Farm.owner_id == owner_id]))
 
-def get_farms_by_owner(db: Session, owner_id: str, skip: int = 0, limit: int = 100):
-    return (
-        db.query(Farm)
-        .filter(Farm.owner_id == owner_id, Farm.is_deleted == False)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
 
-
-def create_farm(db: Session, farm: FarmCreate, owner_id: str):
-    db_farm = Farm(**farm.model_dump(), owner_id=owner_id)
-    db.add(db_farm)
-    db.commit()
-    db.refresh(db_farm)
-    return db_farm
-
-
-def update_farm(db: Session, db_farm: Farm, farm_update: FarmUpdate):
-    update_data = farm_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_farm, key, value)
-    db.add(db_farm)
-    db.commit()
-    db.refresh(db_farm)
-    return db_farm
-
-
-def delete_farm(db: Session, db_farm: Farm):
-    db_farm.is_deleted = True
-    db_farm.deleted_at = func.now()
-    db.add(db_farm)
-    db.commit()
-    db.refresh(db_farm)
-    return db_farm
+farm = CRUDFarm(Farm)
@@ -0,0 +1,37 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models import AnimalStatusSummary, CropSummary, FarmRecordDailyCount
+
+
+class CRUDFarmRecordDailyCount(CRUDBase[FarmRecordDailyCount, BaseModel, BaseModel]):
+    def get_range(
+        self,
+        db: Session,
+        *,
+        date_from: date,
+        date_to: date,
+        worker_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Daily activity counts between two dates (inclusive), newest day first.
+        """
+        stmt = select(*FarmRecordDailyCount.__table__.columns).where(
+            FarmRecordDailyCount.date >= date_from, FarmRecordDailyCount.date <= date_to
+        )
+        if worker_id is not None:
+            stmt = stmt.where(FarmRecordDailyCount.worker_id == worker_id)
+        stmt = stmt.order_by(
+            FarmRecordDailyCount.date.desc(),
+            FarmRecordDailyCount.worker_id,
+            FarmRecordDailyCount.activity,
+        )
+        return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+animal_status_summary = CRUDBase[AnimalStatusSummary, BaseModel, BaseModel](AnimalStatusSummary)
+crop_summary = CRUDBase[CropSummary, BaseModel, BaseModel](CropSummary)
+farm_record_daily_count = CRUDFarmRecordDailyCount(FarmRecordDailyCount)
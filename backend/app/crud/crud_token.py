@@ -1,25 +1,34 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
 from app.models import RefreshToken
+from pydantic import BaseModel
 
-def get_refresh_token(db: Session, token: str) -> Optional[RefreshToken]:
-    return db.query(RefreshToken).filter(RefreshToken.token == token).first()
 
-def create_refresh_token(db: Session, token: str, user_id: str, expires_at: datetime) -> RefreshToken:
-    db_token = RefreshToken(token=token, user_id=user_id, expires_at=expires_at)
-    db.add(db_token)
-    db.commit()
-    db.refresh(db_token)
-    return db_token
+class CRUDRefreshToken(CRUDBase[RefreshToken, BaseModel, BaseModel]):
+    def get_by_token(self, db: Session, *, token: str) -> Optional[RefreshToken]:
+        return db.scalars(select(RefreshToken).where(RefreshToken.token == token)).first()
 
-def revoke_refresh_token(db: Session, db_token: RefreshToken) -> RefreshToken:
-    db_token.revoked = True
-    db.add(db_token)
-    db.commit()
-    db.refresh(db_token)
-    return db_token
+    def create_for_user(
+        self, db: Session, *, token: str, user_id: str, expires_at: datetime
+    ) -> RefreshToken:
+        return self.create(
+            db, obj_in={"token": token, "user_id": user_id, "expires_at": expires_at}
+        )
 
-def revoke_all_user_tokens(db: Session, user_id: str):
-    db.query(RefreshToken).filter(RefreshToken.user_id == user_id).update({"revoked": True})
-    db.commit()
+    def revoke(self, db: Session, *, db_obj: RefreshToken) -> RefreshToken:
+        return self.update(db, db_obj=db_obj, obj_in={"revoked": True})
+
+    def revoke_all_for_user(self, db: Session, *, user_id: str) -> int:
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id)
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+        return db.execute(stmt).rowcount
+
+
+refresh_token = CRUDRefreshToken(RefreshToken)
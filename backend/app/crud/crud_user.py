@@ -1,30 +1,32 @@
+from typing import Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
 from app.models import User
-from app.schemas.user import UserCreate
+from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
 
 
-def get_user(db: Session, user_id: str):
-    return db.query(User).filter(User.id == user_id).first()
+class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
+        return db.scalars(select(User).where(User.email == email)).first()
 
+    def create(self, db: Session, *, obj_in: UserCreate) -> User:
+        return super().create(
+            db,
+            obj_in={
+                "email": obj_in.email,
+                "hashed_password": get_password_hash(obj_in.password),
+            },
+        )
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+    def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
+        db_user = self.get_by_email(db, email=email)
+        if not db_user:
+            return None
+        if not verify_password(password, db_user.hashed_password):
+            return None
+        return db_user
 
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
-    db_user = User(email=user.email, hashed_password=hashed_password)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
-
-
-def authenticate(db: Session, email: str, password: str):
-    user = get_user_by_email(db, email)
-    if not user:
-        return None
-    if not verify_password(password, user.hashed_password):
-        return None
-    return user
+user = CRUDUser(User)
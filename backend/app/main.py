@@ -2,23 +2,29 @@
 Main FastAPI application entry point.
 """
 
-import time
-import uuid
 import logging
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import fair_share
 from app.core.config import get_settings
+from app.core.logging_config import setup_logging
+from app.core.middleware import (
+    QueryStatsMiddleware,
+    RequestContextMiddleware,
+    RequestProfileMiddleware,
+)
+from app.core.tracing import instrument_app, setup_tracing
+from app.api import deps
 from app.api.v1.endpoints import auth, farms, animals, crops
 from app.routers import weather, predictions
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queued, written off the event loop)
+setup_logging()
 logger = logging.getLogger("api")
 
+setup_tracing("moometrics-api")
+
 settings = get_settings()
 
 from prometheus_fastapi_instrumentator import Instrumentator
@@ -32,24 +38,12 @@ app = FastAPI(
 # Initialize Prometheus Instrumentator
 Instrumentator().instrument(app).expose(app)
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    request_id = str(uuid.uuid4())
-    request.state.request_id = request_id
-    start_time = time.time()
-    
-    response = await call_next(request)
-    
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    response.headers["X-Request-ID"] = request_id
-    
-    logger.info(
-        f"RID={request_id} METHOD={request.method} PATH={request.url.path} "
-        f"STATUS={response.status_code} TIME={process_time:.4f}s"
-    )
-    
-    return response
+instrument_app(app)
+
+app.add_middleware(QueryStatsMiddleware)
+if settings.profiling_enabled:
+    app.add_middleware(RequestProfileMiddleware, authorize=deps.is_superuser_token)
+app.add_middleware(RequestContextMiddleware)
 
 # Configure CORS
 origins = [
@@ -67,6 +61,15 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(fair_share.RateLimited)
+async def rate_limited_handler(request: Request, exc: fair_share.RateLimited):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     return JSONResponse(
@@ -75,7 +78,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
-from app.api.v1.endpoints import auth, farms, animals, crops, tasks
+from app.api.v1.endpoints import auth, farms, animals, crops, tasks, stats, reports, dead_letters, profiling
 
 # ... [other imports] ...
 
@@ -85,6 +88,10 @@ app.include_router(farms.router, prefix="/api/v1/farms", tags=["farms"])
 app.include_router(animals.router, prefix="/api/v1/animals", tags=["animals"])
 app.include_router(crops.router, prefix="/api/v1/crops", tags=["crops"])
 app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["tasks"])
+app.include_router(stats.router, prefix="/api/v1/stats", tags=["stats"])
+app.include_router(reports.router, prefix="/api/v1/reports", tags=["reports"])
+app.include_router(dead_letters.router, prefix="/api/v1/dead-letters", tags=["dead-letters"])
+app.include_router(profiling.router, prefix="/api/v1/admin/profile", tags=["admin"])
 
 # Legacy/Utility routers
 app.include_router(weather.router)
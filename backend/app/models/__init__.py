@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Index
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, String, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -12,6 +12,7 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+    is_superuser = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     farms = relationship("Farm", back_populates="owner")
@@ -27,6 +28,9 @@ class Farm(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Bumped in the transaction of every API write to the farm's animals or
+    # crops (analytics_service.invalidate_on_commit); keys report artifacts.
+    data_version = Column(Integer, default=0, server_default="0", nullable=False)
 
     owner = relationship("User", back_populates="farms")
     animals = relationship("Animal", back_populates="farm")
@@ -47,7 +51,7 @@ class Animal(Base):
     vaccination_status = Column(String, nullable=False)
     farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -56,6 +60,7 @@ class Animal(Base):
     __table_args__ = (
         Index('ix_animals_farm_id', 'farm_id'),
         Index('ix_animals_farm_tag', 'farm_id', 'tag_number'),
+        Index('ix_animals_updated_at', 'updated_at'),
     )
 
 
@@ -67,6 +72,7 @@ class Crop(Base):
     planting_date = Column(DateTime(timezone=True), nullable=False)
     harvest_date = Column(DateTime(timezone=True), nullable=True)
     farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -74,6 +80,7 @@ class Crop(Base):
 
     __table_args__ = (
         Index('ix_crops_farm_id', 'farm_id'),
+        Index('ix_crops_updated_at', 'updated_at'),
     )
 
 
@@ -91,11 +98,87 @@ class RefreshToken(Base):
 
 
 class FailedTask(Base):
+    """
+    Dead-lettered task, one row per distinct failure (see dead_letter_service):
+    repeats of the same task, arguments and exception bump `occurrences`.
+    """
     __tablename__ = "failed_tasks"
 
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(String, index=True, nullable=False)
+    task_name = Column(String, nullable=False)
     payload = Column(String, nullable=False)
     exception = Column(String, nullable=False)
     retry_count = Column(Integer, default=0)
+    fingerprint = Column(String, nullable=False)
+    occurrences = Column(Integer, default=1, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_failed_at = Column(DateTime(timezone=True), server_default=func.now())
+    replayed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_failed_tasks_fingerprint', 'fingerprint', unique=True),
+    )
+
+
+class AnimalStatusSummary(Base):
+    """Live animals per farm and health/vaccination status; see rollup_service."""
+    __tablename__ = "animal_status_summaries"
+
+    id = Column(Integer, primary_key=True)
+    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
+    health_status = Column(String, nullable=False)
+    vaccination_status = Column(String, nullable=False)
+    count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('farm_id', 'health_status', 'vaccination_status'),
+    )
+
+
+class CropSummary(Base):
+    """Live crops per farm and crop name; see rollup_service."""
+    __tablename__ = "crop_summaries"
+
+    id = Column(Integer, primary_key=True)
+    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
+    name = Column(String, nullable=False)
+    planted = Column(Integer, nullable=False)
+    harvested = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('farm_id', 'name'),
+    )
+
+
+class RollupWatermark(Base):
+    """Database time each rollup was last refreshed from."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class RollupStaleFarm(Base):
+    """
+    Farms a rollup must recompute that `updated_at` can't reveal: those a
+    row was moved away from or deleted from. Filled by triggers in
+    backend/sql/005_rollups.sql, consumed by rollup_service.
+    """
+    __tablename__ = "rollup_stale_farms"
+
+    rollup = Column(String, primary_key=True)
+    farm_id = Column(Integer, primary_key=True)
+
+
+class FarmRecordDailyCount(Base):
+    """
+    Farm Records activities per worker per day. Created and kept current by
+    triggers in backend/sql/003_farm_record_daily_counts.sql, not by the app.
+    """
+    __tablename__ = "farm_record_daily_counts"
+
+    worker_id = Column(Integer, primary_key=True)
+    date = Column(Date, primary_key=True)
+    activity = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
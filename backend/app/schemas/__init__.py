@@ -1 +1 @@
-from . import user, token, farm, animal, crop
+from . import user, token, farm, animal, crop, stats, report, dead_letter
@@ -0,0 +1,38 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+# Most failed tasks one replay request may re-enqueue.
+MAX_REPLAY = 500
+
+
+class FailedTask(BaseModel):
+    id: int
+    task_id: str
+    task_name: str
+    payload: str
+    exception: str
+    retry_count: int
+    occurrences: int
+    created_at: datetime
+    last_failed_at: datetime
+    replayed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DeadLetterReplay(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=MAX_REPLAY)
+
+
+class ReplayedTask(BaseModel):
+    id: int
+    task_id: str
+
+
+class DeadLetterReplayResult(BaseModel):
+    replayed: List[ReplayedTask]
+    # Requested ids that don't exist or name a task this deployment no
+    # longer has.
+    skipped: List[int]
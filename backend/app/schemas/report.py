@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+
+class ReportRequest(BaseModel):
+    report_type: str = "Annual Livestock Summary"
+    format: Literal["pdf", "csv"] = "pdf"
+
+
+class ReportStatus(BaseModel):
+    report_id: str
+    status: Literal["ready", "pending"]
+    report_url: str
+    # Celery task rendering the report while it is pending.
+    task_id: Optional[str] = None
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from datetime import date
+
+
+class AnimalStatusCount(BaseModel):
+    farm_id: int
+    health_status: str
+    vaccination_status: str
+    count: int
+
+
+class CropCount(BaseModel):
+    farm_id: int
+    name: str
+    planted: int
+    harvested: int
+
+
+class WorkerActivityCount(BaseModel):
+    worker_id: int
+    date: date
+    activity: str
+    count: int
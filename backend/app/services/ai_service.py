@@ -16,6 +16,8 @@ settings = get_settings()
 import time
 from app.core.cache import get_cache, set_cache
 from app.core.circuit_breaker import openai_breaker, CircuitState
+from app.core.metrics import track_upstream
+from app.core import tracing
 
 async def get_planting_prediction(request: PredictionRequest) -> PredictionResponse:
     """
@@ -27,10 +29,10 @@ async def get_planting_prediction(request: PredictionRequest) -> PredictionRespo
     # 2. Check cache
     cached_data = get_cache(cache_key)
     if cached_data:
-        logger.info(f"Cache HIT for AI prediction ({request.crop_type})")
+        logger.info("Cache HIT for AI prediction (%s)", request.crop_type)
         return PredictionResponse(**cached_data)
 
-    logger.info(f"Cache MISS for AI prediction ({request.crop_type})")
+    logger.info("Cache MISS for AI prediction (%s)", request.crop_type)
 
     # 3. Check Circuit Breaker
     now = time.time()
@@ -69,21 +71,22 @@ async def get_planting_prediction(request: PredictionRequest) -> PredictionRespo
             "planting_date, harvest_date, confidence, recommendations (array)"
         )
 
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert agricultural advisor with deep knowledge of "
-                        "crop management, planting schedules, and harvest timing."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.7,
-            max_tokens=500,
-        )
+        with track_upstream("openai"), tracing.span("openai.chat.completions", model="gpt-4"):
+            response = client.chat.completions.create(
+                model="gpt-4",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "You are an expert agricultural advisor with deep knowledge of "
+                            "crop management, planting schedules, and harvest timing."
+                        ),
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.7,
+                max_tokens=500,
+            )
 
         # Parse AI response
         ai_response = response.choices[0].message.content
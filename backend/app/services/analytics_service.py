@@ -0,0 +1,376 @@
+"""
+Herd analytics: health/vaccination coverage, crop cycle durations and
+monthly trends per farm.
+
+Animals and crops for all requested farms are read with one projected
+query each and analysed as pandas frames, every statistic computed for all
+farms at once (crosstabs, grouped aggregates, a matrix least-squares fit
+for trends) rather than looping over rows or farms in Python.
+
+Reports are cached in Redis per farm. Animal/crop endpoints register the
+farms they touch with `invalidate_on_commit`; once that transaction
+commits, each farm's version counter is bumped and its cached report
+dropped. A report is built from rows read after taking the farms'
+versions and only stored if they are unchanged (compare-and-set in Lua),
+so a report built from rows read before a write can't be cached once the
+write's invalidation has run.
+
+The same writes bump `farms.data_version` in their own transaction, a
+durable version of the data that report artifacts are keyed on (see
+report_service.fingerprint).
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Select, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import get_cache, redis_client
+from app.core.metrics import CACHE_REQUESTS
+from app.models import Animal, Crop, Farm
+
+logger = logging.getLogger(__name__)
+
+# Vaccination status counted as covered.
+VACCINATED = "Up to Date"
+# Months of history in the trend series, ending with the current month.
+TREND_MONTHS = 12
+# Cached reports expire on their own after this long even without writes.
+CACHE_TTL = 3600
+
+_DIRTY_FARMS = "analytics_dirty_farms"
+
+
+def cache_key(farm_id: int) -> str:
+    return f"analytics:farm:{farm_id}"
+
+
+def version_key(farm_id: int) -> str:
+    return f"analytics:version:{farm_id}"
+
+
+# Stores a report only if its farm's version is still the one read before
+# the report's rows were loaded.
+_SET_IF_VERSION = redis_client.register_script("""
+if (redis.call('get', KEYS[1]) or '0') == ARGV[1] then
+    redis.call('set', KEYS[2], ARGV[2], 'ex', ARGV[3])
+    return 1
+end
+return 0
+""")
+
+
+def invalidate(farm_ids: Iterable[int]) -> None:
+    try:
+        with redis_client.pipeline() as pipe:
+            for farm_id in farm_ids:
+                pipe.incr(version_key(farm_id))
+                pipe.delete(cache_key(farm_id))
+            pipe.execute()
+    except Exception as e:
+        logger.error(f"Error invalidating herd reports of farms {list(farm_ids)}: {e}")
+
+
+def invalidate_on_commit(db: Union[Session, AsyncSession], *farm_ids: int) -> None:
+    """
+    Bump the data version of `farm_ids` when `db` commits and drop their
+    cached reports once it has.
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info.setdefault(_DIRTY_FARMS, set()).update(farm_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_data_versions(session):
+    farm_ids = session.info.get(_DIRTY_FARMS)
+    if farm_ids:
+        session.execute(
+            update(Farm)
+            .where(Farm.id.in_(sorted(farm_ids)))
+            .values(data_version=Farm.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    farm_ids = session.info.pop(_DIRTY_FARMS, None)
+    if farm_ids:
+        invalidate(farm_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_DIRTY_FARMS, None)
+
+
+# Loading
+
+ANIMAL_COLUMNS = ("farm_id", "type", "health_status", "vaccination_status", "created_at")
+CROP_COLUMNS = ("farm_id", "name", "planting_date", "harvest_date")
+
+
+def animals_statement(farm_ids: Sequence[int]) -> Select:
+    return select(*(getattr(Animal, column) for column in ANIMAL_COLUMNS)).where(
+        Animal.is_deleted == False, Animal.farm_id.in_(farm_ids)  # noqa: E712
+    )
+
+
+def crops_statement(farm_ids: Sequence[int]) -> Select:
+    return select(*(getattr(Crop, column) for column in CROP_COLUMNS)).where(
+        Crop.is_deleted == False, Crop.farm_id.in_(farm_ids)  # noqa: E712
+    )
+
+
+def _frame(rows: Sequence[Tuple], columns: Sequence[str], dates: Sequence[str]) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(rows, columns=list(columns))
+    for column in dates:
+        # SQLite hands back naive datetimes, Postgres aware ones.
+        frame[column] = pd.to_datetime(frame[column], utc=True).dt.tz_localize(None)
+    return frame
+
+
+# Analysis
+
+
+def _counts(frame: pd.DataFrame, column: str, farm_ids: List[int]) -> pd.DataFrame:
+    """Farms x values count matrix, with a row for every farm."""
+    counts = frame.groupby(["farm_id", column]).size().unstack(fill_value=0)
+    return counts.reindex(index=farm_ids, fill_value=0)
+
+
+def _monthly(
+    dates: pd.Series, farm_col: pd.Series, farm_ids: List[int], window: pd.PeriodIndex
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Farms x months counts over `window` and the least-squares slope of each
+    farm's series (events per month), fitted for all farms in one product.
+    """
+    months = dates.dt.to_period("M")
+    counts = (
+        pd.DataFrame({"farm_id": farm_col, "month": months})
+        .groupby(["farm_id", "month"])
+        .size()
+        .unstack(fill_value=0)
+        .reindex(index=farm_ids, columns=window, fill_value=0)
+    )
+    y = counts.to_numpy(dtype=float)
+    x = np.arange(len(window), dtype=float)
+    x -= x.mean()
+    slopes = (y - y.mean(axis=1, keepdims=True)) @ x / (x @ x)
+    return counts, slopes
+
+
+def _cycle_stats(crops: pd.DataFrame) -> pd.DataFrame:
+    """Per (farm, crop name) statistics of planting-to-harvest days."""
+    harvested = crops[crops["harvest_date"].notna()]
+    days = (harvested["harvest_date"] - harvested["planting_date"]).dt.total_seconds() / 86400
+    grouped = days.groupby([harvested["farm_id"], harvested["name"]])
+    stats = grouped.agg(["count", "mean", "median", "min", "max"])
+    stats["count"] = stats["count"].astype(int)
+    stats["p90"] = grouped.quantile(0.9)
+    return stats
+
+
+def _number(value: Any) -> Any:
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else round(float(value), 2)
+    return value
+
+
+def _row_dict(row: pd.Series) -> Dict[str, Any]:
+    return {str(key): _number(value) for key, value in row.items() if value}
+
+
+def analyze(
+    animals: pd.DataFrame, crops: pd.DataFrame, farm_ids: List[int]
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Build one report per farm in `farm_ids` from the loaded frames.
+    """
+    now = pd.Timestamp.now(tz=timezone.utc).tz_localize(None)
+    window = pd.period_range(end=now.to_period("M"), periods=TREND_MONTHS, freq="M")
+    labels = [str(month) for month in window]
+
+    animal_totals = animals.groupby("farm_id").size().reindex(farm_ids, fill_value=0)
+    by_type = _counts(animals, "type", farm_ids)
+    health = _counts(animals, "health_status", farm_ids)
+    vaccination = _counts(animals, "vaccination_status", farm_ids)
+    vaccinated = (
+        vaccination[VACCINATED] if VACCINATED in vaccination else pd.Series(0, index=farm_ids)
+    )
+    coverage = vaccinated / animal_totals.where(animal_totals > 0)
+    health_share = health.div(animal_totals.where(animal_totals > 0), axis=0)
+
+    added, added_slope = _monthly(animals["created_at"], animals["farm_id"], farm_ids, window)
+    planted, planted_slope = _monthly(crops["planting_date"], crops["farm_id"], farm_ids, window)
+
+    crop_totals = crops.groupby("farm_id").size().reindex(farm_ids, fill_value=0)
+    harvested = (
+        crops[crops["harvest_date"].notna()].groupby("farm_id").size()
+        .reindex(farm_ids, fill_value=0)
+    )
+    cycles = _cycle_stats(crops)
+    cycle_farms = set(cycles.index.get_level_values(0))
+
+    generated_at = datetime.now(timezone.utc).isoformat()
+    reports = {}
+    for position, farm_id in enumerate(farm_ids):
+        farm_cycles = cycles.loc[farm_id] if farm_id in cycle_farms else cycles.iloc[0:0]
+        reports[farm_id] = {
+            "farm_id": farm_id,
+            "generated_at": generated_at,
+            "animals": {
+                "total": _number(animal_totals[farm_id]),
+                "by_type": _row_dict(by_type.loc[farm_id]),
+                "health": {
+                    "counts": _row_dict(health.loc[farm_id]),
+                    "share": _row_dict(health_share.loc[farm_id]),
+                },
+                "vaccination": {
+                    "counts": _row_dict(vaccination.loc[farm_id]),
+                    "coverage": _number(coverage[farm_id]),
+                },
+            },
+            "crops": {
+                "total": _number(crop_totals[farm_id]),
+                "harvested": _number(harvested[farm_id]),
+                "cycle_days": {
+                    name: {key: _number(value) for key, value in stats.items()}
+                    for name, stats in farm_cycles.to_dict("index").items()
+                },
+            },
+            "trends": {
+                "months": labels,
+                "animals_added": [int(v) for v in added.loc[farm_id]],
+                "animals_added_slope": _number(added_slope[position]),
+                "crops_planted": [int(v) for v in planted.loc[farm_id]],
+                "crops_planted_slope": _number(planted_slope[position]),
+            },
+        }
+    return reports
+
+
+def combine(reports: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Whole-herd totals over per-farm reports, plus the reports themselves.
+    """
+    animals = sum(report["animals"]["total"] for report in reports.values())
+    vaccinated = sum(
+        report["animals"]["vaccination"]["counts"].get(VACCINATED, 0)
+        for report in reports.values()
+    )
+    health: Dict[str, int] = {}
+    for report in reports.values():
+        for status, count in report["animals"]["health"]["counts"].items():
+            health[status] = health.get(status, 0) + count
+    return {
+        "totals": {
+            "farms": len(reports),
+            "animals": animals,
+            "crops": sum(report["crops"]["total"] for report in reports.values()),
+            "health": health,
+            "vaccination_coverage": round(vaccinated / animals, 2) if animals else None,
+        },
+        "farms": [reports[farm_id] for farm_id in sorted(reports)],
+    }
+
+
+# Entry points
+
+
+def _cached(farm_ids: Sequence[int]) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+    reports, missing = {}, []
+    for farm_id in farm_ids:
+        report = get_cache(cache_key(farm_id))
+        if report is None:
+            missing.append(farm_id)
+        else:
+            reports[farm_id] = report
+    return reports, missing
+
+
+def _versions(farm_ids: Sequence[int]) -> Optional[Dict[int, str]]:
+    """
+    The farms' versions, to read before loading their rows. None if Redis
+    can't be reached, in which case nothing is cached.
+    """
+    try:
+        versions = redis_client.mget([version_key(farm_id) for farm_id in farm_ids])
+        return {farm_id: version or "0" for farm_id, version in zip(farm_ids, versions)}
+    except Exception as e:
+        logger.error(f"Error reading herd report versions: {e}")
+        return None
+
+
+def _store(reports: Dict[int, Dict[str, Any]], versions: Optional[Dict[int, str]]) -> None:
+    if versions is None:
+        return
+    for farm_id, report in reports.items():
+        try:
+            stored = _SET_IF_VERSION(
+                keys=[version_key(farm_id), cache_key(farm_id)],
+                args=[versions[farm_id], json.dumps(report), CACHE_TTL],
+            )
+            CACHE_REQUESTS.labels("set", "analytics", "ok" if stored else "stale").inc()
+        except Exception as e:
+            CACHE_REQUESTS.labels("set", "analytics", "error").inc()
+            logger.error(f"Error caching the herd report of farm {farm_id}: {e}")
+
+
+def _compute(
+    animal_rows: Sequence[Tuple],
+    crop_rows: Sequence[Tuple],
+    farm_ids: List[int],
+    versions: Optional[Dict[int, str]],
+) -> Dict[int, Dict[str, Any]]:
+    reports = analyze(
+        _frame(animal_rows, ANIMAL_COLUMNS, ["created_at"]),
+        _frame(crop_rows, CROP_COLUMNS, ["planting_date", "harvest_date"]),
+        farm_ids,
+    )
+    _store(reports, versions)
+    return reports
+
+
+def herd_report(db: Session, farm_ids: Sequence[int]) -> Dict[str, Any]:
+    """
+    Herd report over `farm_ids`, computing only the farms not in the cache.
+    """
+    reports, missing = _cached(farm_ids)
+    if missing:
+        versions = _versions(missing)
+        reports.update(
+            _compute(
+                db.execute(animals_statement(missing)).all(),
+                db.execute(crops_statement(missing)).all(),
+                missing,
+                versions,
+            )
+        )
+    return combine(reports)
+
+
+async def aherd_report(db: AsyncSession, farm_ids: Sequence[int]) -> Dict[str, Any]:
+    """
+    `herd_report` for async endpoints; the pandas work runs in the threadpool
+    so it doesn't hold up the event loop.
+    """
+    reports, missing = _cached(farm_ids)
+    if missing:
+        versions = _versions(missing)
+        animal_rows = (await db.execute(animals_statement(missing))).all()
+        crop_rows = (await db.execute(crops_statement(missing))).all()
+        reports.update(
+            await run_in_threadpool(_compute, animal_rows, crop_rows, missing, versions)
+        )
+    return combine(reports)
@@ -0,0 +1,106 @@
+"""
+Content-addressed storage for generated report artifacts.
+
+Artifacts are keyed by a hash of everything that determines their content
+(see `report_service.report_key`), so an identical request finds the
+finished file instead of rendering it again. Writes go to a temporary file
+that is renamed into place on success, so readers never see a partial
+artifact and a crashed render leaves nothing behind.
+
+Every change to the data gives a report a new key, so old artifacts are
+never overwritten; `sweep` deletes those unused for a while. Reuse
+(`touch`) refreshes an artifact's mtime, so the sweep drops the least
+recently used ones rather than the oldest.
+
+This is a local-directory store; the API and the Celery worker must share
+the directory (a volume in docker-compose). An S3-compatible store would
+implement the same methods with multipart uploads and ranged GETs.
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+from app.core.config import get_settings
+
+
+class LocalArtifactStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        # Fan out over subdirectories so no single directory grows huge.
+        return self.root / key[:2] / key
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def touch(self, key: str) -> None:
+        """
+        Mark an artifact as used, postponing its removal by `sweep`.
+        """
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, max_age: float) -> int:
+        """
+        Delete artifacts unused for `max_age` seconds along with their
+        metadata, and files left behind by renders that died. Returns the
+        number of artifacts deleted.
+        """
+        cutoff = time.time() - max_age
+        deleted = 0
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                if path.suffix == ".json":
+                    # Metadata is written just before its artifact is
+                    # renamed into place; alone, it belongs to a dead render.
+                    if not path.with_suffix("").exists():
+                        path.unlink()
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            if not path.name.startswith("."):
+                self._metadata_path(path.name).unlink(missing_ok=True)
+                deleted += 1
+        return deleted
+
+    def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._metadata_path(key).read_text())
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def writer(self, key: str, metadata: Dict[str, Any]) -> Iterator[BinaryIO]:
+        """
+        File object for a new artifact, published under `key` (with its
+        metadata) only if the block completes without raising.
+        """
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{key}.")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                yield out
+            metadata = {**metadata, "size": os.path.getsize(temp_path)}
+            self._metadata_path(key).write_text(json.dumps(metadata))
+            os.replace(temp_path, target)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _metadata_path(self, key: str) -> Path:
+        return self.path(key).with_suffix(".json")
+
+
+artifact_store = LocalArtifactStore(get_settings().report_store_dir)
@@ -0,0 +1,197 @@
+"""
+Dead-letter queue for tasks that failed permanently.
+
+The `task_failure` handler only buffers the failure in Redis: two hash
+fields keyed by a fingerprint of the task, its arguments and the
+exception, so a storm of identical failures occupies one entry and just
+bumps its count. `flush` (run by beat every `dlq_flush_seconds`) moves the
+buffer into `failed_tasks` with batched upserts, adding the counts to rows
+already dead-lettered. Postgres therefore sees a few statements per flush
+however fast tasks are failing.
+
+Flushing is at-least-once: the buffer is renamed aside before it is
+written and only deleted after the commit, and a flush that dies midway
+is picked up by the next one.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from redis.exceptions import ResponseError
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.cache import redis_client
+from app.core.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.models import FailedTask
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT ... ON CONFLICT statement when flushing.
+FLUSH_BATCH = 500
+# Seconds after which a crashed flush's lock lapses.
+FLUSH_LOCK_TIMEOUT = 60
+
+_ENTRIES = "dlq:entries"
+_COUNTS = "dlq:counts"
+_FLUSHING_ENTRIES = "dlq:flushing:entries"
+_FLUSHING_COUNTS = "dlq:flushing:counts"
+_FLUSH_LOCK = "dlq:flush_lock"
+# Unix time at which the next replayed task may run.
+_REPLAY_NEXT_SLOT = "dlq:replay_next_slot"
+
+# Moves the next free slot past `duration` seconds of replays and returns
+# where they start: now, or after replays already scheduled. The key
+# lapses once its slots are in the past.
+_RESERVE_REPLAY_SLOTS = redis_client.register_script("""
+local now = tonumber(ARGV[1])
+local start = math.max(now, tonumber(redis.call('get', KEYS[1]) or now))
+local next_slot = start + tonumber(ARGV[2])
+redis.call('set', KEYS[1], tostring(next_slot), 'ex', math.ceil(next_slot - now) + 1)
+return tostring(start)
+""")
+
+
+def fingerprint(task_name: str, payload: str, exception: str) -> str:
+    return hashlib.sha256(f"{task_name}\0{payload}\0{exception}".encode()).hexdigest()
+
+
+def record_failure(
+    *,
+    task_id: str,
+    task_name: str,
+    args: Any,
+    kwargs: Any,
+    exception: BaseException,
+    retries: int = 0,
+) -> None:
+    """
+    Buffer a permanent task failure for the next flush. Falls back to
+    writing it straight to the database if Redis is unavailable.
+    """
+    payload = json.dumps({"args": args, "kwargs": kwargs}, default=str)
+    exception_text = f"{type(exception).__name__}: {exception}"
+    key = fingerprint(task_name, payload, exception_text)
+    entry = {
+        "task_id": task_id,
+        "task_name": task_name,
+        "payload": payload,
+        "exception": exception_text,
+        "retry_count": retries,
+        "fingerprint": key,
+        "last_failed_at": datetime.now(timezone.utc).isoformat(),
+    }
+    try:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hset(_ENTRIES, key, json.dumps(entry))
+        pipe.hincrby(_COUNTS, key, 1)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Error buffering failed task {task_id}, writing it directly: {e}")
+        with SessionLocal() as db:
+            _write(db, [entry], {key: 1})
+            db.commit()
+
+
+def _claim_buffer() -> bool:
+    """
+    Set the buffered failures aside for flushing, unless an earlier flush
+    left some behind. False when there is nothing to flush.
+    """
+    if redis_client.exists(_FLUSHING_ENTRIES):
+        return True
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.rename(_ENTRIES, _FLUSHING_ENTRIES)
+    pipe.rename(_COUNTS, _FLUSHING_COUNTS)
+    try:
+        pipe.execute()
+    except ResponseError:
+        # Both keys are written together, so both are missing: empty buffer.
+        return False
+    return True
+
+
+def _write(db: Session, entries: Iterable[Dict[str, Any]], counts: Dict[str, int]) -> int:
+    rows = [
+        {
+            **entry,
+            "occurrences": counts.get(entry["fingerprint"], 1),
+            "last_failed_at": datetime.fromisoformat(entry["last_failed_at"]),
+        }
+        for entry in entries
+    ]
+    for start in range(0, len(rows), FLUSH_BATCH):
+        crud.failed_task.upsert_many(db, rows=rows[start:start + FLUSH_BATCH])
+    return len(rows)
+
+
+def flush(db: Session) -> int:
+    """
+    Write buffered failures to `failed_tasks`; returns the number of
+    distinct failures written.
+    """
+    lock = redis_client.lock(_FLUSH_LOCK, timeout=FLUSH_LOCK_TIMEOUT, blocking=False)
+    if not lock.acquire():
+        # Another flush is running; two would both write the same entries.
+        return 0
+    try:
+        if not _claim_buffer():
+            return 0
+        entries = [json.loads(value) for value in redis_client.hvals(_FLUSHING_ENTRIES)]
+        counts = {
+            key: int(count) for key, count in redis_client.hgetall(_FLUSHING_COUNTS).items()
+        }
+        written = _write(db, entries, counts)
+        db.commit()
+        redis_client.delete(_FLUSHING_ENTRIES, _FLUSHING_COUNTS)
+        return written
+    finally:
+        lock.release()
+
+
+def _reserve_replay_slots(count: int, rate: float) -> float:
+    """
+    Reserve `count` consecutive replay slots at `rate` per second, after
+    those of every replay before, in any API worker. Returns the seconds
+    until the first one.
+    """
+    now = time.time()
+    start = float(
+        _RESERVE_REPLAY_SLOTS(
+            keys=[_REPLAY_NEXT_SLOT], args=[now, count / rate], client=redis_client
+        )
+    )
+    return max(start - now, 0.0)
+
+
+def replay(failures: Sequence[FailedTask], rate: float) -> List[Dict[str, Any]]:
+    """
+    Re-enqueue dead-lettered tasks with their original arguments, spread
+    out at `rate` tasks per second (through countdowns, so this returns
+    immediately) to keep a bulk replay from flooding the workers. Replays
+    share one schedule, so concurrent ones queue behind each other instead
+    of each starting at once.
+    """
+    if not failures:
+        return []
+    start = _reserve_replay_slots(len(failures), rate)
+    replayed = []
+    for position, failure in enumerate(failures):
+        payload = json.loads(failure.payload)
+        result = celery_app.send_task(
+            failure.task_name,
+            args=payload["args"],
+            kwargs=payload["kwargs"],
+            countdown=start + position / rate,
+        )
+        replayed.append({"id": failure.id, "task_id": result.id})
+    return replayed
+
+
+def replayable(task_name: Optional[str]) -> bool:
+    return task_name in celery_app.tasks and not task_name.startswith("celery.")
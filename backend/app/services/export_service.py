@@ -0,0 +1,134 @@
+"""
+Streaming export helpers for bulk animal/crop downloads.
+
+Rows come straight from a server-side cursor as plain mappings and are
+encoded in chunks, so memory stays flat regardless of how many rows a
+farm has.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+)
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Number of rows encoded into a single chunk handed to the ASGI server.
+CHUNK_ROWS = 500
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_ndjson(
+    rows: Iterable[Mapping[str, Any]], chunk_rows: int = CHUNK_ROWS
+) -> Iterator[bytes]:
+    """
+    Encode rows as newline-delimited JSON, yielding one chunk per `chunk_rows`.
+    """
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(dict(row), default=_json_default))
+        if len(buffer) >= chunk_rows:
+            yield ("\n".join(buffer) + "\n").encode()
+            buffer.clear()
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode()
+
+
+def iter_csv(
+    columns: Sequence[str],
+    rows: Iterable[Mapping[str, Any]],
+    chunk_rows: int = CHUNK_ROWS,
+    header: bool = True,
+) -> Iterator[bytes]:
+    """
+    Encode rows as CSV with a header line, yielding one chunk per `chunk_rows`.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow(
+            [
+                value.isoformat() if isinstance(value, (datetime, date)) else value
+                for value in (row[column] for column in columns)
+            ]
+        )
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_rows(
+    export_format: str,
+    columns: Sequence[str],
+    rows: Iterable[Mapping[str, Any]],
+) -> Iterator[bytes]:
+    """
+    Dispatch to the encoder for `export_format`.
+    """
+    if export_format == "csv":
+        return iter_csv(columns, rows)
+    return iter_ndjson(rows)
+
+
+async def aencode_rows(
+    export_format: str,
+    columns: Sequence[str],
+    rows: AsyncIterator[Mapping[str, Any]],
+    chunk_rows: int = CHUNK_ROWS,
+) -> AsyncIterator[bytes]:
+    """
+    Async counterpart of `encode_rows` for rows read from an `AsyncSession`.
+    """
+    batch: List[Mapping[str, Any]] = []
+    header_sent = False
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_rows:
+            for chunk in _encode_batch(export_format, columns, batch, header_sent):
+                yield chunk
+            header_sent = True
+            batch = []
+    if batch or not header_sent:
+        for chunk in _encode_batch(export_format, columns, batch, header_sent):
+            yield chunk
+
+
+def _encode_batch(
+    export_format: str,
+    columns: Sequence[str],
+    batch: List[Mapping[str, Any]],
+    header_sent: bool,
+) -> Iterator[bytes]:
+    if export_format != "csv":
+        yield from iter_ndjson(batch, chunk_rows=len(batch) or 1)
+        return
+    yield from iter_csv(
+        columns, batch, chunk_rows=len(batch) or 1, header=not header_sent
+    )
@@ -0,0 +1,114 @@
+"""
+Minimal streaming PDF writer for text reports.
+
+Each page is written to the output as soon as it fills up, so memory use
+is bounded by one page regardless of report length; only the byte offsets
+of the objects written so far are kept for the cross-reference table.
+Text is set in Courier so columns line up without measuring glyphs.
+"""
+
+from typing import BinaryIO, Dict, List
+
+PAGE_WIDTH = 595  # A4, in points
+PAGE_HEIGHT = 842
+MARGIN = 40
+FONT_SIZE = 8
+LEADING = 11
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+# Courier advances 0.6 em per glyph.
+CHARS_PER_LINE = int((PAGE_WIDTH - 2 * MARGIN) / (FONT_SIZE * 0.6))
+
+_CATALOG, _PAGES, _FONT = 1, 2, 3
+
+
+def _escape(text: str) -> bytes:
+    text = text[:CHARS_PER_LINE]
+    text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return text.encode("cp1252", errors="replace")
+
+
+class StreamingPDF:
+    def __init__(self, out: BinaryIO):
+        self._out = out
+        self._position = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_id = _FONT + 1
+        self._page_ids: List[int] = []
+        self._lines: List[str] = []
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(
+            _FONT,
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier "
+            b"/Encoding /WinAnsiEncoding >>",
+        )
+
+    def line(self, text: str = "") -> None:
+        self._lines.append(text)
+        if len(self._lines) >= LINES_PER_PAGE:
+            self._flush_page()
+
+    def page_break(self) -> None:
+        if self._lines:
+            self._flush_page()
+
+    def close(self) -> None:
+        """
+        Write the last page, the page tree and the trailer.
+        """
+        if self._lines or not self._page_ids:
+            self._flush_page()
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._object(
+            _PAGES,
+            b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)),
+        )
+        self._object(_CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % _PAGES)
+
+        xref_at = self._position
+        size = self._next_id
+        entries = [b"xref\n0 %d\n0000000000 65535 f \n" % size]
+        entries.extend(
+            b"%010d 00000 n \n" % self._offsets[object_id] for object_id in range(1, size)
+        )
+        self._write(b"".join(entries))
+        self._write(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, _CATALOG, xref_at)
+        )
+
+    def _flush_page(self) -> None:
+        text = [
+            b"BT /F1 %d Tf %d TL %d %d Td"
+            % (FONT_SIZE, LEADING, MARGIN, PAGE_HEIGHT - MARGIN)
+        ]
+        text.extend(b"(%s) '" % _escape(line) for line in self._lines)
+        text.append(b"ET")
+        content = b"\n".join(text)
+        self._lines = []
+
+        content_id = self._allocate()
+        self._object(
+            content_id,
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        )
+        page_id = self._allocate()
+        self._object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (_PAGES, PAGE_WIDTH, PAGE_HEIGHT, _FONT, content_id),
+        )
+        self._page_ids.append(page_id)
+
+    def _allocate(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _object(self, object_id: int, body: bytes) -> None:
+        self._offsets[object_id] = self._position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+
+    def _write(self, data: bytes) -> None:
+        self._out.write(data)
+        self._position += len(data)
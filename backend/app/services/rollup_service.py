@@ -0,0 +1,156 @@
+"""
+Incremental refresh of the dashboard rollup tables.
+
+Each rollup is a GROUP BY over a source table, stored per farm. A refresh
+only recomputes farms with source rows changed since the rollup's
+watermark (found through the `updated_at` index), so the cost follows the
+write rate rather than the table size. The first refresh, with no
+watermark yet, rebuilds everything. Farms a row was moved away from or
+deleted from are queued in `rollup_stale_farms` by triggers
+(backend/sql/005_rollups.sql) and recomputed too.
+
+Farm Records daily activity counts are not refreshed here: triggers keep
+them current (backend/sql/003_farm_record_daily_counts.sql).
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from sqlalchemy import DateTime, Select, delete, insert, select, type_coerce
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+from app.models import (
+    Animal,
+    AnimalStatusSummary,
+    Crop,
+    CropSummary,
+    RollupStaleFarm,
+    RollupWatermark,
+)
+
+logger = logging.getLogger(__name__)
+
+# Re-scan this far behind the watermark: `now()` is the transaction start
+# time, so a write that committed after the previous refresh can carry an
+# earlier timestamp.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+@dataclass(frozen=True)
+class Rollup:
+    name: str
+    source: Type[Base]
+    summary: Type[Base]
+    # Builds the aggregate SELECT, restricted to `farm_ids` unless None,
+    # whose columns line up with `columns` of the summary table.
+    aggregate: Callable[[Optional[List[int]]], Select]
+    columns: List[str]
+
+
+def _for_farms(stmt, farm_id, farm_ids: Optional[List[int]]):
+    return stmt if farm_ids is None else stmt.where(farm_id.in_(farm_ids))
+
+
+def _animal_status(farm_ids: Optional[List[int]]) -> Select:
+    stmt = (
+        select(
+            Animal.farm_id,
+            Animal.health_status,
+            Animal.vaccination_status,
+            func.count(),
+        )
+        .where(Animal.is_deleted == False)  # noqa: E712
+        .group_by(Animal.farm_id, Animal.health_status, Animal.vaccination_status)
+    )
+    return _for_farms(stmt, Animal.farm_id, farm_ids)
+
+
+def _crops(farm_ids: Optional[List[int]]) -> Select:
+    stmt = (
+        select(Crop.farm_id, Crop.name, func.count(), func.count(Crop.harvest_date))
+        .where(Crop.is_deleted == False)  # noqa: E712
+        .group_by(Crop.farm_id, Crop.name)
+    )
+    return _for_farms(stmt, Crop.farm_id, farm_ids)
+
+
+ROLLUPS = (
+    Rollup(
+        name="animal_status",
+        source=Animal,
+        summary=AnimalStatusSummary,
+        aggregate=_animal_status,
+        columns=["farm_id", "health_status", "vaccination_status", "count"],
+    ),
+    Rollup(
+        name="crops",
+        source=Crop,
+        summary=CropSummary,
+        aggregate=_crops,
+        columns=["farm_id", "name", "planted", "harvested"],
+    ),
+)
+
+
+def refresh_rollup(db: Session, rollup: Rollup) -> int:
+    """
+    Bring one rollup up to date; returns the number of summary rows written.
+    The caller commits.
+    """
+    started_at = db.scalar(select(type_coerce(func.now(), DateTime(timezone=True))))
+    watermark = db.get(RollupWatermark, rollup.name)
+
+    # Claimed in this transaction: they come back if the refresh fails.
+    stale = db.scalars(
+        delete(RollupStaleFarm)
+        .where(RollupStaleFarm.rollup == rollup.name)
+        .returning(RollupStaleFarm.farm_id)
+    ).all()
+
+    # The farm list is read once and used by both statements below: were
+    # each to re-run the query, a farm changed in between would be inserted
+    # without having been deleted.
+    farm_ids: Optional[List[int]] = None
+    if watermark is not None:
+        changed = db.scalars(
+            select(rollup.source.farm_id)
+            .distinct()
+            .where(rollup.source.updated_at >= watermark.refreshed_at - WATERMARK_OVERLAP)
+        ).all()
+        farm_ids = sorted({*changed, *stale})
+
+    written = 0
+    if farm_ids is None or farm_ids:
+        db.execute(
+            _for_farms(delete(rollup.summary), rollup.summary.farm_id, farm_ids)
+            .execution_options(synchronize_session=False)
+        )
+        written = len(
+            db.scalars(
+                insert(rollup.summary)
+                .from_select(rollup.columns, rollup.aggregate(farm_ids))
+                .returning(rollup.summary.id)
+            ).all()
+        )
+
+    if watermark is None:
+        db.add(RollupWatermark(name=rollup.name, refreshed_at=started_at))
+    else:
+        watermark.refreshed_at = started_at
+    return written
+
+
+def refresh_rollups(db: Session) -> Dict[str, Any]:
+    """
+    Refresh every rollup in its own transaction.
+    """
+    written = {}
+    for rollup in ROLLUPS:
+        written[rollup.name] = refresh_rollup(db, rollup)
+        db.commit()
+    logger.info(f"Refreshed rollups: {written}")
+    return written
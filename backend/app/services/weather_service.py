@@ -9,6 +9,8 @@ from app.core.config import get_settings
 from app.models.schemas import WeatherResponse
 from app.core.cache import get_cache, set_cache
 from app.core.circuit_breaker import weather_breaker, CircuitState
+from app.core.metrics import track_upstream
+from app.core import tracing
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -26,10 +28,10 @@ async def get_weather_by_coordinates(
     # 1. Check Redis Cache
     cached_data = get_cache(cache_key)
     if cached_data:
-        logger.info(f"Cache HIT for weather at {latitude}, {longitude}")
+        logger.info("Cache HIT for weather at %s, %s", latitude, longitude)
         return WeatherResponse(**cached_data)
 
-    logger.info(f"Cache MISS for weather at {latitude}, {longitude}")
+    logger.info("Cache MISS for weather at %s, %s", latitude, longitude)
     
     # 2. Check Circuit Breaker State
     now = time.time()
@@ -62,8 +64,11 @@ async def get_weather_by_coordinates(
     try:
         async with httpx.AsyncClient(timeout=10.0) as client:
             logger.info(f"Fetching weather for: {latitude}, {longitude}")
-            response = await client.get(url, params=params)
-            response.raise_for_status()
+            with track_upstream("openweather"), tracing.span(
+                "openweather.current_weather", latitude=latitude, longitude=longitude
+            ):
+                response = await client.get(url, params=params)
+                response.raise_for_status()
             data = response.json()
 
             res = WeatherResponse(
@@ -1,58 +1,116 @@
 import time
-import json
 import logging
-from celery.signals import task_failure
+from datetime import datetime, timedelta, timezone
+from celery.signals import task_failure, task_postrun, task_revoked
+from sqlalchemy import DateTime, bindparam, text
+from app.core import fair_share, task_events
 from app.core.celery_app import celery_app
+from app.core.task_events import FINAL_STATES
+from app.core.config import get_settings
 from app.core.database import SessionLocal
-from app.models import FailedTask
+from app import crud
+from app.services import dead_letter_service, report_service, rollup_service
+from app.services.artifact_store import artifact_store
 
 logger = logging.getLogger(__name__)
 
 @task_failure.connect
 def handle_task_failure(sender=None, task_id=None, exception=None, args=None, kwargs=None, **extra):
     """
-    Signal handler to persist failed task metadata to the database (DLQ).
+    Signal handler that dead-letters permanently failed tasks. Failures are
+    buffered in Redis and written to the database in batches by
+    `flush_dead_letters_task`.
     """
-    db = SessionLocal()
     try:
-        failed_task = FailedTask(
+        dead_letter_service.record_failure(
             task_id=task_id,
-            payload=json.dumps({"args": args, "kwargs": kwargs}),
-            exception=str(exception),
-            retry_count=extra.get('retries', 0)
+            task_name=sender.name,
+            args=args,
+            kwargs=kwargs,
+            exception=exception,
+            retries=sender.request.retries,
         )
-        db.add(failed_task)
-        db.commit()
         logger.error(f"Task {task_id} failed permanently and was moved to DLQ.")
     except Exception as e:
         logger.error(f"Error persisting failed task to DLQ: {e}")
-    finally:
-        db.close()
+
+@task_postrun.connect
+def release_fair_share_slot(sender=None, task_id=None, state=None, **extra):
+    """
+    Hand a finished task's fair-share slot to its user's next held task.
+    Retries keep the slot.
+    """
+    if state in FINAL_STATES:
+        try:
+            fair_share.release(task_id)
+        except Exception as e:
+            logger.error(f"Error releasing fair-share slot of task {task_id}: {e}")
+
+@task_revoked.connect
+def release_revoked_fair_share_slot(sender=None, request=None, **extra):
+    # A task revoked before it started never runs the EventTask hooks.
+    task_events.publish(request.id, "REVOKED")
+    try:
+        fair_share.release(request.id)
+    except Exception as e:
+        logger.error(f"Error releasing fair-share slot of task {request.id}: {e}")
 
 @celery_app.task(
     bind=True, 
     name="generate_report_task",
+    # Renders are idempotent (content-addressed artifacts), so a report
+    # lost with its worker is redelivered rather than dropped.
+    acks_late=True,
     autoretry_for=(Exception,),
     retry_backoff=True,
     retry_backoff_max=600,
     retry_jitter=True,
     max_retries=5
 )
-def generate_report_task(self, report_type: str, user_id: int):
+def generate_report_task(
+    self,
+    report_type: str,
+    user_id: str,
+    export_format: str = "pdf",
+    report_id: str = None,
+):
     """
-    Mock task to simulate heavy report generation.
+    Render a report over all of the user's farms into the artifact store.
+
+    Rows are streamed from the database and written as they arrive, so
+    memory use doesn't grow with the herd. `report_id` is the artifact key
+    the API accepted the request under; an existing artifact is reused.
     """
     logger.info(f"Starting {report_type} report generation for user {user_id}")
-    
-    # Simulate work
-    total_steps = 5
-    for i in range(total_steps):
-        time.sleep(2)
-        self.update_state(state='PROGRESS', meta={'current': i + 1, 'total': total_steps})
-        logger.info(f"Report progress: {i+1}/{total_steps}")
 
-    logger.info(f"Report generation complete")
-    return {"status": "completed", "report_url": f"/exports/report_{user_id}_{int(time.time())}.pdf"}
+    def progress(current, total):
+        self.update_state(state='PROGRESS', meta={'current': current, 'total': total})
+
+    claimed = report_id
+    try:
+        with SessionLocal() as db:
+            farm_ids = list(db.scalars(crud.farm.owned_ids(user_id)).all())
+            report_id, created = report_service.generate_report(
+                db,
+                user_id=user_id,
+                report_type=report_type,
+                export_format=export_format,
+                farm_ids=farm_ids,
+                key=report_id,
+                progress=progress,
+            )
+    finally:
+        if claimed:
+            report_service.release(claimed)
+
+    logger.info(f"Report {report_id} {'generated' if created else 'already existed'}")
+    return {
+        "status": "completed",
+        "report_type": report_type,
+        "report_id": report_id,
+        "report_url": f"/api/v1/reports/{report_id}",
+        "deduplicated": not created,
+    }
 
 @celery_app.task(
     name="ai_prediction_task",
@@ -71,3 +129,92 @@ def ai_prediction_task(request_data: dict):
     time.sleep(5)
     logger.info("AI prediction complete")
     return {"status": "success", "prediction": "Optimal planting date: 2024-05-20"}
+
+# The farm_records tasks reach the Farm Records tables through DATABASE_URL:
+# the Farm Records backend (DB_* in db.py) must use that same database.
+
+@celery_app.task(name="maintain_farm_record_partitions")
+def maintain_farm_record_partitions():
+    """
+    Keep monthly farm_records partitions created ahead of time so inserts
+    never fall into the default partition (see sql/002_partition_farm_records.sql).
+    """
+    months_ahead = get_settings().farm_records_partition_months_ahead
+    with SessionLocal() as db:
+        created = db.execute(
+            text(
+                "SELECT farm_records_create_partitions("
+                "CURRENT_DATE, (CURRENT_DATE + make_interval(months => :months))::date)"
+            ),
+            {"months": months_ahead},
+        ).scalar_one()
+        db.commit()
+    logger.info(f"Created {created} farm_records partition(s)")
+    return {"created": created}
+
+# Keys deleted per statement, so each purge transaction stays short.
+FARM_RECORD_KEY_PURGE_BATCH = 5000
+
+_PURGE_FARM_RECORD_KEYS = text(
+    "DELETE FROM farm_record_keys WHERE idempotency_key IN ("
+    "SELECT idempotency_key FROM farm_record_keys WHERE created_at < :cutoff LIMIT :batch)"
+).bindparams(bindparam("cutoff", type_=DateTime(timezone=True)))
+
+@celery_app.task(name="purge_farm_record_keys")
+def purge_farm_record_keys():
+    """
+    Delete ingestion idempotency keys older than
+    `farm_record_key_retention_days` (see sql/001_farm_record_keys.sql).
+    """
+    days = get_settings().farm_record_key_retention_days
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    purged = 0
+    with SessionLocal() as db:
+        while True:
+            deleted = db.execute(
+                _PURGE_FARM_RECORD_KEYS,
+                {"cutoff": cutoff, "batch": FARM_RECORD_KEY_PURGE_BATCH},
+            ).rowcount
+            db.commit()
+            purged += deleted
+            if deleted < FARM_RECORD_KEY_PURGE_BATCH:
+                break
+    logger.info(f"Purged {purged} farm_record_keys")
+    return {"purged": purged}
+
+
+@celery_app.task(name="refresh_rollups_task", expires=get_settings().rollup_refresh_seconds)
+def refresh_rollups_task():
+    """
+    Recompute the dashboard rollups for farms changed since the last run.
+    """
+    with SessionLocal() as db:
+        return rollup_service.refresh_rollups(db)
+
+@celery_app.task(name="sweep_report_artifacts_task")
+def sweep_report_artifacts_task():
+    """
+    Delete report artifacts unused for `report_retention_days`.
+    """
+    deleted = artifact_store.sweep(get_settings().report_retention_days * 24 * 60 * 60)
+    if deleted:
+        logger.info(f"Deleted {deleted} unused report artifacts")
+    return deleted
+
+@celery_app.task(name="flush_dead_letters_task")
+def flush_dead_letters_task():
+    """
+    Move buffered task failures into the failed_tasks table.
+    """
+    with SessionLocal() as db:
+        written = dead_letter_service.flush(db)
+    if written:
+        logger.info(f"Flushed {written} dead-lettered task failures")
+    return written
+
+@celery_app.task(name="pump_fair_share_task")
+def pump_fair_share_task():
+    """
+    Send on held fair-share tasks whose users' slots lapsed with lost tasks.
+    """
+    fair_share.pump()
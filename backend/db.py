@@ -1,7 +1,9 @@
 import os
 import logging
-from contextlib import contextmanager
-from psycopg2 import pool
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool, PoolTimeout, TooManyRequests
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,49 +12,84 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("db")
 
-# Connection parameters
+# Connection parameters. These must name the database DATABASE_URL points
+# at: the API's Celery beat tasks maintain farm_records there (partitions,
+# idempotency keys) and /api/v1/stats reads its daily counts from it.
 DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASS = os.getenv("DB_PASS")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 
-try:
-    postgreSQL_pool = pool.ThreadedConnectionPool(
-        1, 20,
+# Pool sizing. Requests beyond DB_POOL_MAX queue for up to DB_POOL_TIMEOUT
+# seconds; once DB_POOL_MAX_WAITING requests are queued, new ones are
+# turned away immediately instead of piling up.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_MAX_WAITING = int(os.getenv("DB_POOL_MAX_WAITING", "100"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+# Server-side prepared statements don't survive PgBouncer in transaction
+# pooling mode; set this to false when running behind it.
+DB_PREPARE = os.getenv("DB_PREPARE", "true").lower() in ("1", "true", "yes")
+
+postgreSQL_pool = AsyncConnectionPool(
+    make_conninfo(
+        dbname=DB_NAME,
         user=DB_USER,
         password=DB_PASS,
         host=DB_HOST,
         port=DB_PORT,
-        database=DB_NAME
-    )
-    if postgreSQL_pool:
-        logger.info("Connection pool created successfully")
-except Exception as e:
-    logger.error(f"Error while creating connection pool: {e}")
-    postgreSQL_pool = None
-
-@contextmanager
-def get_db_connection():
-    conn = postgreSQL_pool.getconn()
+    ),
+    min_size=DB_POOL_MIN,
+    max_size=DB_POOL_MAX,
+    timeout=DB_POOL_TIMEOUT,
+    max_waiting=DB_POOL_MAX_WAITING,
+    max_idle=DB_POOL_MAX_IDLE,
+    max_lifetime=DB_POOL_MAX_LIFETIME,
+    # Validate connections as they are handed out so a restarted server
+    # costs one reconnect instead of a failed request.
+    check=AsyncConnectionPool.check_connection,
+    # Router queries pass prepare=True; a None threshold disables that too.
+    kwargs={} if DB_PREPARE else {"prepare_threshold": None},
+    name="farm-records",
+    open=False,
+)
+
+
+async def open_pool():
+    """
+    Open the pool at startup, failing loudly if the database is unreachable.
+    """
+    await postgreSQL_pool.open(wait=True, timeout=DB_POOL_TIMEOUT)
+    logger.info("Connection pool created successfully")
+
+
+async def close_pool():
+    await postgreSQL_pool.close()
+
+
+@asynccontextmanager
+async def get_db_connection():
     try:
-        yield conn
-    finally:
-        postgreSQL_pool.putconn(conn)
-
-@contextmanager
-def get_db_cursor():
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        try:
+        async with postgreSQL_pool.connection() as conn:
+            yield conn
+    except (PoolTimeout, TooManyRequests) as e:
+        logger.warning(f"Database pool exhausted: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Database busy, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+@asynccontextmanager
+async def get_db_cursor():
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cursor:
             yield cursor
-        finally:
-            cursor.close()
 
-def get_db():
+async def get_db():
     """Dependency for FastAPI"""
-    conn = postgreSQL_pool.getconn()
-    try:
+    async with get_db_connection() as conn:
         yield conn
-    finally:
-        postgreSQL_pool.putconn(conn)
@@ -0,0 +1,78 @@
+"""
+Bulk loader for farm_records.
+
+Rows are streamed into a temporary staging table with `COPY FROM STDIN` and
+moved into farm_records with a single INSERT ... SELECT, so a batch of
+thousands of records costs a handful of round trips and one commit instead
+of an INSERT + commit each.
+
+Idempotency: a row may carry a key. Keys are claimed in farm_record_keys
+(see sql/001_farm_record_keys.sql) in the same statement that inserts the
+records; a key that is already claimed, by an earlier request or earlier in
+the same batch, skips the insert and resolves to the original record id.
+Concurrent requests with the same key serialize on the key's unique index,
+so a device retrying a sync while the first attempt is still running cannot
+double-insert.
+"""
+
+import datetime
+from typing import List, Optional, Sequence, Tuple
+
+# (idempotency_key, worker_id, activity, date); key and date may be None.
+StagedRecord = Tuple[Optional[str], int, str, Optional[datetime.date]]
+
+_CREATE_STAGING = """
+CREATE TEMP TABLE farm_records_staging (
+    seq integer NOT NULL,
+    idempotency_key text,
+    worker_id integer NOT NULL,
+    activity text NOT NULL,
+    date date,
+    id integer NOT NULL DEFAULT nextval(pg_get_serial_sequence('farm_records', 'id'))
+) ON COMMIT DROP;
+"""
+
+_COPY_STAGING = """
+COPY farm_records_staging (seq, idempotency_key, worker_id, activity, date) FROM STDIN
+"""
+
+_MERGE_STAGING = """
+WITH claimed AS (
+    INSERT INTO farm_record_keys (idempotency_key, record_id)
+    SELECT idempotency_key, id FROM farm_records_staging
+    WHERE idempotency_key IS NOT NULL
+    ORDER BY seq
+    ON CONFLICT (idempotency_key) DO NOTHING
+    RETURNING record_id
+)
+INSERT INTO farm_records (id, worker_id, activity, date)
+SELECT s.id, s.worker_id, s.activity, COALESCE(s.date, CURRENT_DATE)
+FROM farm_records_staging s
+WHERE s.idempotency_key IS NULL OR s.id IN (SELECT record_id FROM claimed)
+ORDER BY s.seq;
+"""
+
+_STAGED_RESULTS = """
+SELECT COALESCE(k.record_id, s.id), k.record_id IS NULL OR k.record_id = s.id
+FROM farm_records_staging s
+LEFT JOIN farm_record_keys k USING (idempotency_key)
+ORDER BY s.seq;
+"""
+
+
+async def copy_farm_records(
+    cursor, records: Sequence[StagedRecord]
+) -> List[Tuple[int, bool]]:
+    """
+    Insert `records` inside the cursor's current transaction.
+
+    Returns `(record_id, created)` per input row, in input order; `created` is
+    False for rows whose key was already claimed. The caller commits.
+    """
+    await cursor.execute(_CREATE_STAGING)
+    async with cursor.copy(_COPY_STAGING) as copy:
+        for seq, record in enumerate(records):
+            await copy.write_row((seq, *record))
+    await cursor.execute(_MERGE_STAGING)
+    await cursor.execute(_STAGED_RESULTS)
+    return [(record_id, created) for record_id, created in await cursor.fetchall()]
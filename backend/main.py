@@ -1,10 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+import db
 from routers import worker, employee, manager, farm_records
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await db.open_pool()
+    yield
+    await db.close_pool()
+
 app = FastAPI(
     title="Farm Records Backend",
     description="Backend for farm management with roles and functional CRUD",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.include_router(worker.router)
@@ -19,3 +29,14 @@ def root():
 @app.get("/health")
 def health():
     return {"status": "healthy"}
+
+@app.get("/health/db")
+async def health_db():
+    """Pool occupancy plus a round trip to the database."""
+    stats = db.postgreSQL_pool.get_stats()
+    try:
+        async with db.get_db_cursor() as cursor:
+            await cursor.execute("SELECT 1;")
+    except Exception:
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "pool": stats})
+    return {"status": "healthy", "pool": stats}
@@ -1,6 +1,7 @@
 import logging
-import psycopg2.errors
+import psycopg.errors
 from fastapi import APIRouter, HTTPException, Query
+import totals
 from db import get_db_cursor
 from schemas import EmployeeCreate, Employee, EmployeeUpdate, PaginatedResponse
 from typing import List
@@ -9,68 +10,69 @@ router = APIRouter(prefix="/employees", tags=["employees"])
 logger = logging.getLogger("employees")
 
 @router.post("/", response_model=Employee)
-def create_employee(employee: EmployeeCreate):
+async def create_employee(employee: EmployeeCreate):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute(
+        async with get_db_cursor() as cursor:
+            await cursor.execute(
                 "INSERT INTO employees (name, role) VALUES (%s, %s) RETURNING id, name, role;",
-                (employee.name, employee.role)
+                (employee.name, employee.role),
+                prepare=True,
             )
-            result = cursor.fetchone()
-            cursor.connection.commit()
+            result = await cursor.fetchone()
+            await cursor.connection.commit()
+            await totals.invalidate("employees")
             return {"id": result[0], "name": result[1], "role": result[2]}
-    except psycopg2.errors.UniqueViolation:
+    except psycopg.errors.UniqueViolation:
         raise HTTPException(status_code=409, detail="Employee already exists")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating employee: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/", response_model=PaginatedResponse[Employee])
-def list_employees(limit: int = Query(10, le=100), offset: int = Query(0, ge=0)):
+async def list_employees(
+    limit: int = Query(10, le=100),
+    offset: int = Query(0, ge=0),
+    total: totals.TotalStrategy = Query("exact"),
+):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) FROM employees;")
-            total = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT id, name, role FROM employees LIMIT %s OFFSET %s;", (limit, offset))
-            employees = cursor.fetchall()
-            
+        async with get_db_cursor() as cursor:
+            employees, page = await totals.paginate(
+                cursor,
+                "employees",
+                "SELECT id, name, role FROM employees ORDER BY id LIMIT %s OFFSET %s;",
+                limit,
+                offset,
+                total,
+            )
+
             items = [{"id": e[0], "name": e[1], "role": e[2]} for e in employees]
-            return {
-                "items": items,
-                "total": total,
-                "limit": limit,
-                "offset": offset
-            }
+            return {"items": items, **page}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing employees: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.put("/{employee_id}", response_model=Employee)
-def update_employee(employee_id: int, employee: EmployeeUpdate):
+async def update_employee(employee_id: int, employee: EmployeeUpdate):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT id FROM employees WHERE id = %s;", (employee_id,))
-            if not cursor.fetchone():
+        if employee.name is None and employee.role is None:
+            raise HTTPException(status_code=400, detail="No fields to update")
+
+        async with get_db_cursor() as cursor:
+            # One fixed statement (so it can be prepared) instead of building
+            # the SET list per request; unset fields keep their value.
+            await cursor.execute(
+                "UPDATE employees SET name = COALESCE(%s, name), role = COALESCE(%s, role) WHERE id = %s RETURNING id, name, role;",
+                (employee.name, employee.role, employee_id),
+                prepare=True,
+            )
+            result = await cursor.fetchone()
+            if not result:
                 raise HTTPException(status_code=404, detail="Employee not found")
-            
-            updates = []
-            params = []
-            if employee.name is not None:
-                updates.append("name = %s")
-                params.append(employee.name)
-            if employee.role is not None:
-                updates.append("role = %s")
-                params.append(employee.role)
-            
-            if not updates:
-                raise HTTPException(status_code=400, detail="No fields to update")
-            
-            params.append(employee_id)
-            query = f"UPDATE employees SET {', '.join(updates)} WHERE id = %s RETURNING id, name, role;"
-            cursor.execute(query, tuple(params))
-            result = cursor.fetchone()
-            cursor.connection.commit()
+            await cursor.connection.commit()
             return {"id": result[0], "name": result[1], "role": result[2]}
     except HTTPException:
         raise
@@ -79,13 +81,14 @@ def update_employee(employee_id: int, employee: EmployeeUpdate):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.delete("/{employee_id}")
-def delete_employee(employee_id: int):
+async def delete_employee(employee_id: int):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("DELETE FROM employees WHERE id = %s RETURNING id;", (employee_id,))
-            if not cursor.fetchone():
+        async with get_db_cursor() as cursor:
+            await cursor.execute("DELETE FROM employees WHERE id = %s RETURNING id;", (employee_id,), prepare=True)
+            if not await cursor.fetchone():
                 raise HTTPException(status_code=404, detail="Employee not found")
-            cursor.connection.commit()
+            await cursor.connection.commit()
+            await totals.invalidate("employees")
             return {"message": "Employee deleted successfully"}
     except HTTPException:
         raise
@@ -1,76 +1,191 @@
+import datetime
 import logging
-from fastapi import APIRouter, HTTPException, Query
+import psycopg.errors
+from psycopg import sql
+from fastapi import APIRouter, Header, HTTPException, Query
+import ingest
+import totals
 from db import get_db_cursor
-from schemas import FarmRecordCreate, FarmRecord, FarmRecordUpdate, PaginatedResponse
-from typing import List
+from schemas import (
+    FarmRecordCreate,
+    FarmRecord,
+    FarmRecordUpdate,
+    FarmRecordBatch,
+    FarmRecordBatchResult,
+    FarmRecordSync,
+    FarmRecordSyncResult,
+    PaginatedResponse,
+)
+from typing import List, Optional
 
 router = APIRouter(prefix="/farm-records", tags=["farm_records"])
 logger = logging.getLogger("farm_records")
 
 @router.post("/", response_model=FarmRecord)
-def create_farm_record(record: FarmRecordCreate):
+async def create_farm_record(record: FarmRecordCreate):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute(
+        async with get_db_cursor() as cursor:
+            await cursor.execute(
                 "INSERT INTO farm_records (worker_id, activity, date) VALUES (%s, %s, COALESCE(%s, CURRENT_DATE)) RETURNING id, worker_id, activity, date;",
-                (record.worker_id, record.activity, record.date)
+                (record.worker_id, record.activity, record.date),
+                prepare=True,
             )
-            result = cursor.fetchone()
-            cursor.connection.commit()
+            result = await cursor.fetchone()
+            await cursor.connection.commit()
+            await totals.invalidate("farm_records")
             return {"id": result[0], "worker_id": result[1], "activity": result[2], "date": result[3]}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating farm record: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+async def _ingest(records: List[ingest.StagedRecord]):
+    try:
+        async with get_db_cursor() as cursor:
+            results = await ingest.copy_farm_records(cursor, records)
+            await cursor.connection.commit()
+            await totals.invalidate("farm_records")
+            return results
+    except psycopg.errors.ForeignKeyViolation:
+        raise HTTPException(status_code=422, detail="Unknown worker_id in batch")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ingesting farm records: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@router.post("/batch", response_model=FarmRecordBatchResult)
+async def create_farm_records_batch(
+    batch: FarmRecordBatch,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+):
+    """
+    Insert many records in one transaction. With an `Idempotency-Key` header a
+    retried batch is not inserted again and returns the original ids.
+    """
+    results = await _ingest([
+        (f"batch:{idempotency_key}:{i}" if idempotency_key else None, r.worker_id, r.activity, r.date)
+        for i, r in enumerate(batch.records)
+    ])
+    created = sum(1 for _, was_created in results if was_created)
+    return {
+        "created": created,
+        "duplicates": len(results) - created,
+        "ids": [record_id for record_id, _ in results],
+    }
+
+@router.post("/sync", response_model=FarmRecordSyncResult)
+async def sync_farm_records(sync: FarmRecordSync):
+    """
+    Offline sync for mobile clients: upload everything queued on the device.
+    Records are keyed by (device_id, client_id), so replaying a partially
+    acknowledged upload is safe and returns the server ids for every record.
+    """
+    results = await _ingest([
+        (f"sync:{sync.device_id}:{r.client_id}", r.worker_id, r.activity, r.date)
+        for r in sync.records
+    ])
+    records = [
+        {"client_id": r.client_id, "id": record_id, "created": was_created}
+        for r, (record_id, was_created) in zip(sync.records, results)
+    ]
+    created = sum(1 for r in records if r["created"])
+    return {"created": created, "duplicates": len(records) - created, "records": records}
+
 @router.get("/", response_model=PaginatedResponse[FarmRecord])
-def list_farm_records(limit: int = Query(10, le=100), offset: int = Query(0, ge=0)):
+async def list_farm_records(
+    limit: int = Query(10, le=100),
+    offset: int = Query(0, ge=0),
+    total: totals.TotalStrategy = Query("exact"),
+):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) FROM farm_records;")
-            total = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT id, worker_id, activity, date FROM farm_records LIMIT %s OFFSET %s;", (limit, offset))
-            records = cursor.fetchall()
-            
+        async with get_db_cursor() as cursor:
+            records, page = await totals.paginate(
+                cursor,
+                "farm_records",
+                "SELECT id, worker_id, activity, date FROM farm_records ORDER BY id LIMIT %s OFFSET %s;",
+                limit,
+                offset,
+                total,
+            )
+
             items = [{"id": r[0], "worker_id": r[1], "activity": r[2], "date": r[3]} for r in records]
-            return {
-                "items": items,
-                "total": total,
-                "limit": limit,
-                "offset": offset
-            }
+            return {"items": items, **page}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing farm records: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@router.get("/range", response_model=PaginatedResponse[FarmRecord])
+async def list_farm_records_range(
+    date_from: datetime.date,
+    date_to: Optional[datetime.date] = None,
+    worker_id: Optional[int] = None,
+    activity: Optional[str] = None,
+    limit: int = Query(10, le=100),
+    offset: int = Query(0, ge=0),
+    total: totals.TotalStrategy = Query("exact"),
+):
+    """
+    Records between `date_from` and `date_to` (inclusive, default today),
+    newest first. The date bounds let Postgres skip every monthly partition
+    outside the range; worker_id/activity filters use the (column, date)
+    indexes within it.
+    """
+    conditions = [sql.SQL("date >= %s"), sql.SQL("date <= %s")]
+    params = [date_from, date_to or datetime.date.today()]
+    if worker_id is not None:
+        conditions.append(sql.SQL("worker_id = %s"))
+        params.append(worker_id)
+    if activity is not None:
+        conditions.append(sql.SQL("activity = %s"))
+        params.append(activity)
+    where = sql.SQL(" AND ").join(conditions)
+
+    try:
+        async with get_db_cursor() as cursor:
+            records, page = await totals.paginate(
+                cursor,
+                "farm_records",
+                sql.SQL(
+                    "SELECT id, worker_id, activity, date FROM farm_records WHERE {} "
+                    "ORDER BY date DESC, id DESC LIMIT %s OFFSET %s;"
+                ).format(where),
+                limit,
+                offset,
+                total,
+                params,
+                where,
+            )
+
+            items = [{"id": r[0], "worker_id": r[1], "activity": r[2], "date": r[3]} for r in records]
+            return {"items": items, **page}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing farm records by range: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
 @router.put("/{record_id}", response_model=FarmRecord)
-def update_farm_record(record_id: int, record: FarmRecordUpdate):
+async def update_farm_record(record_id: int, record: FarmRecordUpdate):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT id FROM farm_records WHERE id = %s;", (record_id,))
-            if not cursor.fetchone():
+        if record.worker_id is None and record.activity is None and record.date is None:
+            raise HTTPException(status_code=400, detail="No fields to update")
+
+        async with get_db_cursor() as cursor:
+            # One fixed statement (so it can be prepared) instead of building
+            # the SET list per request; unset fields keep their value.
+            await cursor.execute(
+                "UPDATE farm_records SET worker_id = COALESCE(%s, worker_id), activity = COALESCE(%s, activity), date = COALESCE(%s, date) WHERE id = %s RETURNING id, worker_id, activity, date;",
+                (record.worker_id, record.activity, record.date, record_id),
+                prepare=True,
+            )
+            result = await cursor.fetchone()
+            if not result:
                 raise HTTPException(status_code=404, detail="Farm record not found")
-            
-            updates = []
-            params = []
-            if record.worker_id is not None:
-                updates.append("worker_id = %s")
-                params.append(record.worker_id)
-            if record.activity is not None:
-                updates.append("activity = %s")
-                params.append(record.activity)
-            if record.date is not None:
-                updates.append("date = %s")
-                params.append(record.date)
-            
-            if not updates:
-                raise HTTPException(status_code=400, detail="No fields to update")
-            
-            params.append(record_id)
-            query = f"UPDATE farm_records SET {', '.join(updates)} WHERE id = %s RETURNING id, worker_id, activity, date;"
-            cursor.execute(query, tuple(params))
-            result = cursor.fetchone()
-            cursor.connection.commit()
+            await cursor.connection.commit()
             return {"id": result[0], "worker_id": result[1], "activity": result[2], "date": result[3]}
     except HTTPException:
         raise
@@ -79,13 +194,14 @@ def update_farm_record(record_id: int, record: FarmRecordUpdate):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.delete("/{record_id}")
-def delete_farm_record(record_id: int):
+async def delete_farm_record(record_id: int):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("DELETE FROM farm_records WHERE id = %s RETURNING id;", (record_id,))
-            if not cursor.fetchone():
+        async with get_db_cursor() as cursor:
+            await cursor.execute("DELETE FROM farm_records WHERE id = %s RETURNING id;", (record_id,), prepare=True)
+            if not await cursor.fetchone():
                 raise HTTPException(status_code=404, detail="Farm record not found")
-            cursor.connection.commit()
+            await cursor.connection.commit()
+            await totals.invalidate("farm_records")
             return {"message": "Farm record deleted successfully"}
     except HTTPException:
         raise
@@ -1,6 +1,7 @@
 import logging
-import psycopg2.errors
+import psycopg.errors
 from fastapi import APIRouter, HTTPException, Query
+import totals
 from db import get_db_cursor
 from schemas import ManagerCreate, Manager, ManagerUpdate, PaginatedResponse
 from typing import List
@@ -9,68 +10,69 @@ router = APIRouter(prefix="/managers", tags=["managers"])
 logger = logging.getLogger("managers")
 
 @router.post("/", response_model=Manager)
-def create_manager(manager: ManagerCreate):
+async def create_manager(manager: ManagerCreate):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute(
+        async with get_db_cursor() as cursor:
+            await cursor.execute(
                 "INSERT INTO managers (name, role) VALUES (%s, %s) RETURNING id, name, role;",
-                (manager.name, manager.role)
+                (manager.name, manager.role),
+                prepare=True,
             )
-            result = cursor.fetchone()
-            cursor.connection.commit()
+            result = await cursor.fetchone()
+            await cursor.connection.commit()
+            await totals.invalidate("managers")
             return {"id": result[0], "name": result[1], "role": result[2]}
-    except psycopg2.errors.UniqueViolation:
+    except psycopg.errors.UniqueViolation:
         raise HTTPException(status_code=409, detail="Manager already exists")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating manager: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/", response_model=PaginatedResponse[Manager])
-def list_managers(limit: int = Query(10, le=100), offset: int = Query(0, ge=0)):
+async def list_managers(
+    limit: int = Query(10, le=100),
+    offset: int = Query(0, ge=0),
+    total: totals.TotalStrategy = Query("exact"),
+):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) FROM managers;")
-            total = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT id, name, role FROM managers LIMIT %s OFFSET %s;", (limit, offset))
-            managers = cursor.fetchall()
-            
+        async with get_db_cursor() as cursor:
+            managers, page = await totals.paginate(
+                cursor,
+                "managers",
+                "SELECT id, name, role FROM managers ORDER BY id LIMIT %s OFFSET %s;",
+                limit,
+                offset,
+                total,
+            )
+
             items = [{"id": m[0], "name": m[1], "role": m[2]} for m in managers]
-            return {
-                "items": items,
-                "total": total,
-                "limit": limit,
-                "offset": offset
-            }
+            return {"items": items, **page}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing managers: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.put("/{manager_id}", response_model=Manager)
-def update_manager(manager_id: int, manager: ManagerUpdate):
+async def update_manager(manager_id: int, manager: ManagerUpdate):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT id FROM managers WHERE id = %s;", (manager_id,))
-            if not cursor.fetchone():
+        if manager.name is None and manager.role is None:
+            raise HTTPException(status_code=400, detail="No fields to update")
+
+        async with get_db_cursor() as cursor:
+            # One fixed statement (so it can be prepared) instead of building
+            # the SET list per request; unset fields keep their value.
+            await cursor.execute(
+                "UPDATE managers SET name = COALESCE(%s, name), role = COALESCE(%s, role) WHERE id = %s RETURNING id, name, role;",
+                (manager.name, manager.role, manager_id),
+                prepare=True,
+            )
+            result = await cursor.fetchone()
+            if not result:
                 raise HTTPException(status_code=404, detail="Manager not found")
-            
-            updates = []
-            params = []
-            if manager.name is not None:
-                updates.append("name = %s")
-                params.append(manager.name)
-            if manager.role is not None:
-                updates.append("role = %s")
-                params.append(manager.role)
-            
-            if not updates:
-                raise HTTPException(status_code=400, detail="No fields to update")
-            
-            params.append(manager_id)
-            query = f"UPDATE managers SET {', '.join(updates)} WHERE id = %s RETURNING id, name, role;"
-            cursor.execute(query, tuple(params))
-            result = cursor.fetchone()
-            cursor.connection.commit()
+            await cursor.connection.commit()
             return {"id": result[0], "name": result[1], "role": result[2]}
     except HTTPException:
         raise
@@ -79,13 +81,14 @@ def update_manager(manager_id: int, manager: ManagerUpdate):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.delete("/{manager_id}")
-def delete_manager(manager_id: int):
+async def delete_manager(manager_id: int):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("DELETE FROM managers WHERE id = %s RETURNING id;", (manager_id,))
-            if not cursor.fetchone():
+        async with get_db_cursor() as cursor:
+            await cursor.execute("DELETE FROM managers WHERE id = %s RETURNING id;", (manager_id,), prepare=True)
+            if not await cursor.fetchone():
                 raise HTTPException(status_code=404, detail="Manager not found")
-            cursor.connection.commit()
+            await cursor.connection.commit()
+            await totals.invalidate("managers")
             return {"message": "Manager deleted successfully"}
     except HTTPException:
         raise
@@ -1,6 +1,7 @@
 import logging
-import psycopg2.errors
+import psycopg.errors
 from fastapi import APIRouter, HTTPException, Query, Depends
+import totals
 from db import get_db_cursor
 from schemas import WorkerCreate, Worker, WorkerUpdate, PaginatedResponse
 from typing import List
@@ -9,81 +10,78 @@ router = APIRouter(prefix="/workers", tags=["workers"])
 logger = logging.getLogger("workers")
 
 @router.post("/", response_model=Worker)
-def create_worker(worker: WorkerCreate):
+async def create_worker(worker: WorkerCreate):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute(
+        async with get_db_cursor() as cursor:
+            await cursor.execute(
                 "INSERT INTO workers (name, role) VALUES (%s, %s) RETURNING id, name, role;",
-                (worker.name, worker.role)
+                (worker.name, worker.role),
+                prepare=True,
             )
-            result = cursor.fetchone()
-            cursor.connection.commit()
+            result = await cursor.fetchone()
+            await cursor.connection.commit()
+            await totals.invalidate("workers")
             return {"id": result[0], "name": result[1], "role": result[2]}
-    except psycopg2.errors.UniqueViolation:
+    except psycopg.errors.UniqueViolation:
         raise HTTPException(status_code=409, detail="Worker already exists")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating worker: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/", response_model=PaginatedResponse[Worker])
-def list_workers(limit: int = Query(10, le=100), offset: int = Query(0, ge=0)):
+async def list_workers(
+    limit: int = Query(10, le=100),
+    offset: int = Query(0, ge=0),
+    total: totals.TotalStrategy = Query("exact"),
+):
     try:
-        with get_db_cursor() as cursor:
-            # Get total count
-            cursor.execute("SELECT COUNT(*) FROM workers;")
-            total = cursor.fetchone()[0]
-            
-            # Get paginated items
-            cursor.execute("SELECT id, name, role FROM workers LIMIT %s OFFSET %s;", (limit, offset))
-            workers = cursor.fetchall()
-            
+        async with get_db_cursor() as cursor:
+            workers, page = await totals.paginate(
+                cursor,
+                "workers",
+                "SELECT id, name, role FROM workers ORDER BY id LIMIT %s OFFSET %s;",
+                limit,
+                offset,
+                total,
+            )
+
             items = [{"id": w[0], "name": w[1], "role": w[2]} for w in workers]
-            return {
-                "items": items,
-                "total": total,
-                "limit": limit,
-                "offset": offset
-            }
+            return {"items": items, **page}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing workers: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/{worker_id}", response_model=Worker)
-def get_worker(worker_id: int):
-    with get_db_cursor() as cursor:
-        cursor.execute("SELECT id, name, role FROM workers WHERE id = %s;", (worker_id,))
-        result = cursor.fetchone()
+async def get_worker(worker_id: int):
+    async with get_db_cursor() as cursor:
+        await cursor.execute("SELECT id, name, role FROM workers WHERE id = %s;", (worker_id,), prepare=True)
+        result = await cursor.fetchone()
         if not result:
             raise HTTPException(status_code=404, detail="Worker not found")
         return {"id": result[0], "name": result[1], "role": result[2]}
 
 @router.put("/{worker_id}", response_model=Worker)
-def update_worker(worker_id: int, worker: WorkerUpdate):
+async def update_worker(worker_id: int, worker: WorkerUpdate):
     try:
-        with get_db_cursor() as cursor:
-            # Check if exists
-            cursor.execute("SELECT id FROM workers WHERE id = %s;", (worker_id,))
-            if not cursor.fetchone():
+        if worker.name is None and worker.role is None:
+            raise HTTPException(status_code=400, detail="No fields to update")
+
+        async with get_db_cursor() as cursor:
+            # One fixed statement (so it can be prepared) instead of building
+            # the SET list per request; unset fields keep their value.
+            await cursor.execute(
+                "UPDATE workers SET name = COALESCE(%s, name), role = COALESCE(%s, role) WHERE id = %s RETURNING id, name, role;",
+                (worker.name, worker.role, worker_id),
+                prepare=True,
+            )
+            result = await cursor.fetchone()
+            if not result:
                 raise HTTPException(status_code=404, detail="Worker not found")
-            
-            # Prepare dynamic update
-            updates = []
-            params = []
-            if worker.name is not None:
-                updates.append("name = %s")
-                params.append(worker.name)
-            if worker.role is not None:
-                updates.append("role = %s")
-                params.append(worker.role)
-            
-            if not updates:
-                raise HTTPException(status_code=400, detail="No fields to update")
-            
-            params.append(worker_id)
-            query = f"UPDATE workers SET {', '.join(updates)} WHERE id = %s RETURNING id, name, role;"
-            cursor.execute(query, tuple(params))
-            result = cursor.fetchone()
-            cursor.connection.commit()
+            await cursor.connection.commit()
             return {"id": result[0], "name": result[1], "role": result[2]}
     except HTTPException:
         raise
@@ -92,13 +90,14 @@ def update_worker(worker_id: int, worker: WorkerUpdate):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.delete("/{worker_id}")
-def delete_worker(worker_id: int):
+async def delete_worker(worker_id: int):
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("DELETE FROM workers WHERE id = %s RETURNING id;", (worker_id,))
-            if not cursor.fetchone():
+        async with get_db_cursor() as cursor:
+            await cursor.execute("DELETE FROM workers WHERE id = %s RETURNING id;", (worker_id,), prepare=True)
+            if not await cursor.fetchone():
                 raise HTTPException(status_code=404, detail="Worker not found")
-            cursor.connection.commit()
+            await cursor.connection.commit()
+            await totals.invalidate("workers")
             return {"message": "Worker deleted successfully"}
     except HTTPException:
         raise
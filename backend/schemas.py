@@ -0,0 +1,125 @@
+import datetime
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+# Largest number of records accepted by one batch or sync request.
+MAX_BATCH_RECORDS = 5000
+
+
+class PaginatedResponse(BaseModel, Generic[T]):
+    items: List[T]
+    # None when the caller asked for total=none.
+    total: Optional[int] = None
+    limit: int
+    offset: int
+    has_more: bool = False
+
+
+class WorkerBase(BaseModel):
+    name: str
+    role: str
+
+
+class WorkerCreate(WorkerBase):
+    pass
+
+
+class WorkerUpdate(BaseModel):
+    name: Optional[str] = None
+    role: Optional[str] = None
+
+
+class Worker(WorkerBase):
+    id: int
+
+
+class EmployeeBase(BaseModel):
+    name: str
+    role: str
+
+
+class EmployeeCreate(EmployeeBase):
+    pass
+
+
+class EmployeeUpdate(BaseModel):
+    name: Optional[str] = None
+    role: Optional[str] = None
+
+
+class Employee(EmployeeBase):
+    id: int
+
+
+class ManagerBase(BaseModel):
+    name: str
+    role: str
+
+
+class ManagerCreate(ManagerBase):
+    pass
+
+
+class ManagerUpdate(BaseModel):
+    name: Optional[str] = None
+    role: Optional[str] = None
+
+
+class Manager(ManagerBase):
+    id: int
+
+
+class FarmRecordCreate(BaseModel):
+    worker_id: int
+    activity: str
+    date: Optional[datetime.date] = None
+
+
+class FarmRecordUpdate(BaseModel):
+    worker_id: Optional[int] = None
+    activity: Optional[str] = None
+    date: Optional[datetime.date] = None
+
+
+class FarmRecord(BaseModel):
+    id: int
+    worker_id: int
+    activity: str
+    date: datetime.date
+
+
+class FarmRecordBatch(BaseModel):
+    records: List[FarmRecordCreate] = Field(min_length=1, max_length=MAX_BATCH_RECORDS)
+
+
+class FarmRecordBatchResult(BaseModel):
+    created: int
+    duplicates: int
+    # Record ids in request order; a replayed batch returns the original ids.
+    ids: List[int]
+
+
+class FarmRecordSyncItem(FarmRecordCreate):
+    # Generated on the device when the record is captured, unique per device.
+    client_id: str = Field(min_length=1, max_length=64)
+
+
+class FarmRecordSync(BaseModel):
+    device_id: str = Field(min_length=1, max_length=64)
+    records: List[FarmRecordSyncItem] = Field(min_length=1, max_length=MAX_BATCH_RECORDS)
+
+
+class SyncedFarmRecord(BaseModel):
+    client_id: str
+    id: int
+    # False when the record was already stored by an earlier sync.
+    created: bool
+
+
+class FarmRecordSyncResult(BaseModel):
+    created: int
+    duplicates: int
+    records: List[SyncedFarmRecord]
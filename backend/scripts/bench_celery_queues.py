@@ -0,0 +1,242 @@
+"""
+Benchmark Celery queue layouts: task throughput and queue latency.
+
+Stand-in tasks registered under the real task names (so the real routes
+in `app.core.celery_app` apply) sleep for a report- or prediction-sized
+time. A burst of reports is queued, then a burst of predictions, and each
+task reports how long it waited in the queue. Profiles:
+
+  single-queue    every task on one queue, one worker pool (the old setup)
+  routed          reports and ai queues with their own pools, reports
+                  prefetching one message at a time
+  routed-msgpack  routed, with the msgpack serializer
+
+Workers run as real `celery worker` processes with the same total
+concurrency in every profile. Without `--redis-url`, an embedded Redis
+from the `redislite` package (in requirements-dev.txt) is used.
+
+Usage (from backend/):
+    python scripts/bench_celery_queues.py --reports 16 --predictions 400 \\
+        --json-out /tmp/celery_bench.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from statistics import quantiles
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+
+# (queues, concurrency, prefetch multiplier) per worker process group.
+PROFILES = {
+    "single-queue": {"serializer": "json", "routed": False, "workers": [("default", 6, 4)]},
+    "routed": {"serializer": "json", "routed": True, "workers": [("reports", 2, 1), ("ai", 4, 4)]},
+    "routed-msgpack": {
+        "serializer": "msgpack",
+        "routed": True,
+        "workers": [("reports", 2, 1), ("ai", 4, 4)],
+    },
+}
+TASKS = ("generate_report_task", "ai_prediction_task")
+
+
+def build_app(profile: str, redis_url: str):
+    """
+    Celery app with the production routing/serialization settings for
+    `profile` and the stand-in tasks.
+    """
+    settings = PROFILES[profile]
+    os.environ["REDIS_URL"] = redis_url
+    os.environ["CELERY_SERIALIZER"] = settings["serializer"]
+    if not settings["routed"]:
+        os.environ["CELERY_TASK_QUEUES"] = json.dumps({task: "default" for task in TASKS})
+    os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/moometrics_bench.db")
+    os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark-placeholder-key")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+    from celery import Celery
+
+    from app.core.celery_app import celery_app
+
+    app = Celery("bench", broker=redis_url, backend=redis_url, task_cls=celery_app.task_cls)
+    app.conf.update(
+        {
+            key: celery_app.conf[key]
+            for key in (
+                "task_serializer",
+                "accept_content",
+                "result_serializer",
+                "result_accept_content",
+                "task_default_queue",
+                "task_queues",
+                "task_routes",
+                "worker_prefetch_multiplier",
+            )
+        }
+    )
+
+    def stand_in(sent_at, seconds, payload):
+        started = time.time()
+        time.sleep(seconds)
+        return [started - sent_at, time.time()]
+
+    for name in TASKS:
+        app.task(name=name)(stand_in)
+    return app
+
+
+if "BENCH_PROFILE" in os.environ:
+    # Imported by `celery -A bench_celery_queues:bench worker`.
+    bench = build_app(os.environ["BENCH_PROFILE"], os.environ["BENCH_REDIS_URL"])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--redis-url", help="Broker to use (default: embedded redislite)")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--reports", type=int, default=16)
+    parser.add_argument("--report-seconds", type=float, default=1.0)
+    parser.add_argument("--predictions", type=int, default=400)
+    parser.add_argument("--prediction-seconds", type=float, default=0.005)
+    parser.add_argument(
+        "--payload-items", type=int, default=200, help="Size of each prediction's argument"
+    )
+    parser.add_argument("--json-out", help="Also write the results here as JSON")
+    parser.add_argument("--produce", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def produce(args, redis_url):
+    """
+    Queue the workload against running workers; print per-task stats as JSON.
+    """
+    app = build_app(args.produce, redis_url)
+    expected = len(PROFILES[args.produce]["workers"])
+    deadline = time.time() + 60
+    while len(app.control.ping(timeout=0.5)) < expected:
+        if time.time() > deadline:
+            raise SystemExit("workers did not come up")
+
+    payload = {"readings": [{"sensor": f"s{i}", "value": i * 0.5} for i in range(args.payload_items)]}
+    report = app.tasks["generate_report_task"]
+    predict = app.tasks["ai_prediction_task"]
+    start = time.time()
+    sent = [("report", report.apply_async(args=(time.time(), args.report_seconds, {})))
+            for _ in range(args.reports)]
+    sent += [
+        ("prediction", predict.apply_async(args=(time.time(), args.prediction_seconds, payload)))
+        for _ in range(args.predictions)
+    ]
+    kinds = {result.id: kind for kind, result in sent}
+    waits = {"report": [], "prediction": []}
+    finished = {"report": [], "prediction": []}
+    # Poll the stored results rather than waiting on each over pub/sub;
+    # tasks time themselves, so the polling interval doesn't skew anything.
+    for task_id, meta in app.backend.get_many(list(kinds), timeout=600, interval=0.05):
+        wait, done = meta["result"]
+        waits[kinds[task_id]].append(wait * 1000)
+        finished[kinds[task_id]].append(done)
+
+    stats = {}
+    for kind in waits:
+        q = quantiles(waits[kind], n=100)
+        stats[kind] = {
+            "tasks": len(waits[kind]),
+            "tasks_per_sec": round(len(waits[kind]) / (max(finished[kind]) - start), 1),
+            "queue_ms_p50": round(q[49], 1),
+            "queue_ms_p95": round(q[94], 1),
+            "queue_ms_p99": round(q[98], 1),
+        }
+    stats["all"] = {"tasks_per_sec": round(len(sent) / (max(max(f) for f in finished.values()) - start), 1)}
+    print(json.dumps(stats))
+
+
+def run_profile(args, profile, redis_url):
+    env = {**os.environ, "BENCH_PROFILE": profile, "BENCH_REDIS_URL": redis_url}
+    workers = [
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "celery", "-A", "bench_celery_queues:bench", "worker",
+                "-Q", queues, "--concurrency", str(concurrency),
+                "--prefetch-multiplier", str(prefetch), "-n", f"{profile}-{i}@%h",
+                "--without-gossip", "--without-mingle", "--loglevel", "warning",
+            ],
+            cwd=SCRIPT_DIR,
+            env=env,
+        )
+        for i, (queues, concurrency, prefetch) in enumerate(PROFILES[profile]["workers"])
+    ]
+    try:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--produce", profile, *sys.argv[1:]],
+            env={**os.environ, "BENCH_REDIS_URL": redis_url},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+
+
+def main():
+    args = parse_args()
+    if args.produce:
+        produce(args, os.environ["BENCH_REDIS_URL"])
+        return
+
+    server = None
+    redis_url = args.redis_url
+    if redis_url is None:
+        try:
+            from redislite import Redis
+        except ImportError:
+            sys.exit(
+                "redislite is not installed: pip install -r requirements-dev.txt, "
+                "or pass --redis-url"
+            )
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        # Over TCP: worker broadcast (ping) doesn't work over the unix socket.
+        server = Redis(serverconfig={"port": str(port), "bind": "127.0.0.1"})
+        redis_url = f"redis://127.0.0.1:{port}/0"
+
+    results = {}
+    try:
+        for profile in args.profiles:
+            if server is not None:
+                server.flushall()
+            results[profile] = run_profile(args, profile, redis_url)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print(
+        f"{args.reports} reports x {args.report_seconds}s, "
+        f"{args.predictions} predictions x {args.prediction_seconds}s"
+    )
+    for profile, stats in results.items():
+        print(f"{profile}: {stats['all']['tasks_per_sec']} tasks/s overall")
+        for kind in ("prediction", "report"):
+            s = stats[kind]
+            print(
+                f"  {kind:<10} {s['tasks_per_sec']:7.1f}/s  queue p50={s['queue_ms_p50']:8.1f}ms  "
+                f"p95={s['queue_ms_p95']:8.1f}ms  p99={s['queue_ms_p99']:8.1f}ms"
+            )
+    if args.json_out:
+        with open(args.json_out, "w") as out:
+            json.dump({"args": vars(args), "results": results}, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark the CRUD write path: round trips and latency per operation.
+
+Compares the old add/commit/refresh pattern with the unit-of-work path in
+app.crud (INSERT/UPDATE ... RETURNING, one commit per request).
+
+Usage (from backend/):
+    python scripts/bench_crud_writes.py --database-url postgresql+psycopg://...
+    python scripts/bench_crud_writes.py            # in-memory SQLite
+"""
+
+import argparse
+import os
+import sys
+import time
+from statistics import mean
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--iterations", type=int, default=200)
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ["DATABASE_URL"] = args.database_url
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark-placeholder-key")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.sql import func  # noqa: E402
+
+from app import crud  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Animal, Farm, User  # noqa: E402
+from app.schemas.animal import AnimalCreate, AnimalUpdate  # noqa: E402
+
+round_trips = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(*_):
+    global round_trips
+    round_trips += 1
+
+
+@event.listens_for(engine, "commit")
+def _count_commit(*_):
+    global round_trips
+    round_trips += 1
+
+
+def legacy_request(db, farm_id):
+    """One create + update + soft delete, the way the CRUD modules used to."""
+    animal = Animal(**_animal_payload(farm_id).model_dump())
+    db.add(animal)
+    db.commit()
+    db.refresh(animal)
+
+    animal.health_status = "Sick"
+    db.add(animal)
+    db.commit()
+    db.refresh(animal)
+
+    animal.is_deleted = True
+    animal.deleted_at = func.now()
+    db.add(animal)
+    db.commit()
+    db.refresh(animal)
+
+
+def unit_of_work_request(db, farm_id):
+    animal = crud.animal.create(db, obj_in=_animal_payload(farm_id))
+    animal = crud.animal.update(
+        db, db_obj=animal, obj_in=AnimalUpdate(health_status="Sick")
+    )
+    crud.animal.remove(db, db_obj=animal)
+    db.commit()
+
+
+def _animal_payload(farm_id):
+    return AnimalCreate(
+        tag_number="BENCH-001",
+        type="Cow",
+        health_status="Healthy",
+        vaccination_status="Up to Date",
+        farm_id=farm_id,
+    )
+
+
+def run(label, request, farm_id, iterations):
+    global round_trips
+    timings = []
+    round_trips = 0
+    for _ in range(iterations):
+        db = SessionLocal()
+        start = time.perf_counter()
+        request(db, farm_id)
+        timings.append(time.perf_counter() - start)
+        db.close()
+    ops = iterations * 3
+    print(
+        f"{label:<14} round trips/op={round_trips / ops:5.2f}  "
+        f"latency/op={mean(timings) / 3 * 1000:7.3f}ms"
+    )
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(email=f"bench_{int(time.time())}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        farm = Farm(name="Benchmark Farm", owner_id=user.id)
+        db.add(farm)
+        db.commit()
+        farm_id = farm.id
+
+    print(f"{args.iterations} requests x 3 writes against {engine.url.get_backend_name()}")
+    run("legacy", legacy_request, farm_id, args.iterations)
+    run("unit-of-work", unit_of_work_request, farm_id, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
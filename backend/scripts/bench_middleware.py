@@ -0,0 +1,171 @@
+"""
+Per-request cost of the request id / timing / access log middleware.
+
+Serves a trivial JSON route from three otherwise identical apps:
+
+  none      no middleware (the floor)
+  http      the previous `@app.middleware("http")` version: BaseHTTPMiddleware
+            and an f-string access log line for every request
+  asgi      `app.core.middleware.RequestContextMiddleware`
+
+Requests are driven straight through the ASGI interface with `--concurrency`
+in flight, so the numbers are the app's own cost per request without a
+server or HTTP client in the way. The access log goes to a handler writing
+to /dev/null, so formatting is paid for but not terminal I/O.
+
+Usage (from backend/):
+    python scripts/bench_middleware.py --requests 20000 --concurrency 100 \\
+        --json-out /tmp/middleware_bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from statistics import quantiles
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/moometrics_bench.db")
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark-placeholder-key")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from fastapi import FastAPI, Request  # noqa: E402
+
+from app.core.middleware import RequestContextMiddleware  # noqa: E402
+
+logger = logging.getLogger("api")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--sample-rate", type=float, default=0.1, help="Access log sample rate of the asgi variant"
+    )
+    parser.add_argument("--json-out", help="Also write the results here as JSON")
+    return parser.parse_args()
+
+
+def build_app(variant: str, sample_rate: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    if variant == "http":
+
+        @app.middleware("http")
+        async def add_process_time_header(request: Request, call_next):
+            request_id = str(uuid.uuid4())
+            request.state.request_id = request_id
+            start_time = time.time()
+            response = await call_next(request)
+            process_time = time.time() - start_time
+            response.headers["X-Process-Time"] = str(process_time)
+            response.headers["X-Request-ID"] = request_id
+            logger.info(
+                f"RID={request_id} METHOD={request.method} PATH={request.url.path} "
+                f"STATUS={response.status_code} TIME={process_time:.4f}s"
+            )
+            return response
+
+    elif variant == "asgi":
+        app.add_middleware(RequestContextMiddleware, sample_rate=sample_rate)
+    return app
+
+
+async def call(app, scope):
+    sent = []
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        # The body once, then (like a server) a disconnect after the response.
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            finished.set()
+
+    start = time.perf_counter_ns()
+    await app(dict(scope), receive, send)
+    elapsed = time.perf_counter_ns() - start
+    assert sent[0]["status"] == 200
+    return elapsed
+
+
+async def run(app, requests: int, concurrency: int):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+    # Warm up routing, the middleware stack and the logger.
+    for _ in range(200):
+        await call(app, scope)
+
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            latencies.append(await call(app, scope))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    q = quantiles(latencies, n=100)
+    return {
+        "rps": round(requests / elapsed),
+        "us_per_request": round(elapsed / requests * 1e6, 1),
+        "latency_us_p50": round(q[49] / 1000, 1),
+        "latency_us_p99": round(q[98] / 1000, 1),
+    }
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, "w"))
+
+    results = {}
+    for variant in ("none", "http", "asgi"):
+        app = build_app(variant, args.sample_rate)
+        results[variant] = asyncio.run(run(app, args.requests, args.concurrency))
+
+    floor = results["none"]["us_per_request"]
+    print(f"{args.requests} requests, {args.concurrency} in flight")
+    for variant, stats in results.items():
+        stats["overhead_us"] = round(stats["us_per_request"] - floor, 1)
+        print(
+            f"{variant:<5} {stats['rps']:>7} req/s  {stats['us_per_request']:7.1f} us/req  "
+            f"(+{stats['overhead_us']:6.1f})  p50={stats['latency_us_p50']:8.1f}us  "
+            f"p99={stats['latency_us_p99']:8.1f}us"
+        )
+    if args.json_out:
+        with open(args.json_out, "w") as out:
+            json.dump({"args": vars(args), "results": results}, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""
+Load test of the v1 API with mixed, weighted workloads against a running stack.
+
+Each virtual user registers its own account and farm, then loops for
+`--duration` seconds picking weighted actions from the chosen scenario
+(Locust-style: closed loop, optional think time between actions):
+
+    login   login storm: repeated password logins (bcrypt-bound)
+    crud    list/create/update/delete farms, animals and crops
+    cache   weather and AI predictions; `--cache-hit-rate` of the calls reuse
+            a small pool of hot coordinates, the rest use fresh ones
+    tasks   background task submission (fair-share 429s are expected
+            and counted separately) and status polling
+    mixed   all of the above, weighted like everyday traffic
+
+Throughput and p50/p95/p99 latency are reported per route (path templates,
+so `/animals/{id}` is one row). `--output` stores the results as JSON with
+the git commit; `--compare` prints the change against an earlier file, so
+runs can be compared across commits. Run both against the same stack and
+settings: the numbers only mean something relative to each other.
+
+Usage (from backend/, with the stack up via docker-compose):
+    python scripts/loadtest.py --scenario mixed --users 50 --duration 60 \\
+        --output results/$(git rev-parse --short HEAD).json \\
+        --compare results/main.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from statistics import quantiles
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+API = "/api/v1"
+CROPS = ["Maize", "Wheat", "Sorghum", "Soybean", "Groundnut"]
+# Coordinates every cache-hitting call draws from; a few farming regions.
+HOT_COORDINATES = [(-17.82, 31.05), (-20.15, 28.58), (-18.97, 32.67), (-1.29, 36.82)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument(
+        "--scenario", choices=["mixed", "login", "crud", "cache", "tasks"], default="mixed"
+    )
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load after setup")
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="Mean seconds a user waits between actions (exponential)",
+    )
+    parser.add_argument(
+        "--cache-hit-rate",
+        type=float,
+        default=0.9,
+        help="Share of weather/prediction calls that reuse hot coordinates",
+    )
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed the action mix for repeatable runs"
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    return parser.parse_args()
+
+
+class Recorder:
+    """
+    Latencies and status codes per route. Timings cover the whole request,
+    connection included, as a client would see it.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.enabled = False
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, route: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        if self.enabled:
+            self.latencies[f"{method} {route}"].append(time.perf_counter() - start)
+            self.statuses[f"{method} {route}"][status] += 1
+        return response
+
+
+class VirtualUser:
+    def __init__(
+        self, index: int, args, recorder: Recorder, client: httpx.AsyncClient, rng: random.Random
+    ):
+        self.email = f"loadtest_{os.getpid()}_{time.time_ns()}_{index}@example.com"
+        self.args = args
+        self.recorder = recorder
+        self.client = client
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.farm_id: Optional[int] = None
+        self.animal_ids: List[int] = []
+        self.crop_ids: List[int] = []
+        self.task_ids: List[str] = []
+
+    async def call(self, method: str, route: str, url: Optional[str] = None, **kwargs):
+        return await self.recorder.request(
+            self.client, method, route, url or route, headers=self.headers, **kwargs
+        )
+
+    async def setup(self) -> None:
+        response = await self.client.post(
+            f"{API}/auth/register", json={"email": self.email, "password": self.args.password}
+        )
+        response.raise_for_status()
+        await self.login()
+        response = await self.client.post(
+            f"{API}/farms/", json={"name": f"Load test farm {self.email}"}, headers=self.headers
+        )
+        response.raise_for_status()
+        self.farm_id = response.json()["id"]
+
+    # --- actions -------------------------------------------------------
+
+    async def login(self) -> None:
+        response = await self.recorder.request(
+            self.client,
+            "POST",
+            f"{API}/auth/login",
+            f"{API}/auth/login",
+            data={"username": self.email, "password": self.args.password},
+        )
+        if response is not None and response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def list_farms(self) -> None:
+        await self.call("GET", f"{API}/farms/")
+
+    async def read_farm(self) -> None:
+        await self.call("GET", f"{API}/farms/{{id}}", f"{API}/farms/{self.farm_id}")
+
+    async def list_animals(self) -> None:
+        await self.call("GET", f"{API}/animals/", params={"limit": 50})
+
+    async def create_animal(self) -> None:
+        response = await self.call(
+            "POST",
+            f"{API}/animals/",
+            json={
+                "tag_number": f"LT-{self.rng.randrange(10**9)}",
+                "type": self.rng.choice(["Cow", "Goat", "Sheep"]),
+                "health_status": "Healthy",
+                "vaccination_status": "Up to Date",
+                "farm_id": self.farm_id,
+            },
+        )
+        if response is not None and response.status_code == 200:
+            self.animal_ids.append(response.json()["id"])
+
+    async def update_animal(self) -> None:
+        if not self.animal_ids:
+            return await self.create_animal()
+        animal_id = self.rng.choice(self.animal_ids)
+        await self.call(
+            "PUT",
+            f"{API}/animals/{{id}}",
+            f"{API}/animals/{animal_id}",
+            json={"health_status": self.rng.choice(["Healthy", "Sick", "Recovering"])},
+        )
+
+    async def delete_animal(self) -> None:
+        if not self.animal_ids:
+            return await self.create_animal()
+        animal_id = self.animal_ids.pop(self.rng.randrange(len(self.animal_ids)))
+        await self.call("DELETE", f"{API}/animals/{{id}}", f"{API}/animals/{animal_id}")
+
+    async def list_crops(self) -> None:
+        await self.call("GET", f"{API}/crops/", params={"limit": 50})
+
+    async def create_crop(self) -> None:
+        response = await self.call(
+            "POST",
+            f"{API}/crops/",
+            json={
+                "name": self.rng.choice(CROPS),
+                "planting_date": datetime.now(timezone.utc).isoformat(),
+                "farm_id": self.farm_id,
+            },
+        )
+        if response is not None and response.status_code == 200:
+            self.crop_ids.append(response.json()["id"])
+
+    def coordinates(self) -> Tuple[float, float]:
+        if self.rng.random() < self.args.cache_hit_rate:
+            return self.rng.choice(HOT_COORDINATES)
+        return round(self.rng.uniform(-60, 60), 4), round(self.rng.uniform(-180, 180), 4)
+
+    async def weather(self) -> None:
+        lat, lon = self.coordinates()
+        await self.call("GET", "/api/weather", params={"lat": lat, "lon": lon})
+
+    async def prediction(self) -> None:
+        lat, lon = self.coordinates()
+        await self.call(
+            "POST",
+            "/api/predictions/planting",
+            json={"crop_type": self.rng.choice(CROPS), "latitude": lat, "longitude": lon},
+        )
+
+    async def submit_prediction_task(self) -> None:
+        response = await self.call(
+            "POST", f"{API}/tasks/mock-prediction", params={"crop_type": self.rng.choice(CROPS)}
+        )
+        if response is not None and response.status_code == 200:
+            self.task_ids = [response.json()["task_id"], *self.task_ids[:9]]
+
+    async def submit_report_task(self) -> None:
+        await self.call(
+            "POST",
+            f"{API}/tasks/mock-report",
+            params={"report_type": f"Load test {self.rng.randrange(100)}"},
+        )
+
+    async def task_status(self) -> None:
+        if not self.task_ids:
+            return await self.submit_prediction_task()
+        task_id = self.rng.choice(self.task_ids)
+        await self.call("GET", f"{API}/tasks/{{id}}", f"{API}/tasks/{task_id}")
+
+    # --- loop ----------------------------------------------------------
+
+    async def run(self, actions: List[Callable], weights: List[int], deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await self.rng.choices(actions, weights)[0]()
+            if self.args.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time))
+
+
+# Action name -> weight, per scenario.
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    "login": {"login": 1},
+    "crud": {
+        "list_farms": 3,
+        "read_farm": 2,
+        "list_animals": 4,
+        "create_animal": 2,
+        "update_animal": 2,
+        "delete_animal": 1,
+        "list_crops": 3,
+        "create_crop": 1,
+    },
+    "cache": {"weather": 3, "prediction": 1},
+    "tasks": {"submit_prediction_task": 2, "submit_report_task": 1, "task_status": 4},
+    "mixed": {
+        "login": 1,
+        "list_farms": 6,
+        "read_farm": 3,
+        "list_animals": 8,
+        "create_animal": 2,
+        "update_animal": 2,
+        "delete_animal": 1,
+        "list_crops": 4,
+        "create_crop": 1,
+        "weather": 6,
+        "prediction": 2,
+        "submit_prediction_task": 1,
+        "task_status": 2,
+    },
+}
+
+
+def percentile_ms(cuts: List[float], p: int) -> float:
+    return round(cuts[p - 1] * 1000, 2)
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict]:
+    routes = {}
+    everything = []
+    for route in sorted(recorder.latencies):
+        latencies = recorder.latencies[route]
+        everything.extend(latencies)
+        routes[route] = _stats(latencies, recorder.statuses[route], elapsed)
+    total_statuses = sum(recorder.statuses.values(), Counter())
+    return {"routes": routes, "total": _stats(everything, total_statuses, elapsed)}
+
+
+def _stats(latencies: List[float], statuses: Counter, elapsed: float) -> Dict:
+    if len(latencies) > 1:
+        cuts = quantiles(latencies, n=100, method="inclusive")
+    else:
+        cuts = (latencies or [0.0]) * 99
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 2),
+        "errors": sum(n for status, n in statuses.items() if not status.startswith(("2", "4"))),
+        "statuses": dict(sorted(statuses.items())),
+        "p50_ms": percentile_ms(cuts, 50),
+        "p95_ms": percentile_ms(cuts, 95),
+        "p99_ms": percentile_ms(cuts, 99),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+    }
+
+
+def print_table(results: Dict, baseline: Optional[Dict]) -> None:
+    print(f"{'route':<40} {'req':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}  statuses")
+    rows = [*results["routes"].items(), ("TOTAL", results["total"])]
+    for route, stats in rows:
+        print(
+            f"{route:<40} {stats['requests']:>7} {stats['rps']:>8.1f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}  "
+            + " ".join(f"{status}={n}" for status, n in stats["statuses"].items())
+        )
+    if baseline is None:
+        return
+
+    print(f"\nChange against {baseline['meta']['commit']} ({baseline['meta']['started_at']}):")
+    for key in ("scenario", "users", "think_time", "cache_hit_rate", "base_url"):
+        before, after = baseline["meta"].get(key), results["meta"][key]
+        if before != after:
+            print(f"  warning: {key} differs ({before} -> {after})")
+    print(f"{'route':<40} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    before_routes = {**baseline["routes"], "TOTAL": baseline["total"]}
+    for route, stats in rows:
+        before = before_routes.get(route)
+        if before is None:
+            print(f"{route:<40} {'(new)':>8}")
+            continue
+        changes = [
+            _change(before[key], stats[key]) for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(f"{route:<40} " + " ".join(f"{change:>8}" for change in changes))
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "-"
+    return f"{(after - before) / before:+.0%}"
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main(args) -> Dict:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        users = [
+            VirtualUser(i, args, recorder, client, random.Random(rng.random()))
+            for i in range(args.users)
+        ]
+        # Registration hashes a password per user; keep it out of the numbers.
+        await asyncio.gather(*(user.setup() for user in users))
+
+        weights = SCENARIOS[args.scenario]
+        recorder.enabled = True
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                user.run(
+                    [getattr(user, name) for name in weights],
+                    list(weights.values()),
+                    start + args.duration,
+                )
+                for user in users
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "elapsed_s": round(elapsed, 2),
+            "base_url": args.base_url,
+            "scenario": args.scenario,
+            "users": args.users,
+            "think_time": args.think_time,
+            "cache_hit_rate": args.cache_hit_rate,
+            "seed": args.seed,
+        },
+        **summarize(recorder, elapsed),
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = asyncio.run(main(args))
+    meta = results["meta"]
+    print(
+        f"{meta['scenario']}: {meta['users']} users for {meta['elapsed_s']}s "
+        f"against {meta['base_url']} at {meta['commit']}\n"
+    )
+    print_table(results, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if results["total"]["errors"]:
+        sys.exit(1)
@@ -0,0 +1,13 @@
+-- Idempotency keys for bulk farm_records ingestion (see ingest.py).
+-- Apply with: psql "$DATABASE_URL" -f sql/001_farm_record_keys.sql
+-- Keys older than FARM_RECORD_KEY_RETENTION_DAYS are purged daily by the
+-- purge_farm_record_keys task, through the created_at index.
+
+CREATE TABLE IF NOT EXISTS farm_record_keys (
+    idempotency_key text PRIMARY KEY,
+    record_id integer NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_farm_record_keys_created_at
+    ON farm_record_keys (created_at);
@@ -0,0 +1,82 @@
+-- Monthly range partitioning for farm_records.
+-- Apply with: psql "$DATABASE_URL" -f sql/002_partition_farm_records.sql
+--
+-- Rebuilds farm_records as a table partitioned by month on `date`, copies
+-- the existing rows across and keeps the id sequence. Partitions are
+-- created ahead of time by farm_records_create_partitions(), which the
+-- `maintain_farm_record_partitions` Celery beat task calls daily; rows
+-- outside every monthly partition land in farm_records_default and are
+-- moved out when their month's partition is created.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION farm_records_create_partitions(from_month date, to_month date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', from_month)::date;
+    month_end date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE month_start <= to_month LOOP
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := format('farm_records_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Build the partition detached so rows already sitting in the
+            -- default partition for this month can be moved into it.
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE farm_records INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM farm_records_default WHERE date >= %L AND date < %L RETURNING *)
+                 INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE farm_records ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+LOCK TABLE farm_records IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE farm_records RENAME TO farm_records_unpartitioned;
+ALTER INDEX IF EXISTS farm_records_pkey RENAME TO farm_records_unpartitioned_pkey;
+
+CREATE TABLE farm_records (
+    id integer NOT NULL DEFAULT nextval('farm_records_id_seq'),
+    worker_id integer NOT NULL REFERENCES workers (id),
+    activity text NOT NULL,
+    date date NOT NULL DEFAULT CURRENT_DATE,
+    -- The partition key has to be part of every unique constraint.
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+CREATE TABLE farm_records_default PARTITION OF farm_records DEFAULT;
+
+-- Range API access paths; each is created on every partition.
+CREATE INDEX ix_farm_records_worker_id_date ON farm_records (worker_id, date);
+CREATE INDEX ix_farm_records_activity_date ON farm_records (activity, date);
+CREATE INDEX ix_farm_records_date_id ON farm_records (date, id);
+
+SELECT farm_records_create_partitions(
+    COALESCE(min(date), CURRENT_DATE),
+    (CURRENT_DATE + interval '3 months')::date
+)
+FROM farm_records_unpartitioned;
+
+INSERT INTO farm_records (id, worker_id, activity, date)
+SELECT id, worker_id, activity, date FROM farm_records_unpartitioned;
+
+ALTER SEQUENCE farm_records_id_seq OWNED BY farm_records.id;
+DROP TABLE farm_records_unpartitioned;
+
+COMMIT;
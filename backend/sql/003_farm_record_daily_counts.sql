@@ -0,0 +1,79 @@
+-- Activities per worker per day, maintained incrementally by triggers.
+-- Apply with: psql "$DATABASE_URL" -f sql/003_farm_record_daily_counts.sql
+--
+-- Statement-level triggers with transition tables apply one grouped delta
+-- per INSERT/UPDATE/DELETE statement, so a 2,000-row COPY batch from
+-- ingest.py costs a single upsert per (worker, day, activity) rather than
+-- 2,000 row triggers. Rows moved between partitions by
+-- farm_records_create_partitions() go through the partitions directly and
+-- leave the counts untouched, which is correct since the totals don't change.
+-- Served by GET /api/v1/stats/worker-activity.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS farm_record_daily_counts (
+    worker_id integer NOT NULL,
+    date date NOT NULL,
+    activity text NOT NULL,
+    count integer NOT NULL,
+    PRIMARY KEY (worker_id, date, activity)
+);
+
+CREATE INDEX IF NOT EXISTS ix_farm_record_daily_counts_date
+    ON farm_record_daily_counts (date);
+
+CREATE OR REPLACE FUNCTION farm_record_daily_counts_apply()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO farm_record_daily_counts AS c (worker_id, date, activity, count)
+        SELECT worker_id, date, activity, -count(*) FROM old_rows
+        GROUP BY worker_id, date, activity
+        ON CONFLICT (worker_id, date, activity)
+        DO UPDATE SET count = c.count + EXCLUDED.count;
+
+        DELETE FROM farm_record_daily_counts c
+        USING (SELECT DISTINCT worker_id, date, activity FROM old_rows) o
+        WHERE c.worker_id = o.worker_id AND c.date = o.date
+          AND c.activity = o.activity AND c.count <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO farm_record_daily_counts AS c (worker_id, date, activity, count)
+        SELECT worker_id, date, activity, count(*) FROM new_rows
+        GROUP BY worker_id, date, activity
+        ON CONFLICT (worker_id, date, activity)
+        DO UPDATE SET count = c.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS farm_record_daily_counts_insert ON farm_records;
+CREATE TRIGGER farm_record_daily_counts_insert
+    AFTER INSERT ON farm_records
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION farm_record_daily_counts_apply();
+
+DROP TRIGGER IF EXISTS farm_record_daily_counts_update ON farm_records;
+CREATE TRIGGER farm_record_daily_counts_update
+    AFTER UPDATE ON farm_records
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION farm_record_daily_counts_apply();
+
+DROP TRIGGER IF EXISTS farm_record_daily_counts_delete ON farm_records;
+CREATE TRIGGER farm_record_daily_counts_delete
+    AFTER DELETE ON farm_records
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION farm_record_daily_counts_apply();
+
+-- Backfill under a lock that blocks writers, so no delta is missed or
+-- counted twice.
+LOCK TABLE farm_records IN SHARE MODE;
+TRUNCATE farm_record_daily_counts;
+INSERT INTO farm_record_daily_counts (worker_id, date, activity, count)
+SELECT worker_id, date, activity, count(*) FROM farm_records
+GROUP BY worker_id, date, activity;
+
+COMMIT;
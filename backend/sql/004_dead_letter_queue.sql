@@ -0,0 +1,35 @@
+-- Deduplicated dead-letter queue and the superuser flag guarding its API.
+-- Apply with: psql "$DATABASE_URL" -f sql/004_dead_letter_queue.sql
+--
+-- failed_tasks now holds one row per distinct failure, keyed by a
+-- fingerprint of task name, arguments and exception; dead_letter_service
+-- upserts into it in batches and adds repeats to `occurrences`. Rows from
+-- the old one-row-per-failure table get the fingerprint
+-- 'legacy:' || id so they stay unique; they can't be replayed, since
+-- the task name wasn't recorded.
+
+BEGIN;
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS is_superuser boolean NOT NULL DEFAULT false;
+
+ALTER TABLE failed_tasks
+    ADD COLUMN IF NOT EXISTS task_name text,
+    ADD COLUMN IF NOT EXISTS fingerprint text,
+    ADD COLUMN IF NOT EXISTS occurrences integer NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS last_failed_at timestamptz DEFAULT now(),
+    ADD COLUMN IF NOT EXISTS replayed_at timestamptz;
+
+UPDATE failed_tasks
+SET task_name = coalesce(task_name, ''),
+    fingerprint = coalesce(fingerprint, 'legacy:' || id),
+    last_failed_at = coalesce(last_failed_at, created_at);
+
+ALTER TABLE failed_tasks
+    ALTER COLUMN task_name SET NOT NULL,
+    ALTER COLUMN fingerprint SET NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_failed_tasks_fingerprint
+    ON failed_tasks (fingerprint);
+
+COMMIT;
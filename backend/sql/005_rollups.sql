@@ -0,0 +1,103 @@
+-- Dashboard rollup tables and the updated_at columns they are refreshed from
+-- (see app/services/rollup_service.py).
+-- Apply with: psql "$DATABASE_URL" -f sql/005_rollups.sql
+--
+-- A refresh recomputes the farms whose animals or crops changed since its
+-- watermark, found through the updated_at indexes. crops had no updated_at
+-- and animals only set it on update; existing rows get their creation time
+-- (crops: the migration time), so the first refresh, which rebuilds every
+-- farm anyway, is the only one that sees them.
+--
+-- A row moved to another farm, or deleted outright, leaves no trace in
+-- updated_at on the farm it left. Statement-level triggers record those
+-- farms in rollup_stale_farms, which the next refresh of that rollup
+-- consumes.
+
+BEGIN;
+
+ALTER TABLE crops
+    ADD COLUMN IF NOT EXISTS updated_at timestamptz DEFAULT now();
+
+ALTER TABLE animals
+    ALTER COLUMN updated_at SET DEFAULT now();
+
+UPDATE animals SET updated_at = created_at WHERE updated_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_animals_updated_at ON animals (updated_at);
+CREATE INDEX IF NOT EXISTS ix_crops_updated_at ON crops (updated_at);
+
+CREATE TABLE IF NOT EXISTS animal_status_summaries (
+    id serial PRIMARY KEY,
+    farm_id integer NOT NULL REFERENCES farms (id),
+    health_status varchar NOT NULL,
+    vaccination_status varchar NOT NULL,
+    count integer NOT NULL,
+    UNIQUE (farm_id, health_status, vaccination_status)
+);
+
+CREATE TABLE IF NOT EXISTS crop_summaries (
+    id serial PRIMARY KEY,
+    farm_id integer NOT NULL REFERENCES farms (id),
+    name varchar NOT NULL,
+    planted integer NOT NULL,
+    harvested integer NOT NULL,
+    UNIQUE (farm_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name varchar PRIMARY KEY,
+    refreshed_at timestamptz NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollup_stale_farms (
+    rollup varchar NOT NULL,
+    farm_id integer NOT NULL,
+    PRIMARY KEY (rollup, farm_id)
+);
+
+-- TG_ARGV[0] is the rollup the table feeds.
+CREATE OR REPLACE FUNCTION rollup_mark_stale_farms()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        INSERT INTO rollup_stale_farms (rollup, farm_id)
+        SELECT DISTINCT TG_ARGV[0], o.farm_id
+        FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE n.farm_id <> o.farm_id
+        ON CONFLICT DO NOTHING;
+    ELSE
+        INSERT INTO rollup_stale_farms (rollup, farm_id)
+        SELECT DISTINCT TG_ARGV[0], farm_id FROM old_rows
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS animals_rollup_stale_update ON animals;
+CREATE TRIGGER animals_rollup_stale_update
+    AFTER UPDATE ON animals
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_mark_stale_farms('animal_status');
+
+DROP TRIGGER IF EXISTS animals_rollup_stale_delete ON animals;
+CREATE TRIGGER animals_rollup_stale_delete
+    AFTER DELETE ON animals
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_mark_stale_farms('animal_status');
+
+DROP TRIGGER IF EXISTS crops_rollup_stale_update ON crops;
+CREATE TRIGGER crops_rollup_stale_update
+    AFTER UPDATE ON crops
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_mark_stale_farms('crops');
+
+DROP TRIGGER IF EXISTS crops_rollup_stale_delete ON crops;
+CREATE TRIGGER crops_rollup_stale_delete
+    AFTER DELETE ON crops
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_mark_stale_farms('crops');
+
+COMMIT;
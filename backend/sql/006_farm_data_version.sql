@@ -0,0 +1,10 @@
+-- Per-farm data version keying report artifacts (see report_service.fingerprint).
+-- Apply with: psql "$DATABASE_URL" -f sql/006_farm_data_version.sql
+--
+-- Bumped by the API in the same transaction as every write to a farm's
+-- animals or crops, so it moves with each commit; updated_at can't be used,
+-- since now() is the transaction's start time and a long transaction can
+-- commit a change stamped before one already seen.
+
+ALTER TABLE farms
+    ADD COLUMN IF NOT EXISTS data_version integer NOT NULL DEFAULT 0;
@@ -0,0 +1,109 @@
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+# Settings are read when app modules are imported; give them a local setup.
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("OPENWEATHER_API_KEY", "test-openweather-key")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
+os.environ.setdefault("LOG_FORMAT", "text")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh in-memory SQLite database with every table."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+
+@pytest.fixture
+def redis_server():
+    """One in-process Redis server for the fake clients of a test."""
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def fake_redis(redis_server):
+    """An in-process stand-in for the shared Redis client."""
+    import fakeredis
+
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+
+
+@pytest.fixture
+def fake_async_redis(redis_server):
+    """Async client on the same fake server as `fake_redis`."""
+    from fakeredis import aioredis
+
+    return aioredis.FakeRedis(server=redis_server, decode_responses=True)
+
+
+@dataclass
+class PostgresSchema:
+    """A scratch schema on the TEST_DATABASE_URL server."""
+
+    url: str
+    conninfo: str
+    schema: str
+
+    @property
+    def options(self) -> str:
+        """libpq `options` putting the schema first on the search path."""
+        return f"-c search_path={self.schema}"
+
+    def connect(self):
+        import psycopg
+
+        return psycopg.connect(self.conninfo, options=self.options, autocommit=True)
+
+    def run(self, *scripts: str) -> None:
+        """Execute SQL scripts, or migrations from sql/ given by file name."""
+        with self.connect() as conn:
+            for script in scripts:
+                if script.endswith(".sql"):
+                    script = (SQL_DIR / script).read_text()
+                conn.execute(script)
+
+
+@pytest.fixture
+def postgres():
+    """
+    A fresh schema on the Postgres server at TEST_DATABASE_URL (a
+    SQLAlchemy URL, e.g. postgresql+psycopg://postgres@/postgres?host=/tmp/pg),
+    dropped afterwards. Tests using it are skipped when it is unset.
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    psycopg = pytest.importorskip("psycopg")
+    conninfo = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(conninfo, autocommit=True) as conn:
+        conn.execute(f"CREATE SCHEMA {schema}")
+    try:
+        yield PostgresSchema(url, conninfo, schema)
+    finally:
+        with psycopg.connect(conninfo, autocommit=True) as conn:
+            conn.execute(f"DROP SCHEMA {schema} CASCADE")
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from app.services.analytics_service import (
+    ANIMAL_COLUMNS,
+    CROP_COLUMNS,
+    TREND_MONTHS,
+    VACCINATED,
+    _frame,
+    analyze,
+)
+
+
+def _animals(rows):
+    return _frame(rows, ANIMAL_COLUMNS, ["created_at"])
+
+
+def _crops(rows):
+    return _frame(rows, CROP_COLUMNS, ["planting_date", "harvest_date"])
+
+
+def test_empty_frames_give_an_empty_report_per_farm():
+    reports = analyze(_animals([]), _crops([]), [1, 2])
+    assert sorted(reports) == [1, 2]
+    report = reports[1]
+    assert report["animals"] == {
+        "total": 0,
+        "by_type": {},
+        "health": {"counts": {}, "share": {}},
+        "vaccination": {"counts": {}, "coverage": None},
+    }
+    assert report["crops"] == {"total": 0, "harvested": 0, "cycle_days": {}}
+    assert len(report["trends"]["months"]) == TREND_MONTHS
+    assert report["trends"]["animals_added"] == [0] * TREND_MONTHS
+    assert report["trends"]["crops_planted"] == [0] * TREND_MONTHS
+    assert report["trends"]["animals_added_slope"] == 0
+
+
+def test_no_farms():
+    assert analyze(_animals([]), _crops([]), []) == {}
+
+
+def test_sparse_frames():
+    now = datetime.now()
+    animals = _animals(
+        [
+            (1, "Cow", "Healthy", VACCINATED, now),
+            (1, "Cow", "Sick", "Overdue", now),
+            (1, "Goat", "Healthy", VACCINATED, now - timedelta(days=400)),
+        ]
+    )
+    crops = _crops(
+        [
+            (1, "Maize", now - timedelta(days=100), now - timedelta(days=10)),
+            (1, "Maize", now - timedelta(days=20), None),
+        ]
+    )
+    reports = analyze(animals, crops, [1, 2])
+
+    herd = reports[1]["animals"]
+    assert herd["total"] == 3
+    assert herd["by_type"] == {"Cow": 2, "Goat": 1}
+    assert herd["health"]["counts"] == {"Healthy": 2, "Sick": 1}
+    assert herd["health"]["share"] == {"Healthy": 0.67, "Sick": 0.33}
+    assert herd["vaccination"] == {
+        "counts": {"Overdue": 1, VACCINATED: 2},
+        "coverage": 0.67,
+    }
+
+    fields = reports[1]["crops"]
+    assert (fields["total"], fields["harvested"]) == (2, 1)
+    assert fields["cycle_days"]["Maize"]["count"] == 1
+    assert fields["cycle_days"]["Maize"]["mean"] == 90
+
+    # The animal added over a year ago falls outside the trend window.
+    trends = reports[1]["trends"]
+    assert sum(trends["animals_added"]) == 2
+    assert trends["animals_added"][-1] == 2
+    assert sum(trends["crops_planted"]) == 2
+
+    # A farm with no rows still gets a report, with zero counts.
+    empty = reports[2]
+    assert empty["animals"]["total"] == 0
+    assert empty["animals"]["by_type"] == {}
+    assert empty["animals"]["vaccination"]["coverage"] is None
+    assert empty["crops"]["cycle_days"] == {}
+    assert empty["trends"]["animals_added"] == [0] * TREND_MONTHS
+
+
+def test_naive_and_aware_dates_are_compared_alike():
+    aware = pd.Timestamp.now(tz="UTC").to_pydatetime()
+    animals = _animals([(1, "Cow", "Healthy", VACCINATED, aware)])
+    reports = analyze(animals, _crops([]), [1])
+    assert reports[1]["trends"]["animals_added"][-1] == 1
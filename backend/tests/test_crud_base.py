@@ -0,0 +1,70 @@
+from app import crud, models
+from app.schemas.farm import FarmCreate
+
+OWNER = "owner-1"
+
+
+def _farms(db, count):
+    return crud.farm.create_multi(
+        db, objs_in=[FarmCreate(name=f"farm {n}") for n in range(count)], owner_id=OWNER
+    )
+
+
+def test_create_multi_returns_created_rows(db):
+    farms = _farms(db, 3)
+    assert [farm.name for farm in farms] == ["farm 0", "farm 1", "farm 2"]
+    assert all(farm.id and farm.owner_id == OWNER for farm in farms)
+    assert db.query(models.Farm).count() == 3
+
+
+def test_create_multi_with_nothing_to_insert(db):
+    assert crud.farm.create_multi(db, objs_in=[]) == []
+
+
+def test_get_multi_pages_by_id(db):
+    ids = [farm.id for farm in _farms(db, 5)]
+    first = crud.farm.get_multi(db, limit=2)
+    assert [farm.id for farm in first] == ids[:2]
+    second = crud.farm.get_multi(db, limit=2, after_id=first[-1].id)
+    assert [farm.id for farm in second] == ids[2:4]
+    last = crud.farm.get_multi(db, limit=2, after_id=second[-1].id)
+    assert [farm.id for farm in last] == ids[4:]
+    assert crud.farm.get_multi(db, limit=2, after_id=ids[-1]) == []
+
+
+def test_get_multi_after_id_ignores_skip(db):
+    ids = [farm.id for farm in _farms(db, 4)]
+    page = crud.farm.get_multi(db, skip=3, limit=10, after_id=ids[0])
+    assert [farm.id for farm in page] == ids[1:]
+
+
+def test_get_multi_projects_columns(db):
+    _farms(db, 2)
+    rows = crud.farm.get_multi(db, columns=[models.Farm.id, models.Farm.name])
+    assert rows == [{"id": rows[0]["id"], "name": "farm 0"}, {"id": rows[1]["id"], "name": "farm 1"}]
+
+
+def test_remove_multi_soft_deletes(db):
+    ids = [farm.id for farm in _farms(db, 3)]
+    assert crud.farm.remove_multi(db, ids=ids[:2]) == 2
+    assert [farm.id for farm in crud.farm.get_multi(db)] == ids[2:]
+    removed = db.get(models.Farm, ids[0])
+    db.refresh(removed)
+    assert removed.is_deleted and removed.deleted_at is not None
+
+
+def test_remove_multi_skips_rows_already_deleted(db):
+    ids = [farm.id for farm in _farms(db, 2)]
+    crud.farm.remove_multi(db, ids=[ids[0]])
+    assert crud.farm.remove_multi(db, ids=ids) == 1
+
+
+def test_remove_multi_hard_deletes_without_soft_delete_columns(db):
+    rows = [
+        models.CropSummary(farm_id=1, name=name, planted=1, harvested=0)
+        for name in ("Maize", "Beans", "Rice")
+    ]
+    db.add_all(rows)
+    db.flush()
+    assert crud.crop_summary.remove_multi(db, ids=[rows[0].id, rows[1].id]) == 2
+    assert [row.name for row in crud.crop_summary.get_multi(db)] == ["Rice"]
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import models
+from app.services import dead_letter_service
+
+
+@pytest.fixture
+def dlq_redis(fake_redis, monkeypatch):
+    monkeypatch.setattr(dead_letter_service, "redis_client", fake_redis)
+    return fake_redis
+
+
+def _fail(task_id, exception=ValueError("boom"), args=(1,)):
+    dead_letter_service.record_failure(
+        task_id=task_id,
+        task_name="app.tasks.example",
+        args=list(args),
+        kwargs={},
+        exception=exception,
+    )
+
+
+def test_flush_with_empty_buffer(db, dlq_redis):
+    assert dead_letter_service.flush(db) == 0
+    assert db.query(models.FailedTask).count() == 0
+
+
+def test_flush_collapses_identical_failures(db, dlq_redis):
+    _fail("t1")
+    _fail("t2")
+    _fail("t3", args=(2,))
+    assert dead_letter_service.flush(db) == 2
+
+    rows = {row.payload: row for row in db.query(models.FailedTask)}
+    assert rows['{"args": [1], "kwargs": {}}'].occurrences == 2
+    assert rows['{"args": [2], "kwargs": {}}'].occurrences == 1
+    assert rows['{"args": [1], "kwargs": {}}'].exception == "ValueError: boom"
+    assert not dlq_redis.keys("dlq:*")
+
+
+def test_flush_adds_to_rows_already_dead_lettered(db, dlq_redis):
+    _fail("t1")
+    dead_letter_service.flush(db)
+    _fail("t2")
+    _fail("t3")
+    assert dead_letter_service.flush(db) == 1
+
+    row = db.query(models.FailedTask).one()
+    db.refresh(row)
+    assert row.occurrences == 3
+    assert row.task_id == "t3"
+
+
+def test_flush_resumes_an_interrupted_flush(db, dlq_redis):
+    _fail("t1")
+    assert dead_letter_service._claim_buffer()
+    # Failures recorded after the crash wait for the following flush.
+    _fail("t2", args=(2,))
+    assert dead_letter_service.flush(db) == 1
+    assert dead_letter_service.flush(db) == 1
+    assert db.query(models.FailedTask).count() == 2
+
+
+def test_flush_skips_while_another_holds_the_lock(db, dlq_redis):
+    _fail("t1")
+    lock = dlq_redis.lock(dead_letter_service._FLUSH_LOCK, timeout=5)
+    assert lock.acquire(blocking=False)
+    try:
+        assert dead_letter_service.flush(db) == 0
+    finally:
+        lock.release()
+    assert dead_letter_service.flush(db) == 1
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    countdowns = []
+
+    def send_task(name, args, kwargs, countdown):
+        countdowns.append(countdown)
+        return SimpleNamespace(id=f"task-{len(countdowns)}")
+
+    monkeypatch.setattr(dead_letter_service.celery_app, "send_task", send_task)
+    monkeypatch.setattr(dead_letter_service.time, "time", lambda: 1000.0)
+    return countdowns
+
+
+def _failures(count):
+    return [
+        models.FailedTask(
+            id=i, task_name="app.tasks.example", payload='{"args": [], "kwargs": {}}'
+        )
+        for i in range(count)
+    ]
+
+
+def test_replay_spreads_tasks_at_rate(dlq_redis, sent):
+    replayed = dead_letter_service.replay(_failures(3), rate=2)
+    assert sent == [0.0, 0.5, 1.0]
+    assert [r["task_id"] for r in replayed] == ["task-1", "task-2", "task-3"]
+
+
+def test_replays_queue_behind_each_other(dlq_redis, sent):
+    dead_letter_service.replay(_failures(3), rate=2)
+    dead_letter_service.replay(_failures(2), rate=2)
+    assert sent == [0.0, 0.5, 1.0, 1.5, 2.0]
+    assert float(dlq_redis.get(dead_letter_service._REPLAY_NEXT_SLOT)) == 1002.5
+
+
+def test_replay_schedule_restarts_once_slots_pass(dlq_redis, sent, monkeypatch):
+    dead_letter_service.replay(_failures(2), rate=1)
+    monkeypatch.setattr(dead_letter_service.time, "time", lambda: 1010.0)
+    dead_letter_service.replay(_failures(1), rate=1)
+    assert sent == [0.0, 1.0, 0.0]
+
+
+def test_replay_of_nothing_reserves_no_slots(dlq_redis, sent):
+    assert dead_letter_service.replay([], rate=1) == []
+    assert not dlq_redis.exists(dead_letter_service._REPLAY_NEXT_SLOT)
@@ -0,0 +1,159 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import fair_share
+
+
+class FakeTask:
+    def __init__(self, name, sent):
+        self.name = name
+        self.sent = sent
+
+    def apply_async(self, args, kwargs, task_id, priority=None):
+        self.sent.append((self.name, task_id, priority))
+
+
+@pytest.fixture
+def share(fake_redis, monkeypatch):
+    """fair_share on fakeredis, with a clock the test moves by hand."""
+    monkeypatch.setattr(fair_share, "redis_client", fake_redis)
+    for name in ("_ADMIT", "_RELEASE"):
+        script = fake_redis.register_script(getattr(fair_share, name).script)
+        monkeypatch.setattr(fair_share, name, script)
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(fair_share, "time", SimpleNamespace(time=lambda: clock.now))
+
+    sent, published = [], []
+    tasks = {name: FakeTask(name, sent) for name in fair_share.LANES}
+    monkeypatch.setattr(fair_share, "celery_app", SimpleNamespace(tasks=tasks))
+    monkeypatch.setattr(
+        fair_share.task_events, "publish", lambda *event: published.append(event)
+    )
+    return SimpleNamespace(
+        redis=fake_redis, clock=clock, sent=sent, published=published, tasks=tasks
+    )
+
+
+def _submit(share, user_id="u1", task="generate_report_task", task_id=None):
+    return fair_share.submit(share.tasks[task], [], user_id, task_id=task_id)
+
+
+def _sent_ids(share):
+    return [task_id for _, task_id, _ in share.sent]
+
+
+def test_holds_submissions_past_the_running_cap(share):
+    ids = [_submit(share, task_id=f"t{i}") for i in range(3)]
+    assert _sent_ids(share) == ids[:2]
+    assert share.published == [("t2", "PENDING", {"held": 1})]
+    assert share.redis.sismember("fair_share:batch:waiting", "u1")
+
+
+def test_cap_is_per_user(share):
+    _submit(share, task_id="a1")
+    _submit(share, task_id="a2")
+    _submit(share, user_id="u2", task_id="b1")
+    assert _sent_ids(share) == ["a1", "a2", "b1"]
+
+
+def test_release_sends_the_next_held_task(share):
+    for i in range(4):
+        _submit(share, task_id=f"t{i}")
+    fair_share.release("t0")
+    assert _sent_ids(share) == ["t0", "t1", "t2"]
+    # The promoted task frees its own slot when it finishes.
+    fair_share.release("t2")
+    assert _sent_ids(share) == ["t0", "t1", "t2", "t3"]
+    assert not share.redis.sismember("fair_share:batch:waiting", "u1")
+
+
+def test_release_of_a_task_not_submitted_here(share):
+    fair_share.release("beat-task")
+    assert share.sent == []
+
+
+def test_lanes_send_at_their_priority(share):
+    _submit(share, task="generate_report_task", task_id="report")
+    _submit(share, task="ai_prediction_task", task_id="prediction")
+    assert share.sent == [
+        ("generate_report_task", "report", 6),
+        ("ai_prediction_task", "prediction", 0),
+    ]
+
+
+def test_tasks_without_a_lane_go_straight_to_the_broker(share):
+    task = FakeTask("send_email_task", share.sent)
+    fair_share.submit(task, [], "u1", task_id="mail")
+    assert share.sent == [("send_email_task", "mail", None)]
+    assert share.redis.keys("fair_share:*") == []
+
+
+def test_bucket_empties_and_refills(share):
+    lane = fair_share.LANES["generate_report_task"]
+    for _ in range(lane.rate_per_minute):
+        _submit(share)
+    with pytest.raises(fair_share.RateLimited) as raised:
+        _submit(share)
+    # One token takes 60 / rate_per_minute seconds to come back.
+    assert raised.value.retry_after == 60 // lane.rate_per_minute
+
+    share.clock.now += 60 / lane.rate_per_minute
+    _submit(share)
+    with pytest.raises(fair_share.RateLimited):
+        _submit(share)
+
+
+def test_buckets_are_per_user(share):
+    lane = fair_share.LANES["generate_report_task"]
+    for _ in range(lane.rate_per_minute):
+        _submit(share)
+    _submit(share, user_id="u2", task_id="other")
+    assert "other" in _sent_ids(share)
+
+
+def test_pump_sends_held_tasks_once_lost_slots_lapse(share):
+    for i in range(3):
+        _submit(share, task_id=f"t{i}")
+    fair_share.pump()
+    assert _sent_ids(share) == ["t0", "t1"]
+
+    # t0 and t1 never report back.
+    share.clock.now += fair_share.SLOT_LEASE + 1
+    fair_share.pump()
+    assert _sent_ids(share) == ["t0", "t1", "t2"]
+    assert json.loads(share.redis.get("fair_share:task:t2")) == ["batch", "u1"]
+    assert not share.redis.sismember("fair_share:batch:waiting", "u1")
+
+
+def test_pump_renews_the_lease_of_held_tasks(share):
+    for i in range(3):
+        _submit(share, task_id=f"t{i}")
+    held = "fair_share:batch:held:u1"
+    share.redis.expire(held, 5)
+    fair_share.pump()
+    assert share.redis.ttl(held) > 5
+    assert share.redis.llen(held) == 1
+
+
+def test_rate_limited_answers_429(share):
+    from app.main import rate_limited_handler
+
+    app = FastAPI()
+    app.add_exception_handler(fair_share.RateLimited, rate_limited_handler)
+
+    @app.post("/reports")
+    def create_report():
+        _submit(share)
+
+    lane = fair_share.LANES["generate_report_task"]
+    client = TestClient(app)
+    for _ in range(lane.rate_per_minute):
+        assert client.post("/reports").status_code == 200
+    response = client.post("/reports")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(60 // lane.rate_per_minute)
+    assert "batch" in response.json()["detail"]
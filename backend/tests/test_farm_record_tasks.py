@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import DateTime, bindparam, text
+
+from app import tasks
+
+_INSERT_KEY = text(
+    "INSERT INTO farm_record_keys (idempotency_key, record_id, created_at) "
+    "VALUES (:key, 1, :created_at)"
+).bindparams(bindparam("created_at", type_=DateTime(timezone=True)))
+
+
+class _Session:
+    """Hands the test's session to a task and keeps it open afterwards."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _keys(db):
+    return sorted(db.execute(text("SELECT idempotency_key FROM farm_record_keys")).scalars())
+
+
+def test_purge_deletes_keys_past_retention_in_batches(db, monkeypatch):
+    db.execute(
+        text(
+            "CREATE TABLE farm_record_keys ("
+            "idempotency_key text PRIMARY KEY, record_id integer NOT NULL, "
+            "created_at timestamp NOT NULL)"
+        )
+    )
+    now = datetime.now(timezone.utc)
+    days = tasks.get_settings().farm_record_key_retention_days
+    for n, age in enumerate([days + 1, days + 2, days + 30, days - 1, 0]):
+        db.execute(_INSERT_KEY, {"key": f"k{n}", "created_at": now - timedelta(days=age)})
+    db.commit()
+    monkeypatch.setattr(tasks, "SessionLocal", _Session(db))
+    monkeypatch.setattr(tasks, "FARM_RECORD_KEY_PURGE_BATCH", 2)
+
+    assert tasks.purge_farm_record_keys() == {"purged": 3}
+    assert _keys(db) == ["k3", "k4"]
+    assert tasks.purge_farm_record_keys() == {"purged": 0}
+
+
+def test_partition_maintenance_calls_the_migration_function(monkeypatch):
+    calls = []
+
+    class Result:
+        def scalar_one(self):
+            return 2
+
+    class Session:
+        def execute(self, statement, params):
+            calls.append((str(statement), params))
+            return Result()
+
+        def commit(self):
+            calls.append("commit")
+
+    monkeypatch.setattr(tasks, "SessionLocal", _Session(Session()))
+    assert tasks.maintain_farm_record_partitions() == {"created": 2}
+    (statement, params), commit = calls
+    assert statement.startswith("SELECT farm_records_create_partitions(CURRENT_DATE,")
+    assert "make_interval(months => :months)" in statement
+    assert params == {"months": tasks.get_settings().farm_records_partition_months_ahead}
+    assert commit == "commit"
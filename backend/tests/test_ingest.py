@@ -0,0 +1,158 @@
+import asyncio
+
+import psycopg
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import ingest
+from routers import farm_records
+
+# The Farm Records tables as the legacy backend has them before sql/.
+LEGACY_SCHEMA = """
+CREATE TABLE workers (id serial PRIMARY KEY, name text UNIQUE NOT NULL, role text NOT NULL);
+CREATE TABLE farm_records (
+    id serial PRIMARY KEY,
+    worker_id integer NOT NULL REFERENCES workers (id),
+    activity text NOT NULL,
+    date date NOT NULL DEFAULT CURRENT_DATE
+);
+INSERT INTO workers (name, role) VALUES ('w', 'hand');
+"""
+
+
+@pytest.fixture
+def farm_db(postgres):
+    postgres.run(
+        LEGACY_SCHEMA,
+        "001_farm_record_keys.sql",
+        "002_partition_farm_records.sql",
+        "003_farm_record_daily_counts.sql",
+    )
+    return postgres
+
+
+def _copy(farm_db, records):
+    async def run():
+        async with await psycopg.AsyncConnection.connect(
+            farm_db.conninfo, options=farm_db.options
+        ) as conn:
+            async with conn.cursor() as cursor:
+                results = await ingest.copy_farm_records(cursor, records)
+            await conn.commit()
+            return results
+
+    return asyncio.run(run())
+
+
+def _count(farm_db, table="farm_records"):
+    with farm_db.connect() as conn:
+        return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+
+def test_rows_without_keys_are_all_inserted(farm_db):
+    results = _copy(farm_db, [(None, 1, "milk", None), (None, 1, "milk", None)])
+    assert [created for _, created in results] == [True, True]
+    assert results[0][0] != results[1][0]
+    assert _count(farm_db) == 2
+    assert _count(farm_db, "farm_record_keys") == 0
+
+
+def test_replayed_keys_return_the_original_ids(farm_db):
+    batch = [("batch:k:0", 1, "milk", None), ("batch:k:1", 1, "feed", None)]
+    first = _copy(farm_db, batch)
+    assert [created for _, created in first] == [True, True]
+    again = _copy(farm_db, batch)
+    assert again == [(record_id, False) for record_id, _ in first]
+    assert _count(farm_db) == 2
+
+
+def test_partial_conflicts_in_one_batch(farm_db):
+    (old_id, _), = _copy(farm_db, [("sync:d:a", 1, "milk", None)])
+    results = _copy(
+        farm_db,
+        [
+            ("sync:d:a", 1, "milk", None),  # stored by an earlier sync
+            ("sync:d:b", 1, "feed", None),  # new
+            ("sync:d:b", 1, "feed", None),  # repeated within the batch
+            (None, 1, "clean", None),
+        ],
+    )
+    assert results[0] == (old_id, False)
+    assert results[1][1] is True
+    assert results[2] == (results[1][0], False)
+    assert results[3][1] is True
+    assert _count(farm_db) == 3
+
+
+def test_unknown_worker_rolls_back_the_batch(farm_db):
+    with pytest.raises(psycopg.errors.ForeignKeyViolation):
+        _copy(farm_db, [("batch:x:0", 1, "milk", None), ("batch:x:1", 99, "milk", None)])
+    assert _count(farm_db) == 0
+    assert _count(farm_db, "farm_record_keys") == 0
+
+
+# Routers: keys built from the request and results mapped to the response.
+
+
+@pytest.fixture
+def client(monkeypatch):
+    staged = []
+    store = {}
+
+    async def fake_ingest(records):
+        staged.append(records)
+        results = []
+        for key, *_ in records:
+            if key is not None and key in store:
+                results.append((store[key], False))
+                continue
+            record_id = 100 + sum(len(batch) for batch in staged) + len(results)
+            if key is not None:
+                store[key] = record_id
+            results.append((record_id, True))
+        return results
+
+    monkeypatch.setattr(farm_records, "_ingest", fake_ingest)
+    app = FastAPI()
+    app.include_router(farm_records.router)
+    client = TestClient(app)
+    client.staged = staged
+    return client
+
+
+def test_batch_keys_come_from_the_idempotency_key(client):
+    body = {"records": [{"worker_id": 1, "activity": "milk"}, {"worker_id": 1, "activity": "feed"}]}
+    first = client.post("/farm-records/batch", json=body, headers={"Idempotency-Key": "k1"}).json()
+    assert [key for key, *_ in client.staged[0]] == ["batch:k1:0", "batch:k1:1"]
+    assert first["created"] == 2 and first["duplicates"] == 0
+
+    again = client.post("/farm-records/batch", json=body, headers={"Idempotency-Key": "k1"}).json()
+    assert again == {"created": 0, "duplicates": 2, "ids": first["ids"]}
+
+
+def test_batch_without_key_is_not_deduplicated(client):
+    body = {"records": [{"worker_id": 1, "activity": "milk"}]}
+    client.post("/farm-records/batch", json=body)
+    assert client.staged[0][0][0] is None
+
+
+def test_sync_keys_on_device_and_client_id(client):
+    records = [
+        {"client_id": "a", "worker_id": 1, "activity": "milk"},
+        {"client_id": "b", "worker_id": 1, "activity": "feed"},
+    ]
+    first = client.post("/farm-records/sync", json={"device_id": "d1", "records": records}).json()
+    assert [key for key, *_ in client.staged[0]] == ["sync:d1:a", "sync:d1:b"]
+
+    replay = client.post(
+        "/farm-records/sync",
+        json={"device_id": "d1", "records": records[1:] + [{"client_id": "c", "worker_id": 1, "activity": "x"}]},
+    ).json()
+    assert (replay["created"], replay["duplicates"]) == (1, 1)
+    assert replay["records"][0] == {"client_id": "b", "id": first["records"][1]["id"], "created": False}
+    assert replay["records"][1]["client_id"] == "c" and replay["records"][1]["created"]
+
+    # The same client id from another device is a different record.
+    other = client.post("/farm-records/sync", json={"device_id": "d2", "records": records[:1]}).json()
+    assert other["records"][0]["created"]
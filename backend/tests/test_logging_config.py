@@ -0,0 +1,126 @@
+import io
+import json
+import logging
+import queue
+from logging.handlers import QueueListener
+
+import pytest
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.logging_config import (
+    ContextFilter,
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    request_id_var,
+)
+from app.core.middleware import RequestContextMiddleware
+
+
+@pytest.fixture
+def log():
+    """A logger routed through the queue to a JSON stream, as `setup_logging` does."""
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JSONFormatter())
+    log_queue = queue.Queue(maxsize=100)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter({"test.hot": 0.0}))
+    listener = QueueListener(log_queue, output)
+    listener.start()
+
+    logger = logging.getLogger("test")
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    def lines():
+        listener.stop()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    try:
+        yield logger, lines
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+        if listener._thread is not None:
+            listener.stop()
+
+
+def test_records_are_written_by_the_listener_as_json(log):
+    logger, lines = log
+    logger.info("moved %d animals", 3, extra={"farm_id": 7})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+
+    moved, failed = lines()
+    assert moved["message"] == "moved 3 animals"
+    assert (moved["logger"], moved["level"], moved["farm_id"]) == ("test", "INFO", 7)
+    assert "request_id" not in moved
+    assert "ValueError: boom" in failed["exception"]
+
+
+def test_hot_loggers_are_sampled_but_warnings_pass(log):
+    logger, lines = log
+    hot = logging.getLogger("test.hot.cache")
+    hot.debug("hit")
+    hot.info("hit")
+    hot.warning("slow")
+    logger.info("kept")
+    assert [line["message"] for line in lines()] == ["slow", "kept"]
+
+
+def test_most_specific_sample_rate_wins():
+    rates = ContextFilter({"app": 0.0, "app.cache": 1.0})
+    assert rates._rate("app.cache.redis") == 1.0
+    assert rates._rate("app.api") == 0.0
+    assert rates._rate("celery") == 1.0
+
+
+def test_records_carry_the_current_request_id(log):
+    logger, lines = log
+    token = request_id_var.set("rid-1")
+    try:
+        logger.info("inside")
+        logger.info("explicit", extra={"request_id": "rid-2"})
+    finally:
+        request_id_var.reset(token)
+    assert [line["request_id"] for line in lines()] == ["rid-1", "rid-2"]
+
+
+def test_full_queue_drops_records_without_blocking():
+    def dropped():
+        return REGISTRY.get_sample_value("log_records_dropped_total") or 0
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("test.full")
+    logger.addHandler(handler)
+    logger.propagate = False
+    before = dropped()
+    try:
+        for _ in range(3):
+            logger.warning("flood")
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+    assert handler.queue.qsize() == 1
+    assert dropped() - before == 2
+
+
+def test_lines_logged_by_a_request_match_its_access_log(log):
+    logger, lines = log
+
+    async def endpoint(request):
+        logger.info("handling")
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/", endpoint)])
+    response = TestClient(RequestContextMiddleware(app, sample_rate=0.0)).get("/")
+    (line,) = lines()
+    assert line["message"] == "handling"
+    assert line["request_id"] == response.headers["x-request-id"]
@@ -0,0 +1,62 @@
+import logging
+import uuid
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.logging_config import request_id_var
+from app.core.middleware import RequestContextMiddleware
+
+
+async def whoami(request):
+    return JSONResponse({"state": request.state.request_id, "var": request_id_var.get()})
+
+
+async def fail(request):
+    return PlainTextResponse("boom", status_code=503)
+
+
+def _access_log(caplog):
+    return [record for record in caplog.records if record.name == "api"]
+
+
+def _client(**kwargs):
+    app = Starlette(routes=[Route("/whoami", whoami), Route("/fail", fail)])
+    kwargs.setdefault("sample_rate", 1.0)
+    return TestClient(RequestContextMiddleware(app, **kwargs))
+
+
+def test_request_id_reaches_the_handler_and_the_response():
+    response = _client().get("/whoami")
+    request_id = response.headers["x-request-id"]
+    assert uuid.UUID(request_id)
+    assert response.json() == {"state": request_id, "var": request_id}
+    assert float(response.headers["x-process-time"]) >= 0
+    assert request_id_var.get() is None
+
+
+def test_each_request_gets_its_own_id():
+    client = _client()
+    ids = {client.get("/whoami").headers["x-request-id"] for _ in range(3)}
+    assert len(ids) == 3
+
+
+def test_access_log_carries_the_request_id(caplog):
+    with caplog.at_level(logging.INFO, logger="api"):
+        response = _client().get("/whoami")
+    (record,) = _access_log(caplog)
+    assert record.request_id == response.headers["x-request-id"]
+    assert (record.method, record.path, record.status) == ("GET", "/whoami", 200)
+
+
+@pytest.mark.parametrize(
+    "path, slow_ms, logged",
+    [("/whoami", 60_000, False), ("/fail", 60_000, True), ("/whoami", 0, True)],
+)
+def test_access_log_keeps_errors_and_slow_requests_unsampled(caplog, path, slow_ms, logged):
+    with caplog.at_level(logging.INFO, logger="api"):
+        _client(sample_rate=0.0, slow_ms=slow_ms).get(path)
+    assert bool(_access_log(caplog)) is logged
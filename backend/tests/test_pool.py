@@ -0,0 +1,41 @@
+import pytest
+
+from app.core.config import get_settings
+from app.core.pool import ENGINES_PER_PROCESS, max_overflow, pool_size
+
+
+def _settings(**values):
+    return get_settings().model_copy(update=values)
+
+
+def _peak(settings):
+    processes = settings.web_concurrency + settings.celery_worker_processes
+    per_engine = pool_size(settings) + max_overflow(settings)
+    return processes * ENGINES_PER_PROCESS * per_engine
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {},
+        {"db_max_connections": 500},
+        {"db_max_connections": 100, "web_concurrency": 8, "db_max_overflow": 10},
+        {"db_max_connections": 300, "celery_worker_processes": 40},
+    ],
+)
+def test_derived_pools_fit_the_budget(values):
+    settings = _settings(**values)
+    assert pool_size(settings) >= 1
+    assert _peak(settings) <= settings.db_max_connections
+
+
+def test_celery_workers_share_the_budget():
+    alone = _settings(db_max_connections=400, celery_worker_processes=0)
+    shared = _settings(db_max_connections=400, celery_worker_processes=12)
+    assert pool_size(alone) == 400 // (4 * 2) - 5
+    assert pool_size(shared) == 400 // (16 * 2) - 5
+
+
+def test_explicit_pool_size_is_kept():
+    settings = _settings(db_pool_size=20, db_max_overflow=7)
+    assert (pool_size(settings), max_overflow(settings)) == (20, 7)
@@ -0,0 +1,97 @@
+import json
+import re
+import threading
+import time
+
+import pytest
+
+from app.core import profiler
+
+FOLDED_LINE = re.compile(r"^(?P<stack>[^;\n]+(;[^;\n]+)*) (?P<count>[1-9]\d*)$")
+
+
+def busy_profiled_function(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture(scope="module")
+def folded():
+    """Folded stacks of a sampler run over a busy thread."""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_profiled_function, args=(stop,), name="busy-worker")
+    worker.start()
+    sampler = profiler.StackSampler(0.001).start()
+    try:
+        while sampler.samples < 20:
+            time.sleep(0.005)
+    finally:
+        sampler.stop()
+        stop.set()
+        worker.join()
+    return sampler.folded()
+
+
+def test_folded_lines_are_stacks_and_counts(folded):
+    lines = folded.splitlines()
+    assert lines and folded.endswith("\n")
+    for line in lines:
+        assert FOLDED_LINE.match(line), line
+    counts = [int(line.rpartition(" ")[2]) for line in lines]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_folded_stacks_run_from_thread_to_innermost_frame(folded):
+    stacks = [line.rpartition(" ")[0].split(";") for line in folded.splitlines()]
+    worker = [stack for stack in stacks if stack[0] == "busy-worker"]
+    assert worker
+    assert all(
+        any(frame.startswith("busy_profiled_function (test_profiler.py:") for frame in stack)
+        for stack in worker
+    )
+    # The sampler leaves its own thread out.
+    assert not any(stack[0] == "stack-sampler" for stack in stacks)
+
+
+def test_speedscope_profile_is_well_formed(folded):
+    profile = json.loads(json.dumps(profiler.to_speedscope(folded, "GET /farms")))
+    assert profile["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+    frames = [frame["name"] for frame in profile["shared"]["frames"]]
+    assert len(frames) == len(set(frames))
+
+    (sampled,) = profile["profiles"]
+    assert sampled["type"] == "sampled"
+    assert len(sampled["samples"]) == len(sampled["weights"])
+    assert sampled["endValue"] - sampled["startValue"] == sum(sampled["weights"])
+
+    # Every sample indexes valid frames and rebuilds its folded line.
+    rebuilt = "".join(
+        ";".join(frames[index] for index in sample) + f" {weight}\n"
+        for sample, weight in zip(sampled["samples"], sampled["weights"])
+    )
+    assert rebuilt == folded
+
+
+def test_empty_profile_converts():
+    profile = profiler.to_speedscope("", "idle")
+    assert profile["shared"]["frames"] == []
+    assert profile["profiles"][0]["samples"] == []
+    assert profile["profiles"][0]["endValue"] == 0
+
+
+def test_one_profile_at_a_time():
+    assert profiler.acquire()
+    try:
+        assert not profiler.acquire()
+    finally:
+        profiler.release()
+    assert profiler.acquire()
+    profiler.release()
+
+
+def test_request_profile_round_trip(fake_redis, monkeypatch, folded):
+    monkeypatch.setattr("app.core.cache.redis_client", fake_redis)
+    profiler.save_request_profile("rid-1", "GET /farms", folded)
+    assert profiler.load_request_profile("rid-1") == {"name": "GET /farms", "folded": folded}
+    assert 0 < fake_redis.ttl("profile:rid-1") <= profiler.REQUEST_PROFILE_TTL
+    assert profiler.load_request_profile("rid-2") is None
@@ -0,0 +1,87 @@
+import logging
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+
+from app.core import query_stats
+from app.core.middleware import QueryStatsMiddleware
+from app.core.pool import instrument_queries
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    instrument_queries(engine, "test")
+    yield engine
+    engine.dispose()
+
+
+def _client(engine, expose_headers=True):
+    app = FastAPI()
+
+    @app.get("/farms/{farm_id}/animals")
+    def animals(farm_id: int, n: int):
+        # One query per item, each with its own parameter.
+        with engine.connect() as conn:
+            for animal_id in range(n):
+                conn.execute(text("SELECT :id"), {"id": animal_id})
+            conn.execute(text("SELECT 1"))
+
+    return TestClient(QueryStatsMiddleware(app, expose_headers=expose_headers))
+
+
+def _n_plus_one_warnings(caplog):
+    return [r for r in caplog.records if r.name == query_stats.__name__ and hasattr(r, "repeats")]
+
+
+def _n_plus_one_total():
+    return REGISTRY.get_sample_value(
+        "db_n_plus_one_total", {"route": "/farms/{farm_id}/animals"}
+    ) or 0
+
+
+def test_repeated_statement_is_reported_as_n_plus_one(engine, caplog):
+    threshold = query_stats.settings.n_plus_one_threshold
+    before = _n_plus_one_total()
+    with caplog.at_level(logging.WARNING, logger=query_stats.__name__):
+        _client(engine).get(f"/farms/1/animals?n={threshold}")
+
+    (warning,) = _n_plus_one_warnings(caplog)
+    assert warning.repeats == threshold
+    assert warning.route == "/farms/{farm_id}/animals"
+    assert "SELECT ?" in warning.getMessage()
+    assert _n_plus_one_total() - before == 1
+
+
+def test_statements_below_the_threshold_pass(engine, caplog):
+    threshold = query_stats.settings.n_plus_one_threshold
+    before = _n_plus_one_total()
+    with caplog.at_level(logging.WARNING, logger=query_stats.__name__):
+        _client(engine).get(f"/farms/1/animals?n={threshold - 1}")
+    assert _n_plus_one_warnings(caplog) == []
+    assert _n_plus_one_total() == before
+
+
+def test_development_sends_statement_counts_as_headers(engine):
+    response = _client(engine).get("/farms/1/animals?n=3")
+    assert response.headers["x-db-queries"] == "4"
+    assert float(response.headers["x-db-time"]) > 0
+
+
+def test_production_sends_no_statement_headers(engine):
+    response = _client(engine, expose_headers=False).get("/farms/1/animals?n=3")
+    assert response.status_code == 200
+    assert "x-db-queries" not in response.headers
+    assert "x-db-time" not in response.headers
+
+
+def test_statements_outside_a_request_are_not_counted(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert query_stats.query_stats_var.get() is None
@@ -0,0 +1,98 @@
+import asyncio
+import itertools
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.api import deps
+from app.core import database, read_routing, security
+from app.core.database import Base
+
+PRIMARY = read_routing.AsyncSessionLocal
+
+
+@pytest.fixture
+def replicas(fake_async_redis, monkeypatch):
+    sessionmakers = ["replica-0", "replica-1"]
+    monkeypatch.setattr(read_routing, "async_redis_client", fake_async_redis)
+    monkeypatch.setattr(read_routing, "ReplicaSessionLocals", sessionmakers)
+    monkeypatch.setattr(read_routing, "_replicas", itertools.cycle(sessionmakers))
+    return sessionmakers
+
+
+def test_primary_without_replicas(fake_async_redis, monkeypatch):
+    monkeypatch.setattr(read_routing, "async_redis_client", fake_async_redis)
+    monkeypatch.setattr(read_routing, "ReplicaSessionLocals", [])
+
+    async def route():
+        await read_routing.mark_write("a@example.com")
+        return await read_routing.read_sessionmaker("a@example.com")
+
+    assert asyncio.run(route()) is PRIMARY
+    assert asyncio.run(fake_async_redis.keys("*")) == []
+
+
+def test_reads_round_robin_over_replicas(replicas):
+    async def route():
+        return [await read_routing.read_sessionmaker("a@example.com") for _ in range(3)]
+
+    assert asyncio.run(route()) == ["replica-0", "replica-1", "replica-0"]
+
+
+def test_read_your_writes_window(replicas, fake_async_redis):
+    async def route():
+        await read_routing.mark_write("a@example.com")
+        return (
+            await read_routing.read_sessionmaker("a@example.com"),
+            await read_routing.read_sessionmaker("b@example.com"),
+            await fake_async_redis.ttl("recent_write:a@example.com"),
+        )
+
+    writer, other, ttl = asyncio.run(route())
+    assert writer is PRIMARY
+    assert other == "replica-0"
+    assert 0 < ttl <= read_routing.settings.replica_read_your_writes_seconds
+
+    # Once the window lapses the writer is back on the replicas.
+    asyncio.run(fake_async_redis.delete("recent_write:a@example.com"))
+    assert asyncio.run(read_routing.read_sessionmaker("a@example.com")) == "replica-1"
+
+
+def test_primary_when_redis_fails(replicas, monkeypatch):
+    class Down:
+        async def exists(self, *keys):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(read_routing, "async_redis_client", Down())
+    assert asyncio.run(read_routing.read_sessionmaker("a@example.com")) is PRIMARY
+
+
+def test_read_user_is_loaded_on_the_replica(replicas, monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    replica = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(read_routing, "_replicas", itertools.repeat(replica))
+
+    def no_primary():
+        raise AssertionError("the read path opened a primary session")
+
+    monkeypatch.setattr(database, "AsyncSessionLocal", no_primary)
+    token = security.create_access_token({"sub": "a@example.com"})
+
+    async def read():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with replica() as db:
+            db.add(models.User(email="a@example.com", hashed_password="x"))
+            await db.commit()
+        sessions = deps.get_read_db(token=token)
+        db = await sessions.__anext__()
+        try:
+            user = await deps.get_read_user(db=db, token=token)
+            return user.email, db.bind
+        finally:
+            await sessions.aclose()
+            await engine.dispose()
+
+    assert asyncio.run(read()) == ("a@example.com", engine)
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from app.models import Animal, Crop, Farm, User
+from app.services import report_service
+
+
+def test_fingerprint_counts_the_rows_the_export_writes(db):
+    user = User(email="owner@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    farm = Farm(name="A", owner_id=user.id)
+    db.add(farm)
+    db.flush()
+    animal = dict(type="Cow", health_status="Healthy", vaccination_status="Up to Date", farm_id=farm.id)
+    db.add_all([
+        Animal(tag_number="1", **animal),
+        Animal(tag_number="2", **animal),
+        Animal(tag_number="3", is_deleted=True, **animal),
+        Crop(name="Maize", planting_date=datetime(2024, 1, 1), farm_id=farm.id),
+        Crop(name="Rice", planting_date=datetime(2024, 1, 1), farm_id=farm.id, is_deleted=True),
+    ])
+    db.commit()
+
+    fingerprint = report_service.fingerprint(db, [farm.id])
+    assert (fingerprint["animals"], fingerprint["crops"]) == (2, 1)
+    assert fingerprint["versions"] == [[farm.id, 0]]
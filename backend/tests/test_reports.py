@@ -0,0 +1,32 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints.reports import _byte_range
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=-", "items=0-1", "bytes=0-1,4-5", "bytes=a-b"])
+def test_full_body_when_no_usable_range(header):
+    assert _byte_range(header, 100) is None
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=10-", (10, 99)),
+        ("bytes=90-500", (90, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-500", (0, 99)),
+        (" bytes=5-5 ", (5, 5)),
+    ],
+)
+def test_single_range(header, expected):
+    assert _byte_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header, size", [("bytes=100-", 100), ("bytes=9-5", 100), ("bytes=-1", 0)])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(HTTPException) as raised:
+        _byte_range(header, size)
+    assert raised.value.status_code == 416
+    assert raised.value.headers == {"Content-Range": f"bytes */{size}"}
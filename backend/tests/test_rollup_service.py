@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, delete, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import (
+    Animal,
+    AnimalStatusSummary,
+    Crop,
+    CropSummary,
+    Farm,
+    RollupStaleFarm,
+    RollupWatermark,
+    User,
+)
+from app.services import rollup_service
+
+
+def _farms(db):
+    user = User(email="owner@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    farms = [Farm(name=name, owner_id=user.id) for name in ("A", "B", "C")]
+    db.add_all(farms)
+    db.flush()
+    return [farm.id for farm in farms]
+
+
+def _animal(farm_id, health="Healthy", **values):
+    return Animal(
+        tag_number="t", type="Cow", health_status=health,
+        vaccination_status="Up to Date", farm_id=farm_id, **values,
+    )
+
+
+def _status_counts(db):
+    return sorted(
+        db.execute(
+            select(
+                AnimalStatusSummary.farm_id,
+                AnimalStatusSummary.health_status,
+                AnimalStatusSummary.count,
+            )
+        ).all()
+    )
+
+
+def _set_watermark(db, refreshed_at):
+    db.execute(
+        update(RollupWatermark)
+        .where(RollupWatermark.name == "animal_status")
+        .values(refreshed_at=refreshed_at)
+    )
+
+
+def test_first_refresh_rebuilds_every_farm(db):
+    a, b, c = _farms(db)
+    db.add_all([_animal(a), _animal(a), _animal(b, "Sick"), _animal(c, is_deleted=True)])
+    db.add(Crop(name="Maize", planting_date=datetime(2024, 1, 1), farm_id=a))
+    db.commit()
+
+    assert rollup_service.refresh_rollups(db) == {"animal_status": 2, "crops": 1}
+    assert _status_counts(db) == [(a, "Healthy", 2), (b, "Sick", 1)]
+    assert db.execute(select(CropSummary.farm_id, CropSummary.planted, CropSummary.harvested)).all() == [(a, 1, 0)]
+    assert {w.name for w in db.scalars(select(RollupWatermark))} == {"animal_status", "crops"}
+
+
+def test_incremental_refresh_recomputes_changed_farms_only(db):
+    a, b, _ = _farms(db)
+    db.add_all([_animal(a), _animal(b)])
+    db.commit()
+    rollup_service.refresh_rollups(db)
+
+    # Long after the last refresh, with nothing changed since...
+    old = datetime.now(timezone.utc) - timedelta(days=1)
+    db.execute(update(Animal).values(updated_at=old))
+    _set_watermark(db, old + timedelta(hours=1))
+    db.commit()
+    assert rollup_service.refresh_rollup(db, rollup_service.ROLLUPS[0]) == 0
+    _set_watermark(db, old + timedelta(hours=1))
+
+    # ...farm A changes, farm B doesn't.
+    db.add(_animal(a, "Sick"))
+    db.commit()
+
+    assert rollup_service.refresh_rollup(db, rollup_service.ROLLUPS[0]) == 2
+    db.commit()
+    assert _status_counts(db) == [(a, "Healthy", 1), (a, "Sick", 1), (b, "Healthy", 1)]
+
+
+def test_writes_stamped_just_before_the_watermark_are_picked_up(db):
+    a, b, c = _farms(db)
+    db.add(_animal(a))
+    db.commit()
+    rollup_service.refresh_rollups(db)
+
+    watermark = datetime.now(timezone.utc)
+    db.execute(update(Animal).values(updated_at=watermark - timedelta(days=1)))
+    _set_watermark(db, watermark)
+    # Committed after the last refresh, but its transaction started before it.
+    late = watermark - rollup_service.WATERMARK_OVERLAP / 2
+    db.add(_animal(b, "Sick", updated_at=late))
+    # Beyond the overlap: taken to be seen by an earlier refresh.
+    db.add(_animal(c, "Sick", updated_at=watermark - 2 * rollup_service.WATERMARK_OVERLAP))
+    db.commit()
+
+    rollup_service.refresh_rollup(db, rollup_service.ROLLUPS[0])
+    db.commit()
+    assert _status_counts(db) == [(a, "Healthy", 1), (b, "Sick", 1)]
+
+
+def test_stale_farms_are_recomputed_and_consumed(db):
+    a, b, _ = _farms(db)
+    db.add_all([_animal(a), _animal(a)])
+    db.commit()
+    rollup_service.refresh_rollups(db)
+
+    # A row left farm A: nothing of A's has a new updated_at, but the
+    # trigger queued it (SQLite has no transition tables; queue by hand).
+    old = datetime.now(timezone.utc) - timedelta(days=1)
+    moved = db.scalars(select(Animal).where(Animal.farm_id == a)).first()
+    db.execute(update(Animal).where(Animal.id == moved.id).values(farm_id=b))
+    db.execute(update(Animal).where(Animal.id != moved.id).values(updated_at=old))
+    _set_watermark(db, old + timedelta(hours=1))
+    db.add(RollupStaleFarm(rollup="animal_status", farm_id=a))
+    db.commit()
+
+    rollup_service.refresh_rollup(db, rollup_service.ROLLUPS[0])
+    db.commit()
+    assert _status_counts(db) == [(a, "Healthy", 1), (b, "Healthy", 1)]
+    assert db.scalars(select(RollupStaleFarm)).all() == []
+
+
+def test_triggers_queue_the_farm_a_row_left(postgres):
+    engine = create_engine(postgres.url, connect_args={"options": postgres.options})
+    try:
+        Base.metadata.create_all(engine)
+        postgres.run("005_rollups.sql")
+        with sessionmaker(bind=engine, expire_on_commit=False)() as db:
+            a, b, c = _farms(db)
+            db.add_all([_animal(a), _animal(a), _animal(c)])
+            db.commit()
+            rollup_service.refresh_rollups(db)
+
+            moved = db.scalars(select(Animal).where(Animal.farm_id == a)).first()
+            db.execute(update(Animal).where(Animal.id == moved.id).values(farm_id=b))
+            db.execute(delete(Animal).where(Animal.farm_id == c))
+            db.commit()
+            queued = db.execute(select(RollupStaleFarm.rollup, RollupStaleFarm.farm_id)).all()
+            assert sorted(queued) == [("animal_status", a), ("animal_status", c)]
+
+            rollup_service.refresh_rollups(db)
+            assert _status_counts(db) == [(a, "Healthy", 1), (b, "Healthy", 1)]
+            assert db.scalars(select(RollupStaleFarm)).all() == []
+    finally:
+        engine.dispose()
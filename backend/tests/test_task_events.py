@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import models
+from app.api import deps
+from app.api.v1.endpoints import tasks as task_endpoints
+from app.core import task_events
+
+
+@pytest.fixture
+def events(fake_redis, fake_async_redis, monkeypatch):
+    monkeypatch.setattr(task_events, "redis_client", fake_redis)
+    monkeypatch.setattr(task_events, "async_redis_client", fake_async_redis)
+    monkeypatch.setattr("app.core.cache.redis_client", fake_redis)
+    return fake_redis
+
+
+def _watch(task_id, on_event=None, **kwargs):
+    """Run a watch to its end; `on_event(n)` runs after the n-th yield."""
+    kwargs.setdefault("heartbeat", 0.05)
+    kwargs.setdefault("max_seconds", 5)
+
+    async def run():
+        seen = []
+        async for event in task_events.subscribe(task_id, **kwargs):
+            seen.append(event)
+            if on_event:
+                on_event(len(seen))
+        return seen
+
+    return asyncio.run(run())
+
+
+def _states(seen):
+    return [event and event["state"] for event in seen]
+
+
+def test_finished_task_ends_at_once(events):
+    task_events.publish("t1", "SUCCESS", {"ok": True})
+    assert _watch("t1") == [{"task_id": "t1", "state": "SUCCESS", "meta": {"ok": True}}]
+
+
+def test_changes_stream_until_the_final_state(events):
+    def publish(n):
+        if n == 1:
+            task_events.publish("t1", "STARTED")
+            task_events.publish("t1", "PROGRESS", {"done": 1})
+            task_events.publish("t1", "FAILURE", {"error": "boom"})
+
+    states = [state for state in _states(_watch("t1", publish)) if state]
+    assert states == ["PENDING", "STARTED", "PROGRESS", "FAILURE"]
+
+
+def test_heartbeats_while_idle_and_cutoff_at_max_lifetime(events):
+    seen = _watch("t1", heartbeat=0.02, max_seconds=0.2)
+    assert seen[0]["state"] == "PENDING"
+    assert len(seen) > 2 and set(seen[1:]) == {None}
+
+
+def test_lost_task_ends_through_the_fallback(events):
+    checks = []
+
+    def fallback():
+        checks.append(True)
+        state = "PENDING" if len(checks) < 2 else "REVOKED"
+        return {"task_id": "t1", "state": state, "meta": None}
+
+    seen = _watch("t1", fallback=fallback, fallback_after=2, heartbeat=0.01)
+    assert len(checks) == 2
+    assert _states(seen) == ["PENDING", None, None, None, "REVOKED"]
+
+
+def test_event_stream_endpoint(events, monkeypatch):
+    user = models.User(id="u1", email="a@example.com", is_active=True)
+    monkeypatch.setattr(task_endpoints, "HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(task_endpoints, "STREAM_MAX_SECONDS", 0.05)
+    monkeypatch.setattr(
+        task_endpoints, "_backend_event",
+        lambda task_id: {"task_id": task_id, "state": "PENDING", "meta": None},
+    )
+    app = FastAPI()
+    app.include_router(task_endpoints.router, prefix="/tasks")
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    client = TestClient(app)
+
+    task_events.register("t1", "u1")
+    task_events.register("t2", "someone-else")
+    assert client.get("/tasks/t2/events").status_code == 403
+    assert client.get("/tasks/t3/events").status_code == 404
+
+    body = client.get("/tasks/t1/events").text
+    assert body.startswith('event: pending\ndata: {"task_id": "t1", "state": "PENDING", "meta": null}\n\n')
+    assert ": keep-alive\n\n" in body
+
+    task_events.publish("t1", "SUCCESS", {"report_id": "r"})
+    response = client.get("/tasks/t1/events")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    event, data = response.text.strip().split("\n")
+    assert event == "event: success"
+    assert json.loads(data.removeprefix("data: "))["meta"] == {"report_id": "r"}
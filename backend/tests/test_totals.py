@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+from psycopg import sql
+
+import totals
+
+
+class FakeCursor:
+    """Answers COUNT(*), EXPLAIN, reltuples and page queries from fixed data."""
+
+    connection = None
+    adapters = None
+
+    def __init__(self, rows=(), count=0, estimate=0):
+        self.rows = list(rows)
+        self.count = count
+        self.estimate = estimate
+        self.queries = []
+        self._result = None
+
+    async def execute(self, query, params=(), prepare=None):
+        text = query if isinstance(query, str) else query.as_string(None)
+        self.queries.append((text, tuple(params)))
+        if text.startswith("EXPLAIN"):
+            self._result = [([{"Plan": {"Plan Rows": self.estimate}}],)]
+        elif "reltuples" in text:
+            self._result = [(self.estimate,)]
+        elif text.startswith("SELECT COUNT(*)"):
+            self._result = [(self.count,)]
+        else:
+            limit, offset = params[-2:]
+            self._result = self.rows[offset:offset + limit]
+
+    async def fetchone(self):
+        return self._result[0] if self._result else None
+
+    async def fetchall(self):
+        return self._result
+
+    def counts(self):
+        return sum(1 for text, _ in self.queries if text.startswith("SELECT COUNT(*)"))
+
+
+PAGE = "SELECT id FROM workers ORDER BY id LIMIT %s OFFSET %s"
+
+
+@pytest.fixture(autouse=True)
+def fake_totals_redis(fake_async_redis, monkeypatch):
+    monkeypatch.setattr(totals, "redis_client", fake_async_redis)
+    return fake_async_redis
+
+
+def _paginate(cursor, limit, offset, strategy, **kwargs):
+    return asyncio.run(
+        totals.paginate(cursor, "workers", PAGE, limit, offset, strategy, **kwargs)
+    )
+
+
+def test_has_more_from_the_extra_row():
+    cursor = FakeCursor(rows=[(n,) for n in range(5)])
+    rows, page = _paginate(cursor, 2, 0, "none")
+    assert rows == [(0,), (1,)]
+    assert page == {"total": None, "limit": 2, "offset": 0, "has_more": True}
+    assert cursor.queries[0][1] == (3, 0)
+
+    rows, page = _paginate(cursor, 2, 4, "none")
+    assert rows == [(4,)] and page["has_more"] is False
+
+
+def test_last_page_gives_the_total_without_counting():
+    cursor = FakeCursor(rows=[(n,) for n in range(5)], count=99)
+    _, page = _paginate(cursor, 2, 4, "exact")
+    assert page["total"] == 5
+    assert cursor.counts() == 0
+
+
+def test_offset_past_the_end_still_counts():
+    cursor = FakeCursor(rows=[(n,) for n in range(5)], count=5)
+    rows, page = _paginate(cursor, 2, 10, "exact")
+    assert rows == [] and page["total"] == 5
+
+
+def test_exact_count_is_cached_until_invalidated():
+    cursor = FakeCursor(rows=[(n,) for n in range(5)], count=5)
+    assert _paginate(cursor, 2, 0, "exact")[1]["total"] == 5
+    cursor.count = 6
+    assert _paginate(cursor, 2, 0, "exact")[1]["total"] == 5
+    assert cursor.counts() == 1
+
+    asyncio.run(totals.invalidate("workers"))
+    assert _paginate(cursor, 2, 0, "exact")[1]["total"] == 6
+    assert cursor.counts() == 2
+
+
+def test_invalidation_reaches_other_workers(fake_redis):
+    cursor = FakeCursor(rows=[(n,) for n in range(5)], count=5)
+    _paginate(cursor, 2, 0, "exact")
+    # Another worker's write: only the shared version key changes.
+    fake_redis.incr("totals:version:workers")
+    cursor.count = 7
+    assert _paginate(cursor, 2, 0, "exact")[1]["total"] == 7
+
+
+def test_cached_counts_expire(fake_redis):
+    cursor = FakeCursor(rows=[(n,) for n in range(5)], count=5)
+    _paginate(cursor, 2, 0, "exact")
+    (key,) = fake_redis.keys("totals:count:workers:*")
+    assert 0 < fake_redis.ttl(key) <= totals.EXACT_COUNT_TTL
+
+
+def test_filtered_counts_are_cached_apart():
+    where = sql.SQL("worker_id = %s")
+    cursor = FakeCursor(count=3)
+    count = lambda params: asyncio.run(totals.count(cursor, "workers", "exact", where, params))
+    assert count((1,)) == 3
+    cursor.count = 4
+    assert count((2,)) == 4
+    assert count((1,)) == 3
+    assert cursor.queries[0] == ('SELECT COUNT(*) FROM "workers" WHERE worker_id = %s', (1,))
+
+
+def test_exact_count_without_redis(monkeypatch):
+    class Down:
+        async def get(self, key):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(totals, "redis_client", Down())
+    cursor = FakeCursor(count=5)
+    assert asyncio.run(totals.count(cursor, "workers", "exact")) == 5
+    assert asyncio.run(totals.count(cursor, "workers", "exact")) == 5
+    assert cursor.counts() == 2
+
+
+def test_estimate_uses_reltuples_for_large_tables():
+    cursor = FakeCursor(count=5, estimate=2_000_000)
+    assert asyncio.run(totals.count(cursor, "workers", "estimate")) == 2_000_000
+    assert cursor.counts() == 0
+
+
+def test_estimate_counts_small_or_unanalyzed_tables():
+    for estimate in (-1, 50):
+        cursor = FakeCursor(count=42, estimate=estimate)
+        assert asyncio.run(totals.count(cursor, "workers", "estimate")) == 42
+
+
+def test_filtered_estimate_uses_explain():
+    where = sql.SQL("worker_id = %s")
+    cursor = FakeCursor(count=3, estimate=50_000)
+    assert asyncio.run(totals.count(cursor, "workers", "estimate", where, (1,))) == 50_000
+    assert cursor.queries[0][0] == 'EXPLAIN (FORMAT JSON) SELECT 1 FROM "workers" WHERE worker_id = %s'
+
+
+def test_none_never_counts():
+    cursor = FakeCursor(count=5)
+    assert asyncio.run(totals.count(cursor, "workers", "none")) is None
+    assert cursor.queries == []
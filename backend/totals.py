@@ -0,0 +1,184 @@
+"""
+Totals strategies for paginated list endpoints.
+
+`SELECT COUNT(*)` is a full scan, so running it on every page request makes
+paging O(table). Callers pick a strategy per request with `?total=`:
+
+- exact:    real count, cached in Redis per table (and filter) under the
+            table's version; `invalidate` bumps the version on every write
+            through this API, so no worker serves a count from before it
+- estimate: planner estimate, from pg_class.reltuples for the whole table or
+            EXPLAIN for a filtered query (exact when the estimate is small)
+- none:     no total at all; rely on `has_more`
+
+Writes that bypass the routers (psql, migrations) don't bump the version;
+their effect on cached counts lasts at most `EXACT_COUNT_TTL`.
+
+`has_more` is always available: pages are fetched with LIMIT limit + 1.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple, Union
+
+import redis.asyncio as aioredis
+from psycopg import sql
+
+logger = logging.getLogger("totals")
+
+TotalStrategy = Literal["exact", "estimate", "none"]
+
+# Seconds a cached exact count lives; bounds the staleness left by writes
+# that don't call `invalidate`.
+EXACT_COUNT_TTL = 60
+# Below this many (estimated) rows an exact count is cheap, so use it.
+ESTIMATE_EXACT_BELOW = 10_000
+
+# Shared by every worker, so an invalidation in one reaches all of them.
+# Without Redis, exact counts are simply not cached.
+redis_client = aioredis.Redis.from_url(
+    os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True
+)
+
+
+def _version_key(table: str) -> str:
+    return f"totals:version:{table}"
+
+
+def _count_key(table: str, version: str, where: str, params: Sequence[Any]) -> str:
+    digest = hashlib.sha256(repr((where, tuple(params))).encode()).hexdigest()
+    return f"totals:count:{table}:{version}:{digest}"
+
+
+async def invalidate(table: str) -> None:
+    """
+    Retire the cached exact counts for `table`; call after every write to
+    it. Counts cached under the old version expire on their own.
+    """
+    try:
+        await redis_client.incr(_version_key(table))
+    except Exception as e:
+        logger.error(f"Error invalidating cached counts of {table}: {e}")
+
+
+def _count_query(
+    table: str, where: Optional[sql.Composable], select: str = "COUNT(*)"
+) -> sql.Composed:
+    query = sql.SQL("SELECT {} FROM {}").format(sql.SQL(select), sql.Identifier(table))
+    if where is not None:
+        query = sql.SQL("{} WHERE {}").format(query, where)
+    return query
+
+
+async def _exact_count(
+    cursor, table: str, where: Optional[sql.Composable], params: Sequence[Any]
+) -> int:
+    where_sql = where.as_string(cursor) if where is not None else ""
+    try:
+        # Read the version before counting: if a write lands meanwhile, the
+        # count is stored under a version nobody reads any more.
+        version = await redis_client.get(_version_key(table)) or "0"
+        key = _count_key(table, version, where_sql, params)
+        cached = await redis_client.get(key)
+        if cached is not None:
+            return int(cached)
+    except Exception as e:
+        logger.error(f"Error reading the cached count of {table}: {e}")
+        key = None
+    await cursor.execute(_count_query(table, where), params, prepare=True)
+    total = (await cursor.fetchone())[0]
+    if key is not None:
+        try:
+            await redis_client.set(key, total, ex=EXACT_COUNT_TTL)
+        except Exception as e:
+            logger.error(f"Error caching the count of {table}: {e}")
+    return total
+
+
+async def _estimated_count(
+    cursor, table: str, where: Optional[sql.Composable], params: Sequence[Any]
+) -> int:
+    if where is not None:
+        await cursor.execute(
+            sql.SQL("EXPLAIN (FORMAT JSON) {}").format(_count_query(table, where, "1")),
+            params,
+        )
+        estimate = (await cursor.fetchone())[0][0]["Plan"]["Plan Rows"]
+        if estimate < ESTIMATE_EXACT_BELOW:
+            return await _exact_count(cursor, table, where, params)
+        return estimate
+    await cursor.execute(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass;",
+        (table,),
+        prepare=True,
+    )
+    row = await cursor.fetchone()
+    estimate = row[0] if row else -1
+    # reltuples is -1 until the table has been vacuumed/analyzed.
+    if estimate < ESTIMATE_EXACT_BELOW:
+        return await _exact_count(cursor, table, None, ())
+    return estimate
+
+
+async def count(
+    cursor,
+    table: str,
+    strategy: TotalStrategy,
+    where: Optional[sql.Composable] = None,
+    params: Sequence[Any] = (),
+) -> Optional[int]:
+    """
+    Row count of `table`, or of the rows matching `where` (with `params`).
+    """
+    if strategy == "exact":
+        return await _exact_count(cursor, table, where, params)
+    if strategy == "estimate":
+        return await _estimated_count(cursor, table, where, params)
+    return None
+
+
+async def fetch_page(
+    cursor,
+    query: Union[str, sql.Composable],
+    params: Sequence[Any],
+    limit: int,
+    offset: int,
+) -> Tuple[List[tuple], bool]:
+    """
+    Run `query` (which must end in `LIMIT %s OFFSET %s`) for one page and
+    report whether another page follows.
+    """
+    await cursor.execute(query, (*params, limit + 1, offset), prepare=True)
+    rows = await cursor.fetchall()
+    return rows[:limit], len(rows) > limit
+
+
+async def paginate(
+    cursor,
+    table: str,
+    query: Union[str, sql.Composable],
+    limit: int,
+    offset: int,
+    strategy: TotalStrategy,
+    params: Sequence[Any] = (),
+    where: Optional[sql.Composable] = None,
+) -> Tuple[List[tuple], Dict[str, Any]]:
+    """
+    Fetch one page plus the pagination fields of `PaginatedResponse`.
+
+    `where` is the filter already embedded in `query`; `params` must be its
+    parameters and are reused to count the matching rows.
+    """
+    rows, has_more = await fetch_page(cursor, query, params, limit, offset)
+    if strategy != "none" and not has_more and (offset == 0 or rows):
+        # The last page tells us the exact total for free.
+        total = offset + len(rows)
+    else:
+        total = await count(cursor, table, strategy, where, params)
+    return rows, {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "has_more": has_more,
+    }